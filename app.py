@@ -1,18 +1,40 @@
-from flask import Flask, request, jsonify, session, send_file
+from flask import Flask, request, jsonify, session, send_file, Response, stream_with_context
 from flask_cors import CORS
 from pdf_processor import process_file
+from pdf_renderer import create_pdf_from_text, render_cache, render_pdf
 import os
-from openai import OpenAI
 import json
-from docusign_esign import ApiClient, EnvelopesApi, EnvelopeDefinition, Document, Signer, SignHere, Tabs, Text, DateSigned, Recipients
+import threading
+from contextlib import contextmanager
+from functools import partial
+from docusign_esign import ApiClient, EnvelopesApi, TemplatesApi, EnvelopeDefinition, Document, Signer, SignHere, Tabs, Text, DateSigned, Recipients
 import base64
 from fpdf import FPDF
 import traceback
 from dotenv import load_dotenv, find_dotenv
 from flask_session import Session
-from database import init_db, Session as DBSession, generate_token
+from database import init_db, Session as DBSession, generate_token, engine as db_engine
 from services.ai_service import AIService
+from services.nltk_resources import nltk_resources
+from services.pdf_layout import PDFLayoutIndex
+from services.signature_detector import detect_signature_blocks, SIGNATURE_DETECTOR_MIN_CONFIDENCE
+from services.envelope_builder import EnvelopeBuilder, fill_placeholders
 from services.invitation_service import InvitationService
+from services.extraction_cache import ExtractionCache
+from services.llm_cache import LLMResponseCache, MemoryCacheBackend
+from services.analysis_pipeline import ChunkedAnalyzer
+from services.docusign_auth import DocuSignTokenManager
+from services.bulk_send import BulkEnvelopeSender
+from services.job_queue import JobQueue, SQLiteJobStore, FINISHED_STATUSES
+from services.openai_clients import OpenAIClientRegistry
+from services.collaboration_service import CollaborationService
+from services.template_service import TemplateService
+from services.search_index import SearchIndex, DOC_TYPES
+from services.clause_index import ClauseIndex
+from models import Template, Contract
+from services.pagination import PaginationError, parse_fields, parse_limit, encode_cursor, decode_cursor
+from services.diff_engine import GRANULARITIES
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, Any
 import PyPDF2
 import pdfplumber
@@ -21,11 +43,11 @@ import time
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
-import tempfile
 import os
 from flask import has_request_context
 from datetime import datetime, timedelta
 from sqlalchemy import text
+from sqlalchemy.orm import undefer
 from dateutil.tz import UTC
 
 # Load environment variables
@@ -46,40 +68,64 @@ Session(app)
 # Initialize database
 init_db()
 
+# Full-text search over templates and contracts, kept current by the database
+search_index = SearchIndex(db_engine)
+try:
+    search_index.install()
+except Exception as e:
+    print(f"Error installing search index: {str(e)}")
+
+# OpenAI clients are built once per API key and reused across requests
+openai_clients = OpenAIClientRegistry(max_clients=int(os.getenv('OPENAI_CLIENT_CACHE_SIZE', '32')))
+
 # Configure OpenAI
 def configure_openai():
     """Configure OpenAI API key"""
     api_key = os.getenv('OPENAI_API_KEY')
     if not api_key:
         raise ValueError("OpenAI API key not found in environment variables")
-    return OpenAI(api_key=api_key)
+    return openai_clients.get(api_key)
 
 # Create OpenAI client
 client = configure_openai()
 
-@app.before_request
-def before_request():
-    configure_openai()
-    configure_docusign()
+def get_openai_client():
+    """Return the pooled client for the session's OpenAI key, or the environment key"""
+    return openai_clients.get(get_openai_key())
+
+# Keys for threads working on behalf of a session, which have no request context
+_thread_credentials = threading.local()
+
+def session_credentials():
+    """API keys the current session supplied, to hand to work done outside the request"""
+    if has_request_context():
+        keys = {'openai_key': session.get('openai_key'), 'docusign_key': session.get('docusign_key')}
+    else:
+        keys = getattr(_thread_credentials, 'keys', None) or {}
+    return {name: value for name, value in keys.items() if value}
+
+@contextmanager
+def using_credentials(credentials):
+    """Make get_openai_key and get_docusign_key return these keys in this thread"""
+    previous = getattr(_thread_credentials, 'keys', None)
+    _thread_credentials.keys = credentials
+    try:
+        yield
+    finally:
+        _thread_credentials.keys = previous
+
+def _credential(name, env_name):
+    if has_request_context():
+        value = session.get(name)
+    else:
+        value = (getattr(_thread_credentials, 'keys', None) or {}).get(name)
+    return value or os.getenv(env_name)
 
 def get_openai_key():
-    if not has_request_context():
-        return os.getenv('OPENAI_API_KEY')
-    return session.get('openai_key') or os.getenv('OPENAI_API_KEY')
+    return _credential('openai_key', 'OPENAI_API_KEY')
 
 def get_docusign_key():
-    if not has_request_context():
-        return os.getenv('DOCUSIGN_INTEGRATION_KEY')
-    return session.get('docusign_key') or os.getenv('DOCUSIGN_INTEGRATION_KEY')
-
-def configure_docusign():
-    app.config.update(
-        DOCUSIGN_INTEGRATION_KEY=get_docusign_key(),
-        DOCUSIGN_USER_ID=os.getenv('DOCUSIGN_USER_ID'),
-        DOCUSIGN_ACCOUNT_ID=os.getenv('DOCUSIGN_ACCOUNT_ID'),
-        DOCUSIGN_PRIVATE_KEY_PATH='private.key',
-        DOCUSIGN_AUTH_SERVER='account-d.docusign.com'
-    )
+    return _credential('docusign_key', 'DOCUSIGN_INTEGRATION_KEY')
 
 # Initial configuration with environment variables
 app.config.update(
@@ -94,7 +140,39 @@ app.config.update(
 upload_folder = os.path.join(os.path.dirname(__file__), 'uploads')
 os.makedirs(upload_folder, exist_ok=True)
 ai_service = AIService()
+extraction_cache = ExtractionCache(
+    os.path.join(upload_folder, 'extraction_cache'),
+    max_memory_entries=int(os.getenv('EXTRACTION_CACHE_ENTRIES', '256')),
+    max_disk_bytes=int(os.getenv('EXTRACTION_CACHE_MAX_BYTES', str(512 * 1024 * 1024)))
+)
+llm_cache = LLMResponseCache(
+    MemoryCacheBackend(max_entries=int(os.getenv('LLM_CACHE_ENTRIES', '512'))),
+    ttl=int(os.getenv('LLM_CACHE_TTL', '3600'))
+)
+contract_analyzer = ChunkedAnalyzer(
+    max_chunk_chars=int(os.getenv('ANALYSIS_CHUNK_CHARS', '12000')),
+    max_workers=int(os.getenv('OPENAI_MAX_PARALLEL_CALLS', '4'))
+)
 invitation_service = InvitationService(DBSession())
+clause_index = ClauseIndex(
+    os.path.join(upload_folder, 'clause_index'),
+    dim=int(os.getenv('CLAUSE_INDEX_DIM', '1024'))
+)
+
+def index_clauses(doc_type, doc_id, content):
+    """Keep the clause index current; a failure here must not fail the request."""
+    try:
+        clause_index.index_document(doc_type, doc_id, content)
+    except Exception as e:
+        print(f"Error indexing clauses for {doc_type} {doc_id}: {str(e)}")
+
+BULK_SEND_MAX_ITEMS = int(os.getenv('BULK_SEND_MAX_ITEMS', '500'))
+BULK_RENDER_WORKERS = int(os.getenv('BULK_RENDER_WORKERS', str(os.cpu_count() or 1)))
+bulk_sender = BulkEnvelopeSender(
+    max_workers=int(os.getenv('BULK_SEND_CONCURRENCY', '8')),
+    rate_per_second=float(os.getenv('DOCUSIGN_RATE_LIMIT_PER_SECOND', '10')),
+    max_retries=int(os.getenv('BULK_SEND_MAX_RETRIES', '4'))
+)
 
 # Debug: Find all .env files
 print("Looking for .env files...")
@@ -147,41 +225,32 @@ def get_jwt_token():
         traceback.print_exc()
         raise
 
+docusign_tokens = DocuSignTokenManager(
+    host="https://demo.docusign.net/restapi",
+    oauth_host_name=app.config['DOCUSIGN_AUTH_SERVER'],
+    private_key_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'private.key'),
+    refresh_margin=int(os.getenv('DOCUSIGN_TOKEN_REFRESH_MARGIN', '300'))
+)
+
 def create_docusign_api_client():
     try:
-        print("Creating DocuSign API client...")
-        api_client = ApiClient()
-        api_client.host = "https://demo.docusign.net/restapi"
-        
-        # Get private key bytes
-        private_key_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'private.key')
-        print(f"Reading private key from: {private_key_path}")
-        with open(private_key_path, 'rb') as key_file:
-            private_key_bytes = key_file.read()
-        
-        print("Requesting JWT user token from DocuSign...")
-        print(f"Integration Key: {app.config['DOCUSIGN_INTEGRATION_KEY']}")
-        print(f"Auth Server: {app.config['DOCUSIGN_AUTH_SERVER']}")
-        
-        # Request token with required parameters
-        response = api_client.request_jwt_user_token(
-            app.config['DOCUSIGN_INTEGRATION_KEY'],  # client_id
-            app.config['DOCUSIGN_USER_ID'],  # user_id
-            app.config['DOCUSIGN_AUTH_SERVER'],  # oauth_host_name
-            private_key_bytes,  # private_key_bytes
-            3600  # expires_in (1 hour)
+        print("Getting DocuSign API client...")
+        # Reuses the cached access token and HTTP connection pool until shortly before expiry
+        return docusign_tokens.get_api_client(
+            get_docusign_key(),  # client_id
+            app.config['DOCUSIGN_USER_ID']  # user_id
         )
         
-        print("Successfully got access token from DocuSign")
-        api_client.set_default_header("Authorization", f"Bearer {response.access_token}")
-        return api_client
-        
     except Exception as e:
         print(f"Error creating DocuSign API client: {str(e)}")
         import traceback
         traceback.print_exc()
         raise
 
+def call_docusign(call):
+    """Run call(api_client) with the session's DocuSign credentials, re-authenticating once on a 401"""
+    return docusign_tokens.call(get_docusign_key(), app.config['DOCUSIGN_USER_ID'], call)
+
 def get_db():
     db = DBSession()
     try:
@@ -262,8 +331,8 @@ def upload_file():
         # Read file bytes
         file_bytes = file.read()
         
-        # Process file based on type
-        content = process_file(file_bytes, file.filename)
+        # Process file based on type, reusing text extracted from identical uploads
+        content = extraction_cache.get_or_extract(file_bytes, file.filename, process_file)
         
         if content is None:
             return jsonify({'error': 'Could not process file'}), 400
@@ -274,21 +343,7 @@ def upload_file():
         print(traceback.format_exc())
         return jsonify({'error': f'Failed to process file: {str(e)}'}), 500
 
-@app.route('/api/analyze', methods=['POST'])
-def analyze_contract():
-    if not request.json or 'content' not in request.json:
-        return jsonify({"error": "No content provided"}), 400
-
-    try:
-        content = request.json['content']
-        
-        # Get model from environment variable or use default
-        model = os.getenv('OPENAI_MODEL', 'gpt-4-1106-preview')
-        
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": """You are a legal expert analyzing contracts. 
+ANALYSIS_SYSTEM_PROMPT = """You are a legal expert analyzing contracts. 
                 Provide a structured analysis with clear section headers and items.
                 
                 Format your response exactly like this:
@@ -301,56 +356,39 @@ def analyze_contract():
                 - Obligation: Description
                 - Responsibility: Details
 
-                And so on for each section. Always use 'SECTION:' to start a new section."""},
-                {"role": "user", "content": f"Analyze this contract:\n\n{content}"}
+                And so on for each section. Always use 'SECTION:' to start a new section."""
+
+def run_contract_analysis(content):
+    """Analyze a contract and return the parsed sections"""
+    # Get model from environment variable or use default
+    model = os.getenv('OPENAI_MODEL', 'gpt-4-1106-preview')
+    # Resolved here because chunks run on pool threads without the request's session
+    openai_client = get_openai_client()
+    
+    def complete(user_prompt):
+        return llm_cache.chat_completion(
+            openai_client,
+            model=model,
+            messages=[
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
             ],
             temperature=0.7,
             max_tokens=2000
         )
+    
+    # Long contracts are split on section boundaries and analyzed in parallel
+    return contract_analyzer.analyze(content, complete)
+
+@app.route('/api/analyze', methods=['POST'])
+def analyze_contract():
+    if not request.json or 'content' not in request.json:
+        return jsonify({"error": "No content provided"}), 400
+
+    try:
+        content = request.json['content']
         
-        # Extract the analysis from the response
-        analysis = response.choices[0].message.content
-        
-        # Parse the analysis into structured sections
-        sections = []
-        current_section = None
-        current_items = []
-        
-        for line in analysis.split('\n'):
-            line = line.strip()
-            if not line:
-                continue
-                
-            if line.startswith('SECTION:'):
-                # Save previous section if it exists
-                if current_section:
-                    sections.append({
-                        'title': current_section,  # Using title instead of name
-                        'items': current_items
-                    })
-                current_section = line.replace('SECTION:', '').strip()
-                current_items = []
-            elif line.startswith('-'):
-                # Parse item
-                item_text = line[1:].strip()
-                if ':' in item_text:
-                    title, description = item_text.split(':', 1)
-                    current_items.append({
-                        'title': title.strip(),
-                        'description': description.strip()
-                    })
-                else:
-                    current_items.append({
-                        'title': '',
-                        'description': item_text
-                    })
-        
-        # Add the last section
-        if current_section:
-            sections.append({
-                'title': current_section,
-                'items': current_items
-            })
+        sections = run_contract_analysis(content)
         
         return jsonify({
             'success': True,
@@ -367,7 +405,8 @@ def analyze_signature_positions():
         data = request.json
         contract_text = data.get('contract_text', '')
         
-        response = client.chat.completions.create(
+        suggestions = llm_cache.chat_completion(
+            get_openai_client(),
             model=os.getenv('OPENAI_MODEL', 'gpt-4-1106-preview'),
             messages=[
                 {"role": "system", "content": "You are a legal expert analyzing contracts for signature positions."},
@@ -377,9 +416,6 @@ def analyze_signature_positions():
             max_tokens=1000
         )
         
-        # Extract the suggestions
-        suggestions = response.choices[0].message.content
-        
         return jsonify({
             "success": True,
             "positions": suggestions
@@ -389,16 +425,7 @@ def analyze_signature_positions():
         print(f"Error analyzing signature positions: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/analyze/risks', methods=['POST'])
-def analyze_risks():
-    try:
-        data = request.json
-        contract_text = data.get('content', '')  # Changed from contract_text to match frontend
-        
-        response = client.chat.completions.create(
-            model=os.getenv('OPENAI_MODEL', 'gpt-4-1106-preview'),
-            messages=[
-                {"role": "system", "content": """You are a legal expert analyzing contracts for risks.
+RISK_SYSTEM_PROMPT = """You are a legal expert analyzing contracts for risks.
                 Format your response exactly like this:
                 
                 RISK_SCORE: [1-10]
@@ -410,48 +437,63 @@ def analyze_risks():
                 - Minor Concern | LOW | Description of minor risk
                 
                 Always use the exact headers RISK_SCORE:, SUMMARY:, and CONCERNS:
-                Risk levels must be HIGH, MEDIUM, or LOW"""},
-                {"role": "user", "content": f"Analyze this contract for risks:\n\n{contract_text}"}
-            ],
-            temperature=0.7,
-            max_tokens=1000
-        )
-        
-        # Extract the analysis from the response
-        analysis = response.choices[0].message.content
-        
-        # Parse the response into structured format
-        lines = analysis.split('\n')
-        result = {
-            'risk_score': None,
-            'summary': '',
-            'concerns': []
-        }
+                Risk levels must be HIGH, MEDIUM, or LOW"""
+
+def run_risk_analysis(contract_text):
+    """Score a contract's risks and return the parsed result"""
+    analysis = llm_cache.chat_completion(
+        get_openai_client(),
+        model=os.getenv('OPENAI_MODEL', 'gpt-4-1106-preview'),
+        messages=[
+            {"role": "system", "content": RISK_SYSTEM_PROMPT},
+            {"role": "user", "content": f"Analyze this contract for risks:\n\n{contract_text}"}
+        ],
+        temperature=0.7,
+        max_tokens=1000
+    )
+    
+    # Parse the response into structured format
+    lines = analysis.split('\n')
+    result = {
+        'risk_score': None,
+        'summary': '',
+        'concerns': []
+    }
+    
+    in_concerns = False
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+            
+        if line.startswith('RISK_SCORE:'):
+            try:
+                score = line.split(':', 1)[1].strip()
+                result['risk_score'] = int(score)
+            except:
+                result['risk_score'] = 'N/A'
+        elif line.startswith('SUMMARY:'):
+            result['summary'] = line.split(':', 1)[1].strip()
+        elif line == 'CONCERNS:':
+            in_concerns = True
+        elif in_concerns and line.startswith('-'):
+            parts = line[1:].strip().split('|')
+            if len(parts) >= 3:
+                result['concerns'].append({
+                    'title': parts[0].strip(),
+                    'level': parts[1].strip(),
+                    'description': parts[2].strip()
+                })
+
+    return result
+
+@app.route('/api/analyze/risks', methods=['POST'])
+def analyze_risks():
+    try:
+        data = request.json
+        contract_text = data.get('content', '')  # Changed from contract_text to match frontend
         
-        in_concerns = False
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-                
-            if line.startswith('RISK_SCORE:'):
-                try:
-                    score = line.split(':', 1)[1].strip()
-                    result['risk_score'] = int(score)
-                except:
-                    result['risk_score'] = 'N/A'
-            elif line.startswith('SUMMARY:'):
-                result['summary'] = line.split(':', 1)[1].strip()
-            elif line == 'CONCERNS:':
-                in_concerns = True
-            elif in_concerns and line.startswith('-'):
-                parts = line[1:].strip().split('|')
-                if len(parts) >= 3:
-                    result['concerns'].append({
-                        'title': parts[0].strip(),
-                        'level': parts[1].strip(),
-                        'description': parts[2].strip()
-                    })
+        result = run_risk_analysis(contract_text)
         
         return jsonify(result)
         
@@ -459,27 +501,18 @@ def analyze_risks():
         print(f"Error in risk analysis endpoint: {str(e)}")
         return jsonify({"error": f"Risk analysis failed: {str(e)}"}), 500
 
-@app.route('/api/rewrite', methods=['POST'])
-def rewrite_contract():
-    try:
-        data = request.json
-        if not data or 'content' not in data or 'instructions' not in data:
-            return jsonify({"error": "Missing content or instructions"}), 400
-            
-        contract_text = data.get('content', '')
-        instructions = data.get('instructions', '')
-        
-        response = client.chat.completions.create(
-            model=os.getenv('OPENAI_MODEL', 'gpt-4-1106-preview'),
-            messages=[
-                {"role": "system", "content": """You are a legal expert rewriting contracts.
+REWRITE_SYSTEM_PROMPT = """You are a legal expert rewriting contracts.
                 Follow these guidelines:
                 1. Maintain all essential legal terms and clauses
                 2. Keep the same structure unless specified otherwise
                 3. Ensure all parties, dates, and key terms are preserved
                 4. Format the output as a proper legal document
-                5. Only make changes that align with the given instructions"""},
-                {"role": "user", "content": f"""Please rewrite this contract following these specific instructions:
+                5. Only make changes that align with the given instructions"""
+
+def build_rewrite_messages(contract_text, instructions):
+    return [
+        {"role": "system", "content": REWRITE_SYSTEM_PROMPT},
+        {"role": "user", "content": f"""Please rewrite this contract following these specific instructions:
 
 Instructions:
 {instructions}
@@ -488,18 +521,96 @@ Original Contract:
 {contract_text}
 
 Provide the rewritten contract maintaining proper legal formatting."""}
-            ],
+    ]
+
+def sse_event(payload, event=None):
+    message = f"event: {event}\n" if event else ''
+    return message + f"data: {json.dumps(payload)}\n\n"
+
+def stream_rewrite(contract_text, instructions):
+    """Server-sent events: a 'delta' event per chunk of model output as it arrives, a 'paragraph'
+    event each time a blank line completes a paragraph, then 'done' with the full text."""
+    try:
+        deltas = llm_cache.stream_chat_completion(
+            get_openai_client(),
+            model=os.getenv('OPENAI_MODEL', 'gpt-4-1106-preview'),
+            messages=build_rewrite_messages(contract_text, instructions),
             temperature=0.7,
             max_tokens=2000
         )
-        
-        rewritten = response.choices[0].message.content.strip()
-        
-        # Validate the response
+        parts = []
+        pending = ''
+        for delta in deltas:
+            parts.append(delta)
+            yield sse_event({"delta": delta}, event='delta')
+            pending += delta
+            while '\n\n' in pending:
+                paragraph, pending = pending.split('\n\n', 1)
+                if paragraph.strip():
+                    yield sse_event({"paragraph": paragraph}, event='paragraph')
+        if pending.strip():
+            yield sse_event({"paragraph": pending}, event='paragraph')
+
+        rewritten = ''.join(parts).strip()
         if not rewritten:
             raise ValueError("Received empty response from OpenAI")
+
+        print(f"Successfully streamed rewritten contract. New length: {len(rewritten)} characters")
+        yield sse_event({"success": True, "rewritten": rewritten}, event='done')
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"Error in stream_rewrite: {error_msg}")
+        print(traceback.format_exc())
+        yield sse_event({
+            "success": False,
+            "error": f"Failed to rewrite contract: {error_msg}"
+        }, event='error')
+
+def run_rewrite(contract_text, instructions):
+    """Rewrite a contract following the given instructions"""
+    rewritten = llm_cache.chat_completion(
+        get_openai_client(),
+        model=os.getenv('OPENAI_MODEL', 'gpt-4-1106-preview'),
+        messages=build_rewrite_messages(contract_text, instructions),
+        temperature=0.7,
+        max_tokens=2000
+    )
+    
+    rewritten = rewritten.strip()
+    
+    # Validate the response
+    if not rewritten:
+        raise ValueError("Received empty response from OpenAI")
+        
+    print(f"Successfully rewrote contract. New length: {len(rewritten)} characters")
+
+    return rewritten
+
+@app.route('/api/rewrite', methods=['POST'])
+def rewrite_contract():
+    try:
+        data = request.json
+        if not data or 'content' not in data or 'instructions' not in data:
+            return jsonify({"error": "Missing content or instructions"}), 400
             
-        print(f"Successfully rewrote contract. New length: {len(rewritten)} characters")
+        contract_text = data.get('content', '')
+        instructions = data.get('instructions', '')
+        
+        # Clients opt into streaming with ?stream=true, "stream": true or an SSE Accept header
+        wants_stream = (
+            request.args.get('stream', '').lower() == 'true'
+            or data.get('stream') is True
+            or request.accept_mimetypes.best == 'text/event-stream'
+        )
+        if wants_stream:
+            return Response(
+                stream_with_context(stream_rewrite(contract_text, instructions)),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+        
+        rewritten = run_rewrite(contract_text, instructions)
         
         return jsonify({
             "success": True,
@@ -515,68 +626,81 @@ Provide the rewritten contract maintaining proper legal formatting."""}
             "error": f"Failed to rewrite contract: {error_msg}"
         }), 500
 
-@app.route('/api/templates')
-def get_templates():
-    # Sample templates - in a real app, these would come from a database
-    templates = [
-        {
-            'id': 'nda',
-            'name': 'Non-Disclosure Agreement (NDA)',
-            'description': 'A comprehensive NDA for protecting confidential information',
-            'content': '''[Your Company Name]
-MUTUAL NON-DISCLOSURE AGREEMENT
-
-This Mutual Non-Disclosure Agreement (this "Agreement") is made and entered into as of [Date], by and between [Your Company Name], located at [Your Address] and [Other Party Name], located at [Other Party Address].
-
-1. Definition of Confidential Information...'''
-        },
-        {
-            'id': 'service',
-            'name': 'Service Agreement',
-            'description': 'A detailed contract for service providers and clients',
-            'content': '''SERVICE AGREEMENT
-
-This Service Agreement (the "Agreement") is made and entered into as of [Date], by and between:
-
-Provider: [Provider Name], located at [Provider Address]
-Client: [Client Name], located at [Client Address]
-
-1. Services...'''
-        },
-        {
-            'id': 'employment',
-            'name': 'Employment Contract',
-            'description': 'A comprehensive employment agreement template',
-            'content': '''EMPLOYMENT AGREEMENT
-
-This Employment Agreement (the "Agreement") is made and entered into as of [Date], by and between:
-
-Employer: [Company Name], located at [Company Address]
-Employee: [Employee Name], residing at [Employee Address]
-
-1. Position and Duties...'''
-        }
-    ]
-    return jsonify(templates)
+# List endpoints return the whole list as a JSON array unless ?limit= asks for
+# a page (keyset paginated). When more rows exist the X-Next-Cursor header
+# holds the ?cursor= for the next page, and ?fields=a,b limits both the
+# columns loaded and the keys returned.
+def paged_response(items, next_cursor):
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def serialize_fields(obj, serializers, fields):
+    return {field: serializers[field](obj) for field in fields}
+
+TEMPLATE_SERIALIZERS = {
+    'id': lambda t: t.id,
+    'name': lambda t: t.name,
+    'description': lambda t: t.description,
+    'category': lambda t: t.category,
+    'tags': lambda t: [{'id': tag.id, 'name': tag.name} for tag in t.tags]
+}
+
+COMMENT_SERIALIZERS = {
+    'id': lambda c: c.id,
+    'content': lambda c: c.content,
+    'user': lambda c: {'id': c.user.id, 'name': c.user.name},
+    'created_at': lambda c: c.created_at.isoformat(),
+    'resolved': lambda c: c.resolved,
+    'parent_id': lambda c: c.parent_id
+}
+
+VERSION_SERIALIZERS = {
+    'version': lambda v: v.version,
+    'created_at': lambda v: v.created_at.isoformat(),
+    'created_by': lambda v: {'id': v.created_by.id, 'name': v.created_by.name},
+    'content': lambda v: v.content
+}
+
+INVITATION_FIELDS = ('id', 'email', 'role', 'status', 'created_at')
 
 # Template Routes
 @app.route('/api/templates')
 def list_templates():
     db = get_db()
     try:
-        templates = db.query(Template).all()
-        return jsonify([{
-            'id': t.id,
-            'name': t.name,
-            'description': t.description,
-            'category': t.category,
-            'tags': [{'id': tag.id, 'name': tag.name} for tag in t.tags]
-        } for t in templates])
+        fields = parse_fields(request.args.get('fields'), TemplateService.TEMPLATE_FIELDS)
+        templates, next_cursor = TemplateService(db).list_templates_page(
+            category=request.args.get('category'),
+            tags=request.args.getlist('tags'),
+            fields=fields,
+            cursor=request.args.get('cursor'),
+            limit=parse_limit(request.args.get('limit'))
+        )
+        return paged_response([serialize_fields(t, TEMPLATE_SERIALIZERS, fields) for t in templates], next_cursor)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     finally:
         db.close()
 
+@app.route('/api/search')
+def search():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    doc_types = [t for t in request.args.get('type', ','.join(DOC_TYPES)).split(',') if t]
+    try:
+        limit = parse_limit(request.args.get('limit', '20'))
+        return jsonify(search_index.search(query, doc_types=doc_types, limit=limit))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error in search: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/templates/<int:template_id>')
 def get_template(template_id):
     db = get_db()
@@ -612,6 +736,7 @@ def create_template():
         category=request.json.get('category'),
         tags=request.json.get('tags', [])
     )
+    index_clauses('template', template.id, template.content)
     
     return jsonify({
         'id': template.id,
@@ -621,6 +746,41 @@ def create_template():
         'tags': [tag.name for tag in template.tags]
     })
 
+@app.route('/api/templates/<int:template_id>/docusign', methods=['POST'])
+def register_docusign_template(template_id):
+    """Store a template in DocuSign so sends from it only carry field values"""
+    db = DBSession()
+    try:
+        template = db.query(Template).options(undefer(Template.content)).get(template_id)
+        if not template:
+            return jsonify({'error': 'Template not found'}), 404
+
+        use_ai_positioning = bool(request.json and request.json.get('use_ai_positioning'))
+        definition, labels, role_count = envelope_builder.server_template(
+            template.name, template.content, lambda text: locate_signature_blocks(text, use_ai_positioning))
+        summary = call_docusign(lambda api_client: TemplatesApi(api_client).create_template(
+            account_id=app.config['DOCUSIGN_ACCOUNT_ID'],
+            envelope_template=definition
+        ))
+        template.docusign_template_id = summary.template_id
+        template.docusign_role_count = role_count
+        db.commit()
+        envelope_builder.invalidate(template_id)
+        print(f"Registered template {template_id} as DocuSign template {summary.template_id}")
+        return jsonify({
+            'id': template.id,
+            'docusign_template_id': summary.template_id,
+            'fields': labels,
+            'signers': role_count
+        })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error registering DocuSign template: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        db.close()
+
 # Collaboration Routes
 @app.route('/api/contracts/<int:contract_id>/comments', methods=['GET'])
 def get_comments(contract_id):
@@ -628,18 +788,17 @@ def get_comments(contract_id):
     collaboration_service = CollaborationService(db)
     include_resolved = request.args.get('include_resolved', 'false').lower() == 'true'
     
-    comments = collaboration_service.get_comments(contract_id, include_resolved)
-    return jsonify([{
-        'id': c.id,
-        'content': c.content,
-        'user': {
-            'id': c.user.id,
-            'name': c.user.name
-        },
-        'created_at': c.created_at.isoformat(),
-        'resolved': c.resolved,
-        'parent_id': c.parent_id
-    } for c in comments])
+    try:
+        fields = parse_fields(request.args.get('fields'), CollaborationService.COMMENT_FIELDS)
+        comments, next_cursor = collaboration_service.get_comments_page(
+            contract_id, include_resolved,
+            fields=fields,
+            cursor=request.args.get('cursor'),
+            limit=parse_limit(request.args.get('limit'))
+        )
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    return paged_response([serialize_fields(c, COMMENT_SERIALIZERS, fields) for c in comments], next_cursor)
 
 @app.route('/api/contracts/<int:contract_id>/comments', methods=['POST'])
 def add_comment(contract_id):
@@ -676,15 +835,18 @@ def list_versions(contract_id):
     db = get_db()
     collaboration_service = CollaborationService(db)
     
-    versions = collaboration_service.list_versions(contract_id)
-    return jsonify([{
-        'version': v.version,
-        'created_at': v.created_at.isoformat(),
-        'created_by': {
-            'id': v.created_by.id,
-            'name': v.created_by.name
-        }
-    } for v in versions])
+    try:
+        fields = parse_fields(request.args.get('fields'), CollaborationService.VERSION_FIELDS,
+                              CollaborationService.DEFAULT_VERSION_FIELDS)
+        versions, next_cursor = collaboration_service.list_versions_page(
+            contract_id,
+            fields=fields,
+            cursor=request.args.get('cursor'),
+            limit=parse_limit(request.args.get('limit'))
+        )
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    return paged_response([serialize_fields(v, VERSION_SERIALIZERS, fields) for v in versions], next_cursor)
 
 @app.route('/api/contracts/<int:contract_id>/versions', methods=['POST'])
 def create_version(contract_id):
@@ -702,6 +864,7 @@ def create_version(contract_id):
         content=request.json['content'],
         created_by_id=user_id
     )
+    index_clauses('contract', contract_id, request.json['content'])
     
     return jsonify({
         'version': version.version,
@@ -716,19 +879,240 @@ def create_version(contract_id):
 def compare_versions(contract_id):
     version1 = request.args.get('v1', type=int)
     version2 = request.args.get('v2', type=int)
+    granularity = request.args.get('granularity', 'word')
     
     if not version1 or not version2:
         return jsonify({"error": "Both versions must be specified"}), 400
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": f"granularity must be one of: {', '.join(GRANULARITIES)}"}), 400
         
     db = get_db()
     collaboration_service = CollaborationService(db)
     
-    comparison = collaboration_service.compare_versions(contract_id, version1, version2)
+    comparison = collaboration_service.compare_versions(contract_id, version1, version2, granularity)
     if not comparison:
         return jsonify({"error": "Could not compare versions"}), 404
         
     return jsonify(comparison)
 
+# Send places tabs with anchor strings rendered into the PDF unless a request says otherwise
+ANCHOR_TABS = os.getenv('DOCUSIGN_ANCHOR_TABS', 'true').lower() == 'true'
+envelope_builder = EnvelopeBuilder(max_layouts=int(os.getenv('ENVELOPE_LAYOUT_CACHE_ENTRIES', '256')))
+
+def resolve_signature_positions(contract, pdf_bytes, use_ai_positioning=False):
+    """Work out where each signer's tabs go, falling back to fixed page-1 positions"""
+    # Try AI-based positioning if requested
+    signature_positions = None
+    if use_ai_positioning:
+        print("Attempting AI-based signature positioning...")
+        try:
+            signature_locations = analyze_signature_locations(contract)
+            if signature_locations:
+                # Parse the PDF once and reuse its layout for every lookup
+                layout = PDFLayoutIndex(pdf_bytes)
+                signature_positions = []
+                for loc in signature_locations:
+                    position = find_text_position_in_pdf(layout, loc['anchor_text'])
+                    if not position and 'context' in loc:
+                        position = find_text_position_in_pdf(layout, loc['context'])
+                        if position:
+                            position['y'] += 20  # Move down by 20 points
+                    if position:
+                        signature_positions.append({
+                            'position': position,
+                            'additional_fields': loc.get('additional_fields', [])
+                        })
+                print(f"Found {len(signature_positions)} signature positions using AI")
+        except Exception as e:
+            print(f"AI positioning failed, falling back to default: {str(e)}")
+            signature_positions = None
+    
+    # Use default positions if AI positioning failed or wasn't requested
+    if not signature_positions:
+        print("Using default signature positions...")
+        # Standard PDF page is 612 x 792 points
+        # Place signatures in bottom third of page with proper margins
+        signature_positions = [
+            {
+                'position': {
+                    'x': 50,  # Left margin
+                    'y': 650,  # About 142 points from bottom
+                    'page': 1
+                },
+                'additional_fields': []
+            },
+            {
+                'position': {
+                    'x': 350,  # Right side of page
+                    'y': 650,  # Same vertical position
+                    'page': 1
+                },
+                'additional_fields': []
+            }
+        ]
+
+    return signature_positions
+
+def build_envelope_definition(signers, pdf_bytes, signature_positions):
+    """Build the envelope definition for one contract PDF and its signers"""
+    doc_b64 = base64.b64encode(pdf_bytes).decode('utf-8')
+    docusign_signers = []
+    
+    # Add signers with their signature positions
+    for i, signer in enumerate(signers, 1):
+        print(f"Adding signer {i}: {signer['name']} ({signer['email']})")
+        
+        # Get position for this signer
+        sig_data = signature_positions[min(i-1, len(signature_positions)-1)]
+        position = sig_data['position']
+        
+        # Add signature field
+        sign_here = SignHere(
+            document_id="1",
+            page_number=str(position['page']),
+            recipient_id=str(i),
+            x_position=str(int(float(position['x']))),
+            y_position=str(int(float(position['y'])))
+        )
+        
+        # Add name field
+        name_text = Text(
+            document_id="1",
+            page_number=str(position['page']),
+            recipient_id=str(i),
+            x_position=str(int(float(position['x']) + 20)),  # Offset slightly from signature
+            y_position=str(int(float(position['y']) - 30)),  # Place above signature
+            font="helvetica",
+            font_size="size11",
+            value=signer['name']
+        )
+        
+        # Add any additional fields from AI analysis
+        additional_tabs = [name_text]
+        y_offset = 30
+        for field in sig_data['additional_fields']:
+            additional_tabs.append(
+                Text(
+                    document_id="1",
+                    page_number=str(position['page']),
+                    recipient_id=str(i),
+                    x_position=str(int(float(position['x']))),
+                    y_position=str(int(float(position['y']) + y_offset)),
+                    font="helvetica",
+                    font_size="size11",
+                    tab_label=field.lower(),
+                    width=200
+                )
+            )
+            y_offset += 30
+        
+        signer_obj = Signer(
+            email=signer['email'],
+            name=signer['name'],
+            recipient_id=str(i),
+            routing_order=str(i),
+            tabs=Tabs(
+                sign_here_tabs=[sign_here],
+                text_tabs=additional_tabs
+            )
+        )
+        
+        docusign_signers.append(signer_obj)
+        
+    # Create Recipients object with signers
+    recipients = Recipients(signers=docusign_signers)
+        
+    # Create envelope definition with recipients
+    envelope_definition = EnvelopeDefinition(
+        email_subject="Please sign this document",
+        documents=[
+            Document(
+                document_base64=doc_b64,
+                name="Contract.pdf",
+                file_extension="pdf",
+                document_id="1"
+            )
+        ],
+        recipients=recipients,
+        status="sent"
+    )
+
+    return envelope_definition
+
+def locate_signature_blocks(contract_text, use_ai_positioning=False):
+    if use_ai_positioning:
+        return analyze_signature_locations(contract_text)
+    detected, confidence = detect_signature_blocks(contract_text)
+    if confidence < SIGNATURE_DETECTOR_MIN_CONFIDENCE:
+        # Anchoring an unsure guess can put a SignHere tab on a body field;
+        # no blocks sends the caller to coordinate placement instead
+        print(f"Signature detector confidence {confidence:.2f}, not anchoring its blocks")
+        return []
+    return detected
+
+def get_registered_template(template_id):
+    """(docusign_template_id, content, role_count) for a template registered with DocuSign, else None"""
+    db = DBSession()
+    try:
+        template = db.query(Template).options(undefer(Template.content)).get(template_id)
+        if not template or not template.docusign_template_id:
+            return None
+        return template.docusign_template_id, template.content, template.docusign_role_count
+    finally:
+        db.close()
+
+def run_send(contract, signers, use_ai_positioning=False, use_anchor_tabs=None, template_id=None, fields=None):
+    """Render a contract, send it for signature and return the envelope id"""
+    if use_anchor_tabs is None:
+        use_anchor_tabs = ANCHOR_TABS
+    envelope_definition = None
+
+    registered = get_registered_template(template_id) if template_id and fields is not None else None
+    if registered:
+        server_template_id, template_content, role_count = registered
+        # Each template role needs a signer and only template roles get tabs; templates
+        # registered before the count was stored are sent unchecked
+        if role_count is not None and len(signers) != role_count:
+            raise ValueError(f"Template has {role_count} signer roles but {len(signers)} signers were given")
+        # The document and tab layout live in DocuSign and only field values are
+        # sent, so the contract must be exactly what the template renders to
+        if fill_placeholders(template_content, fields).split() != contract.split():
+            raise ValueError("Contract text differs from the registered template filled with these fields; "
+                             "send it without template_id to use the edited text")
+        print(f"Creating envelope from DocuSign template {server_template_id}...")
+        envelope_definition = envelope_builder.build_composite(signers, server_template_id, fields)
+    elif use_anchor_tabs:
+        # Anchor strings are rendered into the PDF, so nothing needs to be found in it afterwards
+        anchors, anchor_blocks, tab_specs = envelope_builder.layout(
+            contract, lambda text: locate_signature_blocks(text, use_ai_positioning), template_id,
+            positioning='ai' if use_ai_positioning else 'detector')
+        if anchor_blocks:
+            print(f"Converting contract to PDF with {len(anchors)} anchor strings...")
+            pdf_bytes = render_pdf(contract, anchors)
+            print("Creating envelope definition...")
+            envelope_definition = envelope_builder.build(signers, pdf_bytes, tab_specs)
+        else:
+            print("No signature blocks to anchor, placing tabs by coordinates")
+
+    if envelope_definition is None:
+        # Convert contract text to PDF
+        print("Converting contract to PDF...")
+        pdf_bytes = render_pdf(contract)
+
+        print("Creating envelope definition...")
+        signature_positions = resolve_signature_positions(contract, pdf_bytes, use_ai_positioning)
+        envelope_definition = build_envelope_definition(signers, pdf_bytes, signature_positions)
+
+    print("Creating envelope...")
+    envelope_summary = call_docusign(lambda api_client: EnvelopesApi(api_client).create_envelope(
+        account_id=app.config['DOCUSIGN_ACCOUNT_ID'],
+        envelope_definition=envelope_definition
+    ))
+
+    print(f"Successfully sent envelope with ID: {envelope_summary.envelope_id}")
+
+    return envelope_summary.envelope_id
+
 @app.route('/api/send', methods=['POST'])
 def send_contract():
     if not request.json:
@@ -737,162 +1121,26 @@ def send_contract():
     contract = request.json.get('contract')
     signers = request.json.get('signers')
     use_ai_positioning = request.json.get('use_ai_positioning', False)
+    use_anchor_tabs = request.json.get('use_anchor_tabs')
+    template_id = request.json.get('template_id')
+    fields = request.json.get('fields')
     
     if not contract or not signers:
         return jsonify({"error": "Contract and signers are required"}), 400
+    if fields is not None and not isinstance(fields, dict):
+        return jsonify({"error": "fields must be an object of tab label to value"}), 400
 
     try:
-        # Convert contract text to PDF
-        print("Converting contract to PDF...")
-        pdf_bytes = create_pdf_from_text(contract)
-        doc_b64 = base64.b64encode(pdf_bytes).decode('utf-8')
-        
-        print("Creating envelope definition...")
-        docusign_signers = []
+        envelope_id = run_send(contract, signers, use_ai_positioning, use_anchor_tabs, template_id, fields)
         
-        # Try AI-based positioning if requested
-        signature_positions = None
-        if use_ai_positioning:
-            print("Attempting AI-based signature positioning...")
-            try:
-                signature_locations = analyze_signature_locations(contract)
-                if signature_locations:
-                    signature_positions = []
-                    for loc in signature_locations:
-                        position = find_text_position_in_pdf(pdf_bytes, loc['anchor_text'])
-                        if not position and 'context' in loc:
-                            position = find_text_position_in_pdf(pdf_bytes, loc['context'])
-                            if position:
-                                position['y'] += 20  # Move down by 20 points
-                        if position:
-                            signature_positions.append({
-                                'position': position,
-                                'additional_fields': loc.get('additional_fields', [])
-                            })
-                    print(f"Found {len(signature_positions)} signature positions using AI")
-            except Exception as e:
-                print(f"AI positioning failed, falling back to default: {str(e)}")
-                signature_positions = None
-        
-        # Use default positions if AI positioning failed or wasn't requested
-        if not signature_positions:
-            print("Using default signature positions...")
-            # Standard PDF page is 612 x 792 points
-            # Place signatures in bottom third of page with proper margins
-            signature_positions = [
-                {
-                    'position': {
-                        'x': 50,  # Left margin
-                        'y': 650,  # About 142 points from bottom
-                        'page': 1
-                    },
-                    'additional_fields': []
-                },
-                {
-                    'position': {
-                        'x': 350,  # Right side of page
-                        'y': 650,  # Same vertical position
-                        'page': 1
-                    },
-                    'additional_fields': []
-                }
-            ]
-        
-        # Add signers with their signature positions
-        for i, signer in enumerate(signers, 1):
-            print(f"Adding signer {i}: {signer['name']} ({signer['email']})")
-            
-            # Get position for this signer
-            sig_data = signature_positions[min(i-1, len(signature_positions)-1)]
-            position = sig_data['position']
-            
-            # Add signature field
-            sign_here = SignHere(
-                document_id="1",
-                page_number=str(position['page']),
-                recipient_id=str(i),
-                x_position=str(int(float(position['x']))),
-                y_position=str(int(float(position['y'])))
-            )
-            
-            # Add name field
-            name_text = Text(
-                document_id="1",
-                page_number=str(position['page']),
-                recipient_id=str(i),
-                x_position=str(int(float(position['x']) + 20)),  # Offset slightly from signature
-                y_position=str(int(float(position['y']) - 30)),  # Place above signature
-                font="helvetica",
-                font_size="size11",
-                value=signer['name']
-            )
-            
-            # Add any additional fields from AI analysis
-            additional_tabs = [name_text]
-            y_offset = 30
-            for field in sig_data['additional_fields']:
-                additional_tabs.append(
-                    Text(
-                        document_id="1",
-                        page_number=str(position['page']),
-                        recipient_id=str(i),
-                        x_position=str(int(float(position['x']))),
-                        y_position=str(int(float(position['y']) + y_offset)),
-                        font="helvetica",
-                        font_size="size11",
-                        tab_label=field.lower(),
-                        width=200
-                    )
-                )
-                y_offset += 30
-            
-            signer_obj = Signer(
-                email=signer['email'],
-                name=signer['name'],
-                recipient_id=str(i),
-                routing_order=str(i),
-                tabs=Tabs(
-                    sign_here_tabs=[sign_here],
-                    text_tabs=additional_tabs
-                )
-            )
-            
-            docusign_signers.append(signer_obj)
-            
-        # Create Recipients object with signers
-        recipients = Recipients(signers=docusign_signers)
-            
-        # Create envelope definition with recipients
-        envelope_definition = EnvelopeDefinition(
-            email_subject="Please sign this document",
-            documents=[
-                Document(
-                    document_base64=doc_b64,
-                    name="Contract.pdf",
-                    file_extension="pdf",
-                    document_id="1"
-                )
-            ],
-            recipients=recipients,
-            status="sent"
-        )
-
-        print("Creating DocuSign API client...")
-        api_client = create_docusign_api_client()
-        print("Creating envelope...")
-        envelope_api = EnvelopesApi(api_client)
-        envelope_summary = envelope_api.create_envelope(
-            account_id=app.config['DOCUSIGN_ACCOUNT_ID'],
-            envelope_definition=envelope_definition
-        )
-
-        print(f"Successfully sent envelope with ID: {envelope_summary.envelope_id}")
         return jsonify({
             "success": True,
             "message": f"Contract sent successfully to {len(signers)} signers",
-            "envelope_id": envelope_summary.envelope_id
+            "envelope_id": envelope_id
         })
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error sending contract via DocuSign: {str(e)}")
         print(f"Error type: {type(e)}")
@@ -901,11 +1149,203 @@ def send_contract():
         traceback.print_exc()
         return jsonify({"error": f"Failed to send contract: {str(e)}"}), 500
 
+@app.route('/api/send/bulk', methods=['POST'])
+def send_contracts_bulk():
+    if not request.json or not isinstance(request.json.get('items'), list):
+        return jsonify({"error": "A list of items is required"}), 400
+
+    items = request.json['items']
+    if len(items) > BULK_SEND_MAX_ITEMS:
+        return jsonify({"error": f"At most {BULK_SEND_MAX_ITEMS} items can be sent at once"}), 400
+
+    manifest = [{'index': i} for i in range(len(items))]
+    valid = []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get('contract') or not item.get('signers'):
+            manifest[i].update(success=False, error="Contract and signers are required")
+        else:
+            valid.append(i)
+
+    try:
+        # Render PDFs in worker processes; rendering is CPU bound
+        print(f"Rendering {len(valid)} contracts for bulk send...")
+        pdfs = {}
+        to_render = []
+        for i in valid:
+            pdf_bytes = render_cache.get(render_cache.make_key(items[i]['contract']))
+            if pdf_bytes is not None:
+                pdfs[i] = pdf_bytes
+            else:
+                to_render.append(i)
+        if to_render:
+            with ProcessPoolExecutor(max_workers=min(BULK_RENDER_WORKERS, len(to_render))) as executor:
+                futures = {i: executor.submit(create_pdf_from_text, items[i]['contract']) for i in to_render}
+            for i, future in futures.items():
+                try:
+                    pdfs[i] = future.result()
+                    render_cache.put(render_cache.make_key(items[i]['contract']), pdfs[i])
+                except Exception as e:
+                    manifest[i].update(success=False, error=f"Failed to render PDF: {str(e)}")
+
+        credentials = session_credentials()
+
+        def build_definition(i):
+            item = items[i]
+            with using_credentials(credentials):
+                signature_positions = resolve_signature_positions(
+                    item['contract'], pdfs[i], item.get('use_ai_positioning', False))
+            return build_envelope_definition(item['signers'], pdfs[i], signature_positions)
+
+        # AI positioning waits on the LLM, so those items are resolved concurrently
+        # on the shared analysis pool, which bounds parallel OpenAI calls
+        futures = {i: contract_analyzer.executor.submit(build_definition, i)
+                   for i in pdfs if items[i].get('use_ai_positioning')}
+        to_send = []
+        for i in pdfs:
+            try:
+                definition = futures[i].result() if i in futures else build_definition(i)
+                to_send.append((i, definition))
+            except Exception as e:
+                manifest[i].update(success=False, error=f"Failed to build envelope: {str(e)}")
+
+        if to_send:
+            print(f"Dispatching {len(to_send)} envelopes...")
+            results = bulk_sender.send_all(
+                partial(docusign_tokens.call, get_docusign_key(), app.config['DOCUSIGN_USER_ID']),
+                app.config['DOCUSIGN_ACCOUNT_ID'],
+                [definition for _, definition in to_send]
+            )
+            for (i, _), result in zip(to_send, results):
+                manifest[i].update(result)
+
+        sent = sum(1 for entry in manifest if entry.get('success'))
+        print(f"Bulk send finished: {sent}/{len(items)} envelopes sent")
+        return jsonify({
+            "success": sent == len(items),
+            "sent": sent,
+            "failed": len(items) - sent,
+            "results": manifest
+        })
+
+    except Exception as e:
+        print(f"Error in bulk send: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"error": f"Failed to send contracts: {str(e)}"}), 500
+
+def rebuild_clause_index():
+    """Re-segment and re-embed every template and contract into a compact clause index"""
+    db = DBSession()
+    try:
+        documents = [('template', t.id, t.content) for t in db.query(Template).options(undefer(Template.content))]
+        documents += [('contract', c.id, c.content) for c in db.query(Contract).options(undefer(Contract.content))]
+    finally:
+        db.close()
+    return {'clauses': clause_index.rebuild(documents), 'documents': len(documents)}
+
+@app.route('/api/clauses/similar')
+def similar_clauses():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    doc_type = request.args.get('type')
+    if doc_type and doc_type not in DOC_TYPES:
+        return jsonify({"error": f"type must be one of: {', '.join(DOC_TYPES)}"}), 400
+    try:
+        k = parse_limit(request.args.get('k', '10'))
+        return jsonify(clause_index.search(query, k=k, doc_type=doc_type,
+                                           exclude_doc_id=request.args.get('exclude')))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Error in clause search: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+# Background jobs: the payload is passed to the handler as keyword arguments
+JOB_HANDLERS = {
+    'analyze': run_contract_analysis,      # {"content": ...}
+    'analyze_risks': run_risk_analysis,    # {"contract_text": ...}
+    'rewrite': run_rewrite,                # {"contract_text": ..., "instructions": ...}
+    'send': run_send,                      # {"contract": ..., "signers": [...], "use_ai_positioning": bool, "use_anchor_tabs": bool,
+                                           #  "template_id": int, "fields": {label: value}}
+    'rebuild_clause_index': rebuild_clause_index   # {}
+}
+
+job_queue = JobQueue(
+    SQLiteJobStore(os.getenv('JOB_QUEUE_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.db'))),
+    JOB_HANDLERS,
+    worker_type=os.getenv('JOB_WORKER_TYPE', 'thread'),
+    max_workers=int(os.getenv('JOB_WORKERS', '4')),
+    lease_seconds=float(os.getenv('JOB_LEASE_SECONDS', '60')),
+    job_context=using_credentials
+)
+# Worker processes fork from this one; load NLTK models once here so they are inherited
+if job_queue.worker_type == 'process' or os.getenv('NLTK_PRELOAD', 'false').lower() == 'true':
+    nltk_resources.preload()
+job_queue.start()
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    data = request.json
+    if not data or not data.get('type'):
+        return jsonify({"error": "Job type is required"}), 400
+    if data['type'] not in JOB_HANDLERS:
+        return jsonify({"error": f"Unknown job type: {data['type']}"}), 400
+
+    payload = data.get('payload', {})
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Job payload must be an object"}), 400
+
+    try:
+        # Jobs run outside this request; the session's API keys go with them in memory only
+        job_id = job_queue.submit(data['type'], payload, context=session_credentials())
+        return jsonify({"job_id": job_id, "status": "queued"}), 202
+    except Exception as e:
+        print(f"Error submitting job: {str(e)}")
+        return jsonify({"error": f"Failed to submit job: {str(e)}"}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    if not job_queue.get(job_id):
+        return jsonify({"error": "Job not found"}), 404
+
+    def events():
+        # Emit an event on every status change until the job finishes
+        last_status = None
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                # Purged while the stream was open
+                yield sse_event({"id": job_id, "error": "Job no longer exists"}, event='error')
+                return
+            if job['status'] != last_status:
+                last_status = job['status']
+                yield sse_event(job, event=job['status'])
+            if job['status'] in FINISHED_STATUSES:
+                return
+            time.sleep(0.5)
+
+    return Response(stream_with_context(events()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 def analyze_signature_locations(contract_text):
-    """Analyze contract text to find potential signature locations using OpenAI"""
+    """Find signature locations, asking OpenAI only when the local detector is unsure"""
+    detected, confidence = detect_signature_blocks(contract_text)
+    if detected and confidence >= SIGNATURE_DETECTOR_MIN_CONFIDENCE:
+        print(f"Detected {len(detected)} signature blocks locally (confidence {confidence:.2f})")
+        return detected
+    print(f"Signature detector confidence {confidence:.2f}, asking OpenAI...")
+
     try:
         # First, analyze the contract for signature locations
-        response = client.chat.completions.create(
+        completion = llm_cache.chat_completion(
+            get_openai_client(),
             model=os.getenv('OPENAI_MODEL', 'gpt-4-1106-preview'),
             messages=[
                 {"role": "system", "content": """You are a legal expert analyzing contracts for signature placements.
@@ -932,7 +1372,7 @@ def analyze_signature_locations(contract_text):
         locations = []
         current_block = None
         
-        for line in response.choices[0].message.content.split('\n'):
+        for line in completion.split('\n'):
             line = line.strip()
             if not line:
                 continue
@@ -969,81 +1409,21 @@ def analyze_signature_locations(contract_text):
                     loc['context'] = f"{loc['anchor_text']} {loc['context']}"
                 valid_locations.append(loc)
         
-        return valid_locations
+        return valid_locations or detected or None
             
     except Exception as e:
         print(f"Error analyzing signature locations: {str(e)}")
-        return None
+        # A low-confidence local result still beats the fixed default positions
+        return detected or None
 
-def find_text_position_in_pdf(pdf_bytes, search_text):
-    """Find the position of text in a PDF file"""
+def find_text_position_in_pdf(layout, search_text):
+    """Find the position of text in a PDF, given its PDFLayoutIndex"""
     try:
-        # Create a temporary file to store PDF bytes
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            temp_file.write(pdf_bytes)
-            temp_path = temp_file.name
-
-        positions = []
-        # Open the PDF with pdfplumber
-        with pdfplumber.open(temp_path) as pdf:
-            # Search each page
-            for page_num, page in enumerate(pdf.pages):
-                # Extract text and its positions
-                words = page.extract_words(x_tolerance=3, y_tolerance=3)
-                
-                # Search for the text
-                for word in words:
-                    if search_text.lower() in word['text'].lower():
-                        # Convert position to DocuSign coordinate system
-                        # DocuSign uses points from bottom-left, pdfplumber uses points from top-left
-                        x = word['x0']
-                        y = page.height - word['y0']  # Convert to bottom-up coordinate system
-                        
-                        positions.append({
-                            'page_number': page_num + 1,
-                            'x': x,
-                            'y': y,
-                            'width': word['width'],
-                            'height': word['height']
-                        })
-
-        # Clean up temporary file
-        os.unlink(temp_path)
-
-        # Return the first occurrence if found
-        return positions[0] if positions else None
-
+        return layout.find(search_text)
     except Exception as e:
         print(f"Error finding text position: {str(e)}")
         return None
 
-def create_pdf_from_text(text):
-    from fpdf import FPDF
-    
-    # Create PDF object
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.set_font('Arial', size=10)
-    
-    # Replace problematic Unicode characters with ASCII equivalents
-    text = text.replace('\u2013', '-')  # Replace en-dash with hyphen
-    text = text.replace('\u2014', '--')  # Replace em-dash with double hyphen
-    text = text.replace('\u2018', "'")   # Replace left single quote
-    text = text.replace('\u2019', "'")   # Replace right single quote
-    text = text.replace('\u201C', '"')   # Replace left double quote
-    text = text.replace('\u201D', '"')   # Replace right double quote
-    text = text.replace('\u2026', '...') # Replace ellipsis
-    
-    # Split text into lines and write to PDF
-    lines = text.split('\n')
-    for line in lines:
-        # Encode line to ASCII, replacing unknown characters
-        line = line.encode('ascii', 'replace').decode('ascii')
-        pdf.multi_cell(0, 10, txt=line)
-    
-    # Get PDF as bytes
-    return pdf.output(dest='S').encode('latin-1')
-
 SMTP_SERVER = "smtp.gmail.com"
 SMTP_PORT = 587
 SENDER_EMAIL = os.getenv('GMAIL_USER')  # Your Gmail address
@@ -1102,7 +1482,7 @@ class RiskService:
             analysis_prompt = self.risk_prompt.format(contract_text=contract_text)
             
             # Get analysis from GPT
-            response = client.chat.completions.create(
+            response = get_openai_client().chat.completions.create(
                 model="gpt-4-1106-preview",
                 messages=[
                     {"role": "system", "content": "You are a legal expert specializing in contract risk analysis."},
@@ -1125,7 +1505,7 @@ class RiskService:
             {analysis_text}
             """
             
-            structure_response = client.chat.completions.create(
+            structure_response = get_openai_client().chat.completions.create(
                 model="gpt-4-1106-preview",
                 messages=[
                     {"role": "system", "content": "You are a JSON formatter for legal analysis."},
@@ -1315,28 +1695,52 @@ def invite_collaborator(contract_id):
 @app.route('/api/contracts/<contract_id>/invitations', methods=['GET'])
 def list_invitations(contract_id):
     try:
+        fields = parse_fields(request.args.get('fields'), INVITATION_FIELDS)
+        limit = parse_limit(request.args.get('limit'))
+        cursor = request.args.get('cursor')
+        # Ids grow with created_at, so id DESC is a stable newest-first order
+        params = {'contract_id': contract_id}
+        after = ''
+        if cursor:
+            params['last_id'] = decode_cursor(cursor, 1)[0]
+            after = 'AND id < :last_id'
+        page = ''
+        if limit is not None:
+            params['limit'] = limit + 1
+            page = 'LIMIT :limit'
+        # Column names come from the INVITATION_FIELDS whitelist
+        columns = ', '.join(['id'] + [field for field in fields if field != 'id'])
+
         db = DBSession()
         try:
-            result = db.execute(text("""
-                SELECT id, email, role, status, created_at
+            result = db.execute(text(f"""
+                SELECT {columns}
                 FROM invitations
-                WHERE contract_id = :contract_id
-                ORDER BY created_at DESC
-                """), {'contract_id': contract_id})
+                WHERE contract_id = :contract_id {after}
+                ORDER BY id DESC
+                {page}
+                """), params)
             
-            invitations = result.fetchall()
+            invitations = result.mappings().fetchall()
+            next_cursor = None
+            if limit is not None and len(invitations) > limit:
+                invitations = invitations[:limit]
+                next_cursor = encode_cursor([invitations[-1]['id']])
             
-            return jsonify([{
-                'id': inv[0],
-                'email': inv[1],
-                'role': inv[2],
-                'status': inv[3],
-                'created_at': inv[4].isoformat() if inv[4] else None
-            } for inv in invitations]), 200
+            items = []
+            for inv in invitations:
+                item = {field: inv[field] for field in fields}
+                if 'created_at' in item:
+                    created_at = item['created_at']
+                    item['created_at'] = created_at.isoformat() if hasattr(created_at, 'isoformat') else created_at
+                items.append(item)
+            return paged_response(items, next_cursor), 200
             
         finally:
             db.close()
             
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         print(f"Error in list_invitations: {str(e)}")
         return jsonify({'error': str(e)}), 500
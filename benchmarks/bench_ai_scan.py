@@ -0,0 +1,112 @@
+"""AIService sentence scan on a BENCH_SCAN_BYTES contract: three keyword passes vs one fused pass.
+
+"legacy" is the previous _extract_key_terms/_generate_suggestions/_assess_risks
+trio, each walking every sentence and lowercasing it per keyword; "fused" is
+scan_sentences. "automaton" runs a KeywordMatcher over each lowercased
+sentence instead of substring checks; with this handful of keywords str's C
+substring search is cheaper than the regex engine. All three must agree.
+
+Run from the repository root:
+    python benchmarks/bench_ai_scan.py
+"""
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from services.ai_service import DEFINITION_KEYWORDS, RISK_KEYWORDS, scan_sentences
+from services.keyword_matcher import KeywordMatcher
+
+SIZE = int(os.getenv('BENCH_SCAN_BYTES', str(1024 * 1024)))
+
+def legacy_scan(sentences):
+    key_terms = []
+    for sentence in sentences:
+        if "means" in sentence.lower() or "shall mean" in sentence.lower():
+            key_terms.append(sentence)
+
+    suggestions = []
+    for sentence in sentences:
+        if len(sentence.split()) > 50:
+            suggestions.append({
+                'original': sentence,
+                'suggestion': 'Consider breaking this sentence into smaller parts for clarity',
+                'type': 'readability'
+            })
+        if "shall" in sentence:
+            suggestions.append({
+                'original': sentence,
+                'suggestion': 'Consider using "must" or "will" instead of "shall"',
+                'type': 'modernization'
+            })
+
+    risks = []
+    for sentence in sentences:
+        for keyword in ['terminate', 'liability', 'indemnify', 'warrant']:
+            if keyword in sentence.lower():
+                risks.append({'sentence': sentence, 'risk_type': keyword, 'severity': 'medium'})
+    return key_terms, suggestions, risks
+
+def automaton_scan(sentences):
+    matcher = KeywordMatcher(DEFINITION_KEYWORDS + RISK_KEYWORDS, ignore_case=False)
+    key_terms, suggestions, risks = [], [], []
+    for sentence in sentences:
+        found = matcher.found(sentence.lower())
+        if any(keyword in found for keyword in DEFINITION_KEYWORDS):
+            key_terms.append(sentence)
+        if len(sentence.split()) > 50:
+            suggestions.append({
+                'original': sentence,
+                'suggestion': 'Consider breaking this sentence into smaller parts for clarity',
+                'type': 'readability'
+            })
+        if "shall" in sentence:
+            suggestions.append({
+                'original': sentence,
+                'suggestion': 'Consider using "must" or "will" instead of "shall"',
+                'type': 'modernization'
+            })
+        for keyword in RISK_KEYWORDS:
+            if keyword in found:
+                risks.append({'sentence': sentence, 'risk_type': keyword, 'severity': 'medium'})
+    return key_terms, suggestions, risks
+
+def make_contract(size):
+    rng = random.Random(0)
+    filler = ['the', 'party', 'agreement', 'services', 'payment', 'notice', 'company', 'customer',
+              'provided', 'under', 'this', 'section', 'written', 'consent', 'period', 'days', 'of', 'and']
+    keywords = ['shall', 'Shall', 'means', 'terminate', 'liability', 'indemnify', 'warranty']
+    parts, length = [], 0
+    while length < size:
+        words = [rng.choice(keywords) if rng.random() < 0.01 else rng.choice(filler)
+                 for _ in range(rng.randint(5, 70))]
+        sentence = ' '.join(words).capitalize() + '.'
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(parts)
+
+def best_ms(call, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+def main():
+    text = make_contract(SIZE)
+    sentences = re.split(r'(?<=[.!?])\s+', text)
+    legacy_ms, legacy = best_ms(lambda: legacy_scan(sentences))
+    fused_ms, fused = best_ms(lambda: scan_sentences(sentences))
+    automaton_ms, automaton = best_ms(lambda: automaton_scan(sentences))
+    assert legacy == fused == automaton, "scans disagree"
+    print(f"{len(text) / 1024 / 1024:.1f} MB, {len(sentences)} sentences, "
+          f"{len(fused[0])} key terms, {len(fused[1])} suggestions, {len(fused[2])} risks")
+    print(f"legacy:    {legacy_ms:.1f} ms")
+    print(f"fused:     {fused_ms:.1f} ms ({legacy_ms / fused_ms:.1f}x)")
+    print(f"automaton: {automaton_ms:.1f} ms ({legacy_ms / automaton_ms:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Comment lookup latency on a 1M-row comments table, before and after the indexes.
+
+Seeds a temporary SQLite database with BENCH_COMMENTS comments spread over
+BENCH_CONTRACTS contracts (plus versions and invitations), times the queries
+behind the comment list, version lookup and invitation accept paths, then runs
+migrations/add_indexes.py's upgrade() against it and times them again.
+
+Run from the repository root:
+    python benchmarks/bench_comment_indexes.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from models import Base, Comment, ContractVersion, Invitation
+
+COMMENTS = int(os.getenv('BENCH_COMMENTS', '1000000'))
+CONTRACTS = int(os.getenv('BENCH_CONTRACTS', '10000'))
+LOOKUPS = int(os.getenv('BENCH_LOOKUPS', '50'))
+
+def seed(engine):
+    # Create tables without the new indexes to reproduce the old schema
+    for table in Base.metadata.sorted_tables:
+        table.create(engine)
+        for index in table.indexes:
+            index.drop(engine)
+
+    rng = random.Random(0)
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        batch = 100000
+        for start in range(0, COMMENTS, batch):
+            cursor.executemany(
+                "INSERT INTO comments (contract_id, user_id, content, resolved) VALUES (?, ?, ?, ?)",
+                [(rng.randrange(CONTRACTS), 1, f"Comment {i}", i % 5 == 0)
+                 for i in range(start, min(start + batch, COMMENTS))]
+            )
+        cursor.executemany(
+            "INSERT INTO contract_versions (contract_id, content, version, is_snapshot) VALUES (?, ?, ?, 1)",
+            [(c, f"Version {v}", v) for c in range(CONTRACTS) for v in range(1, 11)]
+        )
+        cursor.executemany(
+            "INSERT INTO invitations (contract_id, email, token, status, expires_at) "
+            "VALUES (?, ?, ?, ?, '2030-01-01 00:00:00.000000')",
+            [(c, f"user{c}@example.com", f"token-{c}", 'pending') for c in range(CONTRACTS)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+def time_lookups(Session):
+    rng = random.Random(1)
+    db = Session()
+    timings = {'comments': [], 'version': [], 'invitation': []}
+    try:
+        for _ in range(LOOKUPS):
+            contract_id = rng.randrange(CONTRACTS)
+
+            start = time.perf_counter()
+            db.query(Comment).filter(Comment.contract_id == contract_id, Comment.resolved == False).all()
+            timings['comments'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            db.query(ContractVersion).filter(
+                ContractVersion.contract_id == contract_id,
+                ContractVersion.version == rng.randrange(1, 11)
+            ).first()
+            timings['version'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            db.query(Invitation).filter_by(token=f"token-{contract_id}", status='pending').first()
+            timings['invitation'].append(time.perf_counter() - start)
+            db.expunge_all()
+    finally:
+        db.close()
+    return {name: sorted(values)[len(values) // 2] * 1000 for name, values in timings.items()}
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Session = sessionmaker(bind=engine)
+
+        start = time.perf_counter()
+        seed(engine)
+        print(f"Seeded {COMMENTS} comments over {CONTRACTS} contracts in {time.perf_counter() - start:.1f}s")
+        before = time_lookups(Session)
+
+        import migrations.add_indexes as add_indexes
+        add_indexes.engine = engine
+        start = time.perf_counter()
+        add_indexes.upgrade()
+        print(f"Built indexes in {time.perf_counter() - start:.1f}s")
+        after = time_lookups(Session)
+        engine.dispose()
+
+    print(f"{'lookup':<12}{'before (ms)':>14}{'after (ms)':>14}")
+    for name in before:
+        print(f"{name:<12}{before[name]:>14.3f}{after[name]:>14.3f}")
+
+if __name__ == '__main__':
+    main()
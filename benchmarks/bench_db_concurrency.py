@@ -0,0 +1,107 @@
+"""Concurrent reads and writes on comments and versions, default engine vs tuned engine.
+
+Reader threads do what GET /api/contracts/<id>/comments and
+GET /api/contracts/<id>/versions do; writer threads do what the matching
+POST endpoints do. "default" is the old create_engine(DATABASE_URL);
+"tuned" is database.create_db_engine (WAL, busy timeout, pooling).
+
+Run from the repository root:
+    python benchmarks/bench_db_concurrency.py
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_db_engine
+from models import Base, Contract, User
+from services.collaboration_service import CollaborationService
+
+READERS = int(os.getenv('BENCH_READERS', '8'))
+WRITERS = int(os.getenv('BENCH_WRITERS', '4'))
+DURATION = float(os.getenv('BENCH_SECONDS', '5'))
+CONTRACT_ID = 'bench-contract'
+
+def seed(engine):
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    user = User(email='bench@example.com', name='Bench User')
+    db.add(user)
+    db.add(Contract(id=CONTRACT_ID, title='Bench', content='', version=0))
+    db.commit()
+    user_id = user.id
+    service = CollaborationService(db)
+    for i in range(20):
+        service.add_comment(CONTRACT_ID, user_id, f"Seed comment {i}")
+        service.create_version(CONTRACT_ID, f"Clause {i}\n" * 50, user_id)
+    db.close()
+    return user_id
+
+def read_once(service):
+    comments = service.get_comments(CONTRACT_ID)
+    [{'id': c.id, 'user': c.user.name} for c in comments]
+    versions = service.list_versions(CONTRACT_ID)
+    [{'version': v.version, 'created_by': v.created_by.name} for v in versions]
+
+def write_once(service, user_id, i):
+    service.add_comment(CONTRACT_ID, user_id, f"Comment {i}")
+    service.create_version(CONTRACT_ID, f"Clause {i}\n" * 50, user_id)
+
+def run(label, engine):
+    user_id = seed(engine)
+    Session = sessionmaker(bind=engine)
+    stop = time.perf_counter() + DURATION
+    counts = {'reads': 0, 'writes': 0, 'errors': 0}
+    latencies = {'reads': [], 'writes': []}
+    lock = threading.Lock()
+
+    def worker(kind):
+        i = 0
+        while time.perf_counter() < stop:
+            db = Session()
+            start = time.perf_counter()
+            try:
+                if kind == 'reads':
+                    read_once(CollaborationService(db))
+                else:
+                    write_once(CollaborationService(db), user_id, i)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    counts[kind] += 1
+                    latencies[kind].append(elapsed)
+            except Exception:
+                db.rollback()
+                with lock:
+                    counts['errors'] += 1
+            finally:
+                db.close()
+            i += 1
+
+    threads = [threading.Thread(target=worker, args=('reads',)) for _ in range(READERS)]
+    threads += [threading.Thread(target=worker, args=('writes',)) for _ in range(WRITERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    def p95(values):
+        return sorted(values)[int(len(values) * 0.95)] * 1000 if values else 0.0
+
+    print(f"{label:>8}: {counts['reads'] / DURATION:8.1f} reads/s (p95 {p95(latencies['reads']):7.1f} ms)  "
+          f"{counts['writes'] / DURATION:7.1f} writes/s (p95 {p95(latencies['writes']):7.1f} ms)  "
+          f"{counts['errors']} errors")
+
+def main():
+    print(f"{READERS} readers, {WRITERS} writers, {DURATION:.0f}s per run")
+    with tempfile.TemporaryDirectory() as tmp:
+        run('default', create_engine(f"sqlite:///{os.path.join(tmp, 'default.db')}"))
+        run('tuned', create_db_engine(f"sqlite:///{os.path.join(tmp, 'tuned.db')}"))
+
+if __name__ == '__main__':
+    main()
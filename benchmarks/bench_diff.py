@@ -0,0 +1,64 @@
+"""Version-compare latency of diff_texts on related and unrelated texts.
+
+"edited" pairs are a generated contract and a copy with a few dozen words
+changed, which is what GET /versions/compare normally sees. "unrelated" pairs
+are two independently generated texts of the same size, the worst case for
+Myers' O((N + M) * D) search. Each case is timed with the default
+DIFF_MAX_EDIT_DISTANCE cap and, for the smaller sizes, uncapped.
+
+Run from the repository root:
+    python benchmarks/bench_diff.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from services.diff_engine import DIFF_MAX_EDIT_DISTANCE, diff_texts
+
+SIZES_KB = [int(size) for size in os.getenv('BENCH_SIZES_KB', '12,25,50,400').split(',')]
+UNCAPPED_MAX_KB = int(os.getenv('BENCH_UNCAPPED_MAX_KB', '12'))
+EDITS = int(os.getenv('BENCH_EDITS', '40'))
+
+def generate(rng, size_kb):
+    vocabulary = [f"term{i}" for i in range(2000)]
+    words = []
+    length = 0
+    while length < size_kb * 1024:
+        word = rng.choice(vocabulary)
+        words.append(word)
+        length += len(word) + 1
+    return words
+
+def edited(rng, words):
+    words = list(words)
+    for _ in range(EDITS):
+        words[rng.randrange(len(words))] = f"edit{rng.randrange(100)}"
+    return words
+
+def timed(text1, text2, max_edit_distance):
+    start = time.perf_counter()
+    diff = diff_texts(text1, text2, max_edit_distance=max_edit_distance)
+    return (time.perf_counter() - start) * 1000, len(diff['opcodes'])
+
+def main():
+    rng = random.Random(0)
+    print(f"{'case':<16} {'cap':>8} {'ms':>10} {'opcodes':>8}")
+    for size_kb in SIZES_KB:
+        base = generate(rng, size_kb)
+        pairs = {
+            'edited': (base, edited(rng, base)),
+            'unrelated': (base, generate(rng, size_kb)),
+        }
+        for name, (words1, words2) in pairs.items():
+            text1, text2 = ' '.join(words1), ' '.join(words2)
+            caps = [DIFF_MAX_EDIT_DISTANCE]
+            if size_kb <= UNCAPPED_MAX_KB:
+                caps.append(None)
+            for cap in caps:
+                ms, opcodes = timed(text1, text2, cap)
+                print(f"{name + f' {size_kb}KB':<16} {str(cap):>8} {ms:>10.1f} {opcodes:>8}")
+
+if __name__ == '__main__':
+    main()
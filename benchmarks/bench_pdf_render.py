@@ -0,0 +1,68 @@
+"""Contract PDF rendering: the previous per-line renderer vs create_pdf_from_text vs a render_pdf cache hit.
+
+"legacy" is the old create_pdf_from_text (seven str.replace passes, an ASCII
+encode and a multi_cell call per line). All renders of the same text must
+produce identical PDFs.
+
+Run from the repository root:
+    python benchmarks/bench_pdf_render.py
+"""
+import os
+import random
+import sys
+import time
+from unittest import mock
+
+from fpdf import FPDF
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from pdf_renderer import create_pdf_from_text, render_pdf
+
+LINES = int(os.getenv('BENCH_RENDER_LINES', '3000'))
+
+def legacy_create_pdf_from_text(text):
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font('Arial', size=10)
+    text = text.replace('–', '-')
+    text = text.replace('—', '--')
+    text = text.replace('‘', "'")
+    text = text.replace('’', "'")
+    text = text.replace('“', '"')
+    text = text.replace('”', '"')
+    text = text.replace('…', '...')
+    for line in text.split('\n'):
+        line = line.encode('ascii', 'replace').decode('ascii')
+        pdf.multi_cell(0, 10, txt=line)
+    return pdf.output(dest='S').encode('latin-1')
+
+def make_contract(lines):
+    rng = random.Random(0)
+    words = ['the', 'Supplier', 'shall', 'deliver', 'Services', '“Deliverables”', 'Customer’s',
+             'within', 'thirty', '(30)', 'days', '–', 'notice', 'termination', 'fees…', '§']
+    return '\n'.join(' '.join(rng.choice(words) for _ in range(rng.randint(0, 30))) for _ in range(lines))
+
+def best_ms(call, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+def main():
+    text = make_contract(LINES)
+    # fpdf stamps the creation time into the document
+    with mock.patch('time.strftime', return_value='20240101000000'):
+        legacy_ms, legacy = best_ms(lambda: legacy_create_pdf_from_text(text))
+        render_ms, rendered = best_ms(lambda: create_pdf_from_text(text))
+        render_pdf(text)
+        cached_ms, cached = best_ms(lambda: render_pdf(text))
+    assert legacy == rendered == cached, "renders differ"
+    print(f"{LINES} lines, {len(text) / 1024:.0f} KB text, {len(rendered) / 1024:.0f} KB PDF")
+    print(f"legacy:    {legacy_ms:.1f} ms")
+    print(f"rendered:  {render_ms:.1f} ms ({legacy_ms / render_ms:.1f}x)")
+    print(f"cache hit: {cached_ms:.2f} ms")
+
+if __name__ == '__main__':
+    main()
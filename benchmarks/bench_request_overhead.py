@@ -0,0 +1,81 @@
+"""Per-request overhead of OpenAI/DocuSign setup, before and after the client registry.
+
+"before" reproduces the old before_request hook, which built a new OpenAI
+client and rewrote app.config on every request, static assets included.
+"after" does no per-request setup and looks the client up in the registry
+only on API routes.
+
+Run from the repository root:
+    python benchmarks/bench_request_overhead.py
+"""
+import os
+import sys
+import time
+
+from flask import Flask, jsonify
+from openai import OpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from services.openai_clients import OpenAIClientRegistry
+
+API_KEY = os.getenv('OPENAI_API_KEY', 'sk-benchmark-key')
+REQUESTS = int(os.getenv('BENCH_REQUESTS', '2000'))
+
+def build_before_app():
+    app = Flask(__name__)
+
+    @app.before_request
+    def before_request():
+        OpenAI(api_key=API_KEY)
+        app.config.update(
+            DOCUSIGN_INTEGRATION_KEY=os.getenv('DOCUSIGN_INTEGRATION_KEY'),
+            DOCUSIGN_USER_ID=os.getenv('DOCUSIGN_USER_ID'),
+            DOCUSIGN_ACCOUNT_ID=os.getenv('DOCUSIGN_ACCOUNT_ID'),
+            DOCUSIGN_PRIVATE_KEY_PATH='private.key',
+            DOCUSIGN_AUTH_SERVER='account-d.docusign.com'
+        )
+
+    @app.route('/js/app.js')
+    def static_asset():
+        return 'console.log("ok");'
+
+    @app.route('/api/ping')
+    def api_ping():
+        return jsonify({'ok': True})
+
+    return app
+
+def build_after_app():
+    app = Flask(__name__)
+    registry = OpenAIClientRegistry()
+
+    @app.route('/js/app.js')
+    def static_asset():
+        return 'console.log("ok");'
+
+    @app.route('/api/ping')
+    def api_ping():
+        registry.get(API_KEY)
+        return jsonify({'ok': True})
+
+    return app
+
+def time_requests(app, path):
+    test_client = app.test_client()
+    test_client.get(path)  # warm up
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        test_client.get(path)
+    return (time.perf_counter() - start) / REQUESTS * 1e6
+
+def main():
+    print(f"{REQUESTS} requests per measurement, microseconds per request")
+    print(f"{'route':<14}{'before':>10}{'after':>10}{'saved':>10}")
+    before_app, after_app = build_before_app(), build_after_app()
+    for path in ('/js/app.js', '/api/ping'):
+        before = time_requests(before_app, path)
+        after = time_requests(after_app, path)
+        print(f"{path:<14}{before:>10.1f}{after:>10.1f}{before - after:>10.1f}")
+
+if __name__ == '__main__':
+    main()
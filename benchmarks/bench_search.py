@@ -0,0 +1,81 @@
+"""Template search latency over BENCH_DOCS documents: ILIKE scan vs the FTS5 index.
+
+"ilike" is the old TemplateService.search_templates filter on name and
+description (it never looked at content), "ilike+content" is the same scan
+extended to content, and "fts5" is SearchIndex.search over name, description
+and content with BM25 ranking and snippets.
+
+Run from the repository root:
+    python benchmarks/bench_search.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from sqlalchemy import or_
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from database import create_db_engine
+from models import Base, Template
+from services.search_index import SearchIndex
+
+DOCS = int(os.getenv('BENCH_DOCS', '100000'))
+WORDS_PER_DOC = int(os.getenv('BENCH_WORDS_PER_DOC', '200'))
+QUERIES = ['indemnify', 'limitation of liability', 'termination convenience', 'governing law arbitration']
+
+def seed(engine):
+    rng = random.Random(0)
+    vocabulary = [f"term{i}" for i in range(20000)]
+    clauses = ['shall indemnify and hold harmless', 'limitation of liability', 'termination for convenience',
+               'governing law and arbitration', 'warranty disclaimer', 'confidential information']
+    conn = engine.raw_connection()
+    try:
+        rows = []
+        for i in range(DOCS):
+            words = [rng.choice(vocabulary) for _ in range(WORDS_PER_DOC)]
+            words[rng.randrange(WORDS_PER_DOC)] = rng.choice(clauses)
+            rows.append((f"Template {i}", f"Description {i}", ' '.join(words)))
+        conn.cursor().executemany("INSERT INTO templates (name, description, content) VALUES (?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+def median_ms(call, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = call()
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000, result
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        seed(engine)
+
+        index = SearchIndex(engine)
+        start = time.perf_counter()
+        index.install()
+        print(f"Indexed {DOCS} templates in {time.perf_counter() - start:.1f}s")
+
+        db = sessionmaker(bind=engine)()
+        print(f"{'query':<28}{'ilike (ms)':>12}{'ilike+content (ms)':>20}{'fts5 (ms)':>12}{'fts5 hits':>11}")
+        for query in QUERIES:
+            ilike_ms, _ = median_ms(lambda: db.query(Template.id).filter(or_(
+                Template.name.ilike(f"%{query}%"), Template.description.ilike(f"%{query}%")
+            )).all())
+            content_ms, _ = median_ms(lambda: db.query(Template.id).filter(or_(
+                Template.name.ilike(f"%{query}%"), Template.description.ilike(f"%{query}%"),
+                Template.content.ilike(f"%{query}%")
+            )).all())
+            fts_ms, results = median_ms(lambda: index.search(query, doc_types=('template',), limit=20))
+            print(f"{query:<28}{ilike_ms:>12.1f}{content_ms:>20.1f}{fts_ms:>12.1f}{len(results):>11}")
+        db.close()
+        engine.dispose()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""Randomized check that diff_sequences returns valid, minimal edit scripts.
+
+For CHECK_CASES random pairs of token sequences over a small alphabet (so
+there are many partial matches), the Myers edit script must rebuild the
+second sequence from the first, and its inserted plus deleted token count
+must equal len(a) + len(b) - 2 * LCS(a, b) computed by the quadratic
+dynamic program. Each pair is also diffed with an edit-distance cap of
+CHECK_MAX_EDITS: the script must still rebuild the second sequence, and must
+stay minimal whenever the minimum fits under the cap. Exits non-zero on the
+first failing case.
+
+Run from the repository root:
+    python benchmarks/check_diff_minimal.py
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from services.diff_engine import diff_sequences
+
+CASES = int(os.getenv('CHECK_CASES', '2000'))
+MAX_LEN = int(os.getenv('CHECK_MAX_LEN', '60'))
+SEED = int(os.getenv('CHECK_SEED', '1234'))
+MAX_EDITS = int(os.getenv('CHECK_MAX_EDITS', '10'))
+
+def lcs_length(a, b):
+    previous = [0] * (len(b) + 1)
+    for token in a:
+        current = [0]
+        for j, other in enumerate(b):
+            current.append(previous[j] + 1 if token == other else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+def random_pair(rng):
+    alphabet = [f"w{i}" for i in range(rng.randint(1, 6))]
+    a = [rng.choice(alphabet) for _ in range(rng.randint(0, MAX_LEN))]
+    # Mostly edits of a, sometimes unrelated, like real contract versions
+    if rng.random() < 0.2:
+        return a, [rng.choice(alphabet) for _ in range(rng.randint(0, MAX_LEN))]
+    b = list(a)
+    for _ in range(rng.randint(0, 8)):
+        position = rng.randint(0, len(b))
+        if b and rng.random() < 0.5:
+            del b[min(position, len(b) - 1)]
+        else:
+            b.insert(position, rng.choice(alphabet))
+    return a, b
+
+def check(a, b, max_edit_distance=None):
+    """Return an error message, or None when the script is valid and minimal."""
+    rebuilt = []
+    edits = 0
+    i = j = 0
+    for tag, i1, i2, j1, j2 in diff_sequences(a, b, max_edit_distance):
+        if (i1, j1) != (i, j):
+            return f"span {tag} starts at {(i1, j1)}, expected {(i, j)}"
+        if tag == 'equal':
+            if a[i1:i2] != b[j1:j2]:
+                return f"equal span {(i1, i2, j1, j2)} differs"
+            rebuilt.extend(a[i1:i2])
+        elif tag == 'insert':
+            if i1 != i2:
+                return f"insert span {(i1, i2, j1, j2)} consumes tokens of a"
+            rebuilt.extend(b[j1:j2])
+            edits += j2 - j1
+        elif tag == 'delete':
+            if j1 != j2:
+                return f"delete span {(i1, i2, j1, j2)} consumes tokens of b"
+            edits += i2 - i1
+        else:
+            return f"unknown tag {tag}"
+        i, j = i2, j2
+    if (i, j) != (len(a), len(b)):
+        return f"script ends at {(i, j)}, expected {(len(a), len(b))}"
+    if rebuilt != b:
+        return "script does not rebuild b"
+    optimal = len(a) + len(b) - 2 * lcs_length(a, b)
+    if max_edit_distance is not None and optimal > max_edit_distance:
+        return None
+    if edits != optimal:
+        return f"{edits} edits, minimum is {optimal}"
+    return None
+
+def main():
+    rng = random.Random(SEED)
+    for case in range(CASES):
+        a, b = random_pair(rng)
+        for max_edit_distance in (None, MAX_EDITS):
+            error = check(a, b, max_edit_distance)
+            if error:
+                print(f"Case {case} (max edits {max_edit_distance}) failed: {error}\n  a={a}\n  b={b}")
+                sys.exit(1)
+    print(f"{CASES} random cases: every edit script is valid and minimal")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Query-count regression check for the list endpoints.
+
+Seeds a scratch SQLite database with a contract that has many comments and
+versions plus many tagged templates, then requests GET
+/api/contracts/<id>/comments, GET /api/contracts/<id>/versions and GET
+/api/templates through the Flask test client and asserts that each route
+runs a fixed number of SQL statements regardless of row count. Going
+through the routes means a shadowing route or a serializer that touches a
+lazy relationship is caught too. Exits non-zero when a budget is exceeded.
+
+Run from the repository root:
+    python benchmarks/check_query_counts.py
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+ROWS = int(os.getenv('CHECK_ROWS', '500'))
+CONTRACT_ID = 7
+
+# app and database read these at import, so point them at scratch files first
+SCRATCH_DIR = tempfile.mkdtemp(prefix='query-counts-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(SCRATCH_DIR, 'contracts.db')}"
+os.environ['JOB_QUEUE_PATH'] = os.path.join(SCRATCH_DIR, 'jobs.db')
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import app as contract_app
+from database import Session, engine
+from models import Comment, Contract, Tag, Template, User
+from services.collaboration_service import CollaborationService
+
+@contextmanager
+def count_queries(engine):
+    """Collect every SQL statement executed on engine inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+@contextmanager
+def assert_max_queries(engine, limit, label):
+    with count_queries(engine) as statements:
+        yield
+    status = 'ok' if len(statements) <= limit else 'FAIL'
+    print(f"{label:<10} {len(statements):>4} queries (budget {limit})  {status}")
+    if len(statements) > limit:
+        for statement in statements[:limit + 3]:
+            print(f"    {' '.join(statement.split())[:120]}")
+        raise AssertionError(f"{label}: {len(statements)} queries, expected at most {limit}")
+
+def seed(db):
+    users = [User(email=f"user{i}@example.com", name=f"User {i}") for i in range(ROWS)]
+    db.add_all(users)
+    db.add(Contract(id=str(CONTRACT_ID), title='Query count', content='', version=0))
+    db.commit()
+
+    db.add_all(Comment(contract_id=CONTRACT_ID, user_id=users[i].id, content=f"Comment {i}")
+               for i in range(ROWS))
+    db.commit()
+
+    service = CollaborationService(db)
+    for i in range(min(ROWS, 50)):
+        service.create_version(CONTRACT_ID, f"Clause {i}\n" * 20, users[i].id)
+
+    tags = [Tag(name=f"tag-{i}") for i in range(20)]
+    for i in range(ROWS):
+        db.add(Template(name=f"Template {i}", content='...', tags=[tags[i % 20], tags[(i + 7) % 20]]))
+    db.commit()
+
+def main():
+    db = Session()
+    try:
+        seed(db)
+    finally:
+        db.close()
+
+    client = contract_app.app.test_client()
+    failures = 0
+    checks = [
+        ('comments', 1, f"/api/contracts/{CONTRACT_ID}/comments", ROWS),
+        ('versions', 1, f"/api/contracts/{CONTRACT_ID}/versions", min(ROWS, 50)),
+        ('templates', 2, "/api/templates", ROWS),
+    ]
+    for label, limit, url, expected_rows in checks:
+        try:
+            with assert_max_queries(engine, limit, label):
+                response = client.get(url)
+            if response.status_code != 200 or len(response.get_json()) != expected_rows:
+                raise AssertionError(f"{label}: GET {url} returned {response.status_code} "
+                                     f"with {len(response.get_json() or [])} rows, expected {expected_rows}")
+        except AssertionError as e:
+            print(e)
+            failures += 1
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,7 @@
-from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text, DateTime, ForeignKey, text
+from sqlalchemy import create_engine, event, MetaData, Table, Column, Integer, String, Text, DateTime, ForeignKey, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool
 from models import Base
 import os
 from dotenv import load_dotenv
@@ -11,8 +13,64 @@ load_dotenv()
 # Database configuration
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///contracts.db')
 
+# SQLite tuning
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '10000'))
+SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', '65536'))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+
+# Connection pool settings (server databases such as Postgres, and file-based SQLite)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite settings.
+
+    WAL lets readers run alongside a writer, and the busy timeout makes
+    writers wait for the lock instead of failing with 'database is locked'.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    # Negative cache_size is in KiB rather than pages
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+def create_db_engine(database_url: str = DATABASE_URL):
+    """Create an engine with pooling and per-backend tuning for database_url."""
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # In-memory databases keep SQLAlchemy's single-connection pool
+            return create_engine(database_url)
+        engine = create_engine(
+            database_url,
+            # Pooled connections are shared between Flask threads
+            connect_args={'check_same_thread': False, 'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000},
+            poolclass=QueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT
+        )
+        event.listen(engine, 'connect', _set_sqlite_pragmas)
+        return engine
+
+    return create_engine(
+        database_url,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        # Drop connections the server closed while they sat in the pool
+        pool_pre_ping=True
+    )
+
 # Create engine
-engine = create_engine(DATABASE_URL)
+engine = create_db_engine(DATABASE_URL)
 
 # Create session factory
 session_factory = sessionmaker(bind=engine)
@@ -0,0 +1,26 @@
+from sqlalchemy import create_engine, inspect, text
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Create database engine
+engine = create_engine(os.getenv('DATABASE_URL', 'sqlite:///contracts.db'))
+
+def upgrade():
+    # Templates registered as DocuSign server templates remember the template id
+    # and how many signer roles it has
+    columns = [c['name'] for c in inspect(engine).get_columns('templates')]
+    if 'docusign_template_id' not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE templates ADD COLUMN docusign_template_id VARCHAR(64)"))
+        print("Added templates.docusign_template_id")
+    if 'docusign_role_count' not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE templates ADD COLUMN docusign_role_count INTEGER"))
+        print("Added templates.docusign_role_count")
+
+if __name__ == '__main__':
+    upgrade()
+    print("Database migration completed successfully!")
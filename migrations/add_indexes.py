@@ -0,0 +1,34 @@
+from sqlalchemy import create_engine, inspect, text
+from models import Base
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Create database engine
+engine = create_engine(os.getenv('DATABASE_URL', 'sqlite:///contracts.db'))
+
+def upgrade():
+    # Create every index declared in models.py that the database is missing.
+    # On Postgres the indexes are built CONCURRENTLY so writes are not blocked;
+    # SQLite has no online index build, but each index is its own short statement.
+    postgres = engine.dialect.name == 'postgresql'
+    existing_tables = set(inspect(engine).get_table_names())
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                columns = ', '.join(column.name for column in index.columns)
+                concurrently = 'CONCURRENTLY ' if postgres else ''
+                print(f"Creating index {index.name} on {table.name} ({columns})")
+                conn.execute(text(
+                    f"CREATE INDEX {concurrently}IF NOT EXISTS {index.name} ON {table.name} ({columns})"
+                ))
+        if not postgres:
+            conn.execute(text("ANALYZE"))
+
+if __name__ == '__main__':
+    upgrade()
+    print("Database migration completed successfully!")
@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from models import ContractVersion
+from services.version_store import VersionStore
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Create database engine
+engine = create_engine('sqlite:///contracts.db')
+
+def upgrade():
+    # Add the delta storage columns
+    columns = [c['name'] for c in inspect(engine).get_columns('contract_versions')]
+    with engine.begin() as conn:
+        if 'is_snapshot' not in columns:
+            conn.execute(text("ALTER TABLE contract_versions ADD COLUMN is_snapshot BOOLEAN DEFAULT 1"))
+        if 'delta' not in columns:
+            conn.execute(text("ALTER TABLE contract_versions ADD COLUMN delta BLOB"))
+        conn.execute(text("UPDATE contract_versions SET is_snapshot = 1 WHERE is_snapshot IS NULL"))
+
+    # Rewrite each contract's history as snapshots plus forward deltas
+    db = sessionmaker(bind=engine)()
+    store = VersionStore(db)
+    try:
+        contract_ids = [row[0] for row in db.query(ContractVersion.contract_id).distinct()]
+        for contract_id in contract_ids:
+            versions = db.query(ContractVersion).filter(
+                ContractVersion.contract_id == contract_id
+            ).order_by(ContractVersion.version).all()
+            store.materialize_all(versions)
+
+            previous = None
+            converted = 0
+            for version in versions:
+                full_text = version.content
+                storage = store.storage_for(contract_id, version.version, full_text, previous)
+                if not storage['is_snapshot'] and version.is_snapshot is not False:
+                    version.content = storage['content']
+                    version.is_snapshot = False
+                    version.delta = storage['delta']
+                    converted += 1
+                previous = full_text
+            db.commit()
+            if converted:
+                print(f"Contract {contract_id}: stored {converted} of {len(versions)} versions as deltas")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    upgrade()
+    print("Database migration completed successfully!")
@@ -1,6 +1,6 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Table
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Table, LargeBinary, Index
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 import uuid
 
@@ -9,13 +9,17 @@ Base = declarative_base()
 # Association tables for many-to-many relationships
 template_tags = Table('template_tags', Base.metadata,
     Column('template_id', Integer, ForeignKey('templates.id')),
-    Column('tag_id', Integer, ForeignKey('tags.id'))
+    Column('tag_id', Integer, ForeignKey('tags.id')),
+    Index('ix_template_tags_template_id_tag_id', 'template_id', 'tag_id'),
+    Index('ix_template_tags_tag_id', 'tag_id')
 )
 
 contract_collaborators = Table('contract_collaborators', Base.metadata,
     Column('contract_id', Integer, ForeignKey('contracts.id')),
     Column('user_id', Integer, ForeignKey('users.id')),
-    Column('role', String(50))
+    Column('role', String(50)),
+    Index('ix_contract_collaborators_contract_id_user_id', 'contract_id', 'user_id'),
+    Index('ix_contract_collaborators_user_id', 'user_id')
 )
 
 class User(Base):
@@ -36,11 +40,16 @@ class Template(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String(255), nullable=False)
     description = Column(Text)
-    content = Column(Text, nullable=False)
+    # Large text columns load on first access so list queries skip them
+    content = deferred(Column(Text, nullable=False))
     category = Column(String(100))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     created_by_id = Column(Integer, ForeignKey('users.id'))
+    # Set once the template is registered as a DocuSign server template
+    docusign_template_id = Column(String(64))
+    # Signer roles in the registered template; composite sends must fill each one
+    docusign_role_count = Column(Integer)
     
     # Relationships
     tags = relationship("Tag", secondary=template_tags, back_populates="templates")
@@ -60,7 +69,7 @@ class Contract(Base):
     
     id = Column(String, primary_key=True)
     title = Column(String)
-    content = Column(Text)
+    content = deferred(Column(Text))
     status = Column(String(50), default='draft')  # draft, under_review, signed, expired
     version = Column(Integer, default=1)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -73,20 +82,25 @@ class Contract(Base):
     comments = relationship("Comment", back_populates="contract")
     versions = relationship("ContractVersion", back_populates="contract")
     collaborators = relationship("User", secondary=contract_collaborators)
-    invitations = relationship("Invitation", backref="contract")
+    invitations = relationship("Invitation", back_populates="contract")
 
     def __repr__(self):
         return f"<Contract(id='{self.id}', title='{self.title}')>"
 
 class ContractVersion(Base):
     __tablename__ = 'contract_versions'
+    __table_args__ = (
+        Index('ix_contract_versions_contract_id_version', 'contract_id', 'version'),
+    )
     
     id = Column(Integer, primary_key=True)
     contract_id = Column(Integer, ForeignKey('contracts.id'))
-    content = Column(Text, nullable=False)
+    content = deferred(Column(Text, nullable=False), group='body')  # Full text for snapshots, empty for deltas
     version = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     created_by_id = Column(Integer, ForeignKey('users.id'))
+    is_snapshot = Column(Boolean, default=True)
+    delta = deferred(Column(LargeBinary, nullable=True), group='body')  # Compressed delta from the previous version
     
     # Relationships
     contract = relationship("Contract", back_populates="versions")
@@ -94,6 +108,9 @@ class ContractVersion(Base):
 
 class Comment(Base):
     __tablename__ = 'comments'
+    __table_args__ = (
+        Index('ix_comments_contract_id', 'contract_id'),
+    )
     
     id = Column(Integer, primary_key=True)
     contract_id = Column(Integer, ForeignKey('contracts.id'))
@@ -110,6 +127,10 @@ class Comment(Base):
 
 class Invitation(Base):
     __tablename__ = 'invitations'
+    __table_args__ = (
+        Index('ix_invitations_contract_id', 'contract_id'),
+        Index('ix_invitations_token_status', 'token', 'status'),
+    )
     
     id = Column(Integer, primary_key=True)
     contract_id = Column(Integer, ForeignKey('contracts.id'))
@@ -121,10 +142,13 @@ class Invitation(Base):
     expires_at = Column(DateTime, nullable=False)
     
     # Relationships
-    contract = relationship("Contract")
+    contract = relationship("Contract", back_populates="invitations")
 
 class CalendarEvent(Base):
     __tablename__ = 'calendar_events'
+    __table_args__ = (
+        Index('ix_calendar_events_contract_id_date', 'contract_id', 'date'),
+    )
     
     id = Column(Integer, primary_key=True)
     contract_id = Column(Integer, ForeignKey('contracts.id'))
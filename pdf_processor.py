@@ -4,43 +4,118 @@ import docx
 import chardet
 import pdfplumber
 import traceback
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Bump whenever extraction output changes so cached results are invalidated
+EXTRACTOR_VERSION = 2
+
+# Documents with fewer pages than this are extracted in-process; below it the
+# cost of spinning up worker processes outweighs the parallel speedup.
+PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', '16'))
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', '0')) or None
+
+class _PageExtractor:
+    """Holds the parsed document so each page lookup reuses one parse."""
+
+    def __init__(self, file_bytes):
+        self.file_bytes = file_bytes
+        self._plumber = None
+        try:
+            self.reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
+        except Exception as e:
+            # Every page goes to pdfplumber, as the whole-document fallback did
+            print(f"PyPDF2 could not parse the PDF, using pdfplumber: {str(e)}")
+            self.reader = None
+
+    @property
+    def page_count(self):
+        if self.reader is not None:
+            return len(self.reader.pages)
+        return len(self._plumber_pdf().pages)
+
+    def _plumber_pdf(self):
+        # Only opened when some page actually needs the fallback
+        if self._plumber is None:
+            self._plumber = pdfplumber.open(io.BytesIO(self.file_bytes))
+        return self._plumber
+
+    def _plumber_page_text(self, page_index):
+        return self._plumber_pdf().pages[page_index].extract_text() or ""
+
+    def extract(self, page_index):
+        """Extract one page, falling back to pdfplumber only for this page."""
+        text = ""
+        if self.reader is not None:
+            try:
+                text = self.reader.pages[page_index].extract_text() or ""
+            except Exception as e:
+                print(f"PyPDF2 failed on page {page_index + 1}: {str(e)}")
+
+        if not text.strip():
+            try:
+                text = self._plumber_page_text(page_index)
+            except Exception as e:
+                print(f"pdfplumber failed on page {page_index + 1}: {str(e)}")
+        return page_index, text
+
+    def close(self):
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+
+# Set in each pool worker by _init_page_worker so a worker parses the PDF once
+_worker_extractor = None
+
+def _init_page_worker(file_bytes):
+    global _worker_extractor
+    _worker_extractor = _PageExtractor(file_bytes)
+
+def _extract_page(page_index):
+    return _worker_extractor.extract(page_index)
+
+def iter_pdf_pages(file_bytes, max_workers=None):
+    """Yield (page_index, text) for every page of a PDF, in page order.
+
+    Pages are fanned out across a process pool for large documents. pdfplumber
+    is only used for pages where PyPDF2 returned no text, or for every page
+    when PyPDF2 cannot parse the file at all.
+    """
+    extractor = _PageExtractor(file_bytes)
+    try:
+        page_count = extractor.page_count
+        max_workers = max_workers or PDF_EXTRACT_WORKERS or os.cpu_count() or 1
+
+        if page_count < PARALLEL_MIN_PAGES or max_workers <= 1:
+            for page_index in range(page_count):
+                yield extractor.extract(page_index)
+            return
+
+        # The parent has already parsed the document to count its pages, so it
+        # extracts the first chunk itself while the workers take the rest
+        chunksize = max(1, page_count // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=min(max_workers, page_count - chunksize),
+                                 initializer=_init_page_worker,
+                                 initargs=(file_bytes,)) as executor:
+            remaining = executor.map(_extract_page, range(chunksize, page_count), chunksize=chunksize)
+            for page_index in range(chunksize):
+                yield extractor.extract(page_index)
+            yield from remaining
+    finally:
+        extractor.close()
 
 def process_pdf(file_bytes):
     """Process PDF file and extract text, handling both normal and compressed PDFs."""
-    text = ""
-    
-    # First try with PyPDF2
     try:
-        print("Attempting to process PDF with PyPDF2...")
-        pdf_file = io.BytesIO(file_bytes)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        
-        # Extract text from all pages
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
+        print("Extracting PDF text page by page...")
+        text = "\n".join(page_text for _, page_text in iter_pdf_pages(file_bytes))
         if text.strip():  # If we got some text, return it
             return text.strip()
-            
     except Exception as e:
-        print(f"PyPDF2 processing failed: {str(e)}")
+        print(f"PDF processing failed: {str(e)}")
         print(traceback.format_exc())
-    
-    # If PyPDF2 fails or returns no text, try with pdfplumber
-    try:
-        print("Attempting to process PDF with pdfplumber...")
-        with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-        
-        if text.strip():  # If we got some text, return it
-            return text.strip()
-            
-    except Exception as e:
-        print(f"pdfplumber processing failed: {str(e)}")
-        print(traceback.format_exc())
-    
-    # If both methods fail, return None
+
+    # If extraction fails or returns no text, return None
     return None
 
 def process_docx(file_bytes):
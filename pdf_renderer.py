@@ -0,0 +1,173 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from fpdf import FPDF
+
+# Bump whenever rendering output changes so cached PDFs are invalidated
+RENDERER_VERSION = 1
+
+# Contracts at least this long are rendered in a worker process so a large
+# render does not hold the GIL while other requests are being served
+RENDER_WORKER_MIN_CHARS = int(os.getenv('PDF_RENDER_WORKER_MIN_CHARS', '500000'))
+PDF_RENDER_WORKERS = int(os.getenv('PDF_RENDER_WORKERS', '2'))
+
+class _AsciiTable(dict):
+    """str.translate table: known typographic characters get ASCII equivalents,
+    ASCII maps to itself and anything else becomes '?' (as encode('ascii', 'replace'))."""
+
+    def __missing__(self, codepoint):
+        self[codepoint] = '?'
+        return '?'
+
+ASCII_TABLE = _AsciiTable({codepoint: codepoint for codepoint in range(128)})
+ASCII_TABLE.update({
+    0x2013: '-',    # en-dash
+    0x2014: '--',   # em-dash
+    0x2018: "'",    # left single quote
+    0x2019: "'",    # right single quote
+    0x201C: '"',    # left double quote
+    0x201D: '"',    # right double quote
+    0x2026: '...',  # ellipsis
+})
+
+def normalize_text(text):
+    """Map text to the ASCII the core PDF fonts can draw, in a single pass."""
+    return text.translate(ASCII_TABLE)
+
+# Anchor strings are drawn in white at this size: invisible, but still in the
+# text layer where DocuSign finds them
+ANCHOR_FONT_SIZE = 1
+
+def _draw_anchor(pdf, line, column, anchor, top, line_height):
+    x = pdf.l_margin + pdf.get_string_width(line[:column])
+    if x > pdf.w - pdf.r_margin:
+        # The line wrapped before the column; anchor at its start instead
+        x = pdf.l_margin
+    # Same baseline FPDF uses for the line's own text
+    baseline = top + 0.5 * line_height + 0.3 * pdf.font_size
+    pdf.set_text_color(255, 255, 255)
+    pdf.set_font_size(ANCHOR_FONT_SIZE)
+    pdf.text(x, baseline, anchor)
+    pdf.set_font_size(10)
+    pdf.set_text_color(0, 0, 0)
+
+def create_pdf_from_text(text, anchors=None):
+    """Render contract text as a PDF.
+
+    anchors is an optional list of (line_index, column, anchor_string); each
+    anchor string is drawn invisibly at that character of that line, for
+    DocuSign anchor tabs. Without anchors the whole text is one multi_cell.
+    """
+    # Create PDF object
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font('Arial', size=10)
+    text = normalize_text(text)
+
+    if not anchors:
+        # multi_cell breaks on newlines itself, so the whole text goes in one call
+        pdf.multi_cell(0, 10, txt=text)
+    else:
+        by_line = {}
+        for line_index, column, anchor in anchors:
+            by_line.setdefault(line_index, []).append((column, normalize_text(anchor)))
+        lines = text.split('\n')
+        start = 0
+        for line_index in sorted(by_line):
+            if line_index >= len(lines):
+                break
+            if line_index > start:
+                chunk = '\n'.join(lines[start:line_index])
+                # multi_cell drops one trailing newline, which would lose a final blank line
+                if not lines[line_index - 1]:
+                    chunk += '\n'
+                pdf.multi_cell(0, 10, txt=chunk)
+            # Break first if the line will not fit, so the anchor lands on the line's page
+            if pdf.get_y() + 10 > pdf.page_break_trigger:
+                pdf.add_page()
+            top = pdf.get_y()
+            pdf.multi_cell(0, 10, txt=lines[line_index])
+            for column, anchor in by_line[line_index]:
+                _draw_anchor(pdf, lines[line_index], column, anchor, top, 10)
+            start = line_index + 1
+        if start < len(lines):
+            pdf.multi_cell(0, 10, txt='\n'.join(lines[start:]))
+
+    # Get PDF as bytes
+    return pdf.output(dest='S').encode('latin-1')
+
+class RenderCache:
+    """In-memory LRU of rendered PDF bytes keyed by a hash of the contract text.
+
+    Bounded by entry count and total bytes. Repeated sends and send retries
+    of the same text reuse the PDF instead of rendering it again.
+    """
+
+    def __init__(self, max_entries: int = 128, max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(text: str, anchors=None) -> str:
+        digest = hashlib.sha256(text.encode('utf-8', 'surrogatepass'))
+        if anchors:
+            digest.update(repr(sorted(anchors)).encode('utf-8'))
+        return f"{digest.hexdigest()}-v{RENDERER_VERSION}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            pdf_bytes = self._entries.get(key)
+            if pdf_bytes is not None:
+                self._entries.move_to_end(key)
+            return pdf_bytes
+
+    def put(self, key: str, pdf_bytes: bytes):
+        if len(pdf_bytes) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+            self._entries[key] = pdf_bytes
+            self._bytes += len(pdf_bytes)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+render_cache = RenderCache(
+    max_entries=int(os.getenv('PDF_RENDER_CACHE_ENTRIES', '128')),
+    max_bytes=int(os.getenv('PDF_RENDER_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+)
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def _get_render_pool():
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(max_workers=PDF_RENDER_WORKERS)
+        return _render_pool
+
+def render_pdf(text, anchors=None):
+    """Return the PDF for a contract, from the cache when this exact text was rendered before."""
+    key = render_cache.make_key(text, anchors)
+    pdf_bytes = render_cache.get(key)
+    if pdf_bytes is not None:
+        print("Using cached PDF render")
+        return pdf_bytes
+
+    if len(text) >= RENDER_WORKER_MIN_CHARS:
+        print(f"Rendering {len(text)} characters in a worker process...")
+        pdf_bytes = _get_render_pool().submit(create_pdf_from_text, text, anchors).result()
+    else:
+        pdf_bytes = create_pdf_from_text(text, anchors)
+    render_cache.put(key, pdf_bytes)
+    return pdf_bytes
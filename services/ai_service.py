@@ -1,65 +1,64 @@
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
-from nltk.corpus import stopwords
-nltk.download('punkt')
-nltk.download('stopwords')
+from services.nltk_resources import nltk_resources
+
+DEFINITION_KEYWORDS = ['means', 'shall mean']
+RISK_KEYWORDS = ['terminate', 'liability', 'indemnify', 'warrant']
+LONG_SENTENCE_WORDS = 50  # Complex sentence
+
+def scan_sentences(sentences):
+    """Find key terms, suggestions and risks in a single pass over the sentences.
+
+    Each sentence is lowercased once and checked for every keyword family.
+    Returns (key_terms, suggestions, risks) in sentence order.
+    """
+    key_terms = []
+    suggestions = []
+    risks = []
+    for sentence in sentences:
+        lowered = sentence.lower()
+
+        if any(keyword in lowered for keyword in DEFINITION_KEYWORDS):
+            key_terms.append(sentence)
+
+        # More than N words needs at least 2N + 1 characters, so short sentences skip the split
+        if len(sentence) > 2 * LONG_SENTENCE_WORDS and len(sentence.split()) > LONG_SENTENCE_WORDS:
+            suggestions.append({
+                'original': sentence,
+                'suggestion': 'Consider breaking this sentence into smaller parts for clarity',
+                'type': 'readability'
+            })
+        if "shall" in sentence:  # Archaic language
+            suggestions.append({
+                'original': sentence,
+                'suggestion': 'Consider using "must" or "will" instead of "shall"',
+                'type': 'modernization'
+            })
+
+        for keyword in RISK_KEYWORDS:
+            if keyword in lowered:
+                risks.append({
+                    'sentence': sentence,
+                    'risk_type': keyword,
+                    'severity': 'medium'  # This could be made more sophisticated
+                })
+    return key_terms, suggestions, risks
 
 class AIService:
-    def __init__(self):
-        self.stop_words = set(stopwords.words('english'))
-        
+    @property
+    def stop_words(self):
+        # Loaded on first use rather than at startup
+        return nltk_resources.stop_words()
+
     def analyze_contract(self, contract_text):
         """Analyze contract text and identify key terms and potential issues"""
-        sentences = sent_tokenize(contract_text)
+        sentences = nltk_resources.sent_tokenize(contract_text)
+        key_terms, suggestions, risks = scan_sentences(sentences)
         analysis = {
-            'key_terms': self._extract_key_terms(sentences),
-            'suggestions': self._generate_suggestions(sentences),
-            'risk_assessment': self._assess_risks(sentences)
+            'key_terms': key_terms,
+            'suggestions': suggestions,
+            'risk_assessment': risks
         }
         return analysis
     
-    def _extract_key_terms(self, sentences):
-        """Extract key terms and definitions from contract"""
-        key_terms = []
-        for sentence in sentences:
-            if "means" in sentence.lower() or "shall mean" in sentence.lower():
-                key_terms.append(sentence)
-        return key_terms
-    
-    def _generate_suggestions(self, sentences):
-        """Generate revision suggestions based on best practices"""
-        suggestions = []
-        for sentence in sentences:
-            # Example checks
-            if len(sentence.split()) > 50:  # Complex sentence
-                suggestions.append({
-                    'original': sentence,
-                    'suggestion': 'Consider breaking this sentence into smaller parts for clarity',
-                    'type': 'readability'
-                })
-            if "shall" in sentence:  # Archaic language
-                suggestions.append({
-                    'original': sentence,
-                    'suggestion': 'Consider using "must" or "will" instead of "shall"',
-                    'type': 'modernization'
-                })
-        return suggestions
-    
-    def _assess_risks(self, sentences):
-        """Assess potential risks in contract language"""
-        risks = []
-        risk_keywords = ['terminate', 'liability', 'indemnify', 'warrant']
-        
-        for sentence in sentences:
-            for keyword in risk_keywords:
-                if keyword in sentence.lower():
-                    risks.append({
-                        'sentence': sentence,
-                        'risk_type': keyword,
-                        'severity': 'medium'  # This could be made more sophisticated
-                    })
-        return risks
-    
     def generate_revision(self, contract_text, suggestions):
         """Generate revised contract based on suggestions"""
         revised_text = contract_text
@@ -0,0 +1,136 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+# A section starts at a numbered clause ("1.", "12.3", "Section 4"), an
+# ARTICLE heading or an all-caps heading line.
+SECTION_BOUNDARY = re.compile(
+    r'^(?=\s*(?:\d+(?:\.\d+)*[.)]\s|(?i:section|article)\s+[\dIVXLC]+\b|[A-Z][A-Z0-9 ,&\'-]{3,}:?\s*$))',
+    re.MULTILINE
+)
+
+def split_sections(text: str) -> List[str]:
+    """Split contract text at clause and heading boundaries."""
+    starts = [m.start() for m in SECTION_BOUNDARY.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    starts.append(len(text))
+    return [text[a:b] for a, b in zip(starts, starts[1:]) if text[a:b].strip()]
+
+def chunk_contract(text: str, max_chars: int) -> List[str]:
+    """Pack whole sections into chunks of at most max_chars characters.
+
+    A single section longer than max_chars is split on paragraph, then line
+    boundaries so no chunk exceeds the limit by more than one line.
+    """
+    chunks = []
+    current = ''
+    for section in split_sections(text):
+        pieces = [section]
+        if len(section) > max_chars:
+            pieces = _split_oversized(section, max_chars)
+        for piece in pieces:
+            if current and len(current) + len(piece) > max_chars:
+                chunks.append(current)
+                current = ''
+            current += piece
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+def _split_oversized(section: str, max_chars: int) -> List[str]:
+    pieces = []
+    for paragraph in re.split(r'(?<=\n\n)', section):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(line for line in paragraph.splitlines(keepends=True))
+    return pieces
+
+def parse_analysis_sections(analysis: str) -> List[Dict]:
+    """Parse 'SECTION:' / '- Term: description' model output into sections."""
+    sections = []
+    current_section = None
+    current_items = []
+
+    for line in analysis.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+
+        if line.startswith('SECTION:'):
+            # Save previous section if it exists
+            if current_section:
+                sections.append({
+                    'title': current_section,
+                    'items': current_items
+                })
+            current_section = line.replace('SECTION:', '').strip()
+            current_items = []
+        elif line.startswith('-'):
+            # Parse item
+            item_text = line[1:].strip()
+            if ':' in item_text:
+                title, description = item_text.split(':', 1)
+                current_items.append({
+                    'title': title.strip(),
+                    'description': description.strip()
+                })
+            else:
+                current_items.append({
+                    'title': '',
+                    'description': item_text
+                })
+
+    # Add the last section
+    if current_section:
+        sections.append({
+            'title': current_section,
+            'items': current_items
+        })
+
+    return sections
+
+def merge_sections(section_lists: List[List[Dict]]) -> List[Dict]:
+    """Merge per-chunk sections by title, keeping first-seen order and dropping duplicate items."""
+    merged = {}
+    for sections in section_lists:
+        for section in sections:
+            key = section['title'].lower()
+            if key not in merged:
+                merged[key] = {'title': section['title'], 'items': [], 'seen': set()}
+            target = merged[key]
+            for item in section['items']:
+                item_key = (item['title'].lower(), item['description'].lower())
+                if item_key not in target['seen']:
+                    target['seen'].add(item_key)
+                    target['items'].append(item)
+
+    return [{'title': s['title'], 'items': s['items']} for s in merged.values()]
+
+class ChunkedAnalyzer:
+    """Map-reduce contract analysis: analyze chunks concurrently, merge sections.
+
+    The worker pool is shared by every request, so max_workers bounds the
+    number of upstream calls in flight across the whole process.
+    """
+
+    def __init__(self, max_chunk_chars: int = 12000, max_workers: int = 4):
+        self.max_chunk_chars = max_chunk_chars
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix='analysis')
+
+    def analyze(self, content: str, complete: Callable[[str], str]) -> List[Dict]:
+        """Analyze content, calling complete(user_prompt) -> model text per chunk."""
+        chunks = chunk_contract(content, self.max_chunk_chars)
+        if len(chunks) <= 1:
+            return parse_analysis_sections(complete(f"Analyze this contract:\n\n{content}"))
+
+        total = len(chunks)
+        prompts = [
+            f"Analyze this excerpt (part {i} of {total}) of a longer contract:\n\n{chunk}"
+            for i, chunk in enumerate(chunks, 1)
+        ]
+        results = list(self.executor.map(complete, prompts))
+
+        return merge_sections([parse_analysis_sections(result) for result in results])
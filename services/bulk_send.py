@@ -0,0 +1,77 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from docusign_esign import EnvelopesApi
+from docusign_esign.client.api_exception import ApiException
+
+# Statuses worth retrying: throttling and transient server errors
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class RateLimiter:
+    """Token bucket shared by all dispatch threads."""
+
+    def __init__(self, rate_per_second, burst=None):
+        self.rate = float(rate_per_second)
+        self.capacity = float(burst or max(1, int(rate_per_second)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be made."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class BulkEnvelopeSender:
+    """Dispatches many envelopes concurrently under a shared rate limit."""
+
+    def __init__(self, max_workers=8, rate_per_second=10, max_retries=4, backoff_base=1.0):
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate_per_second)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+
+    def _send_one(self, docusign_call, account_id, envelope_definition):
+        attempt = 0
+        while True:
+            attempt += 1
+            self.rate_limiter.acquire()
+            try:
+                summary = docusign_call(lambda api_client: EnvelopesApi(api_client).create_envelope(
+                    account_id=account_id,
+                    envelope_definition=envelope_definition
+                ))
+                return {'success': True, 'envelope_id': summary.envelope_id, 'attempts': attempt}
+            except ApiException as e:
+                if e.status not in RETRYABLE_STATUSES or attempt > self.max_retries:
+                    return {'success': False, 'error': str(e), 'attempts': attempt}
+                # Exponential backoff with jitter
+                delay = self.backoff_base * (2 ** (attempt - 1)) * (0.5 + random.random())
+                print(f"DocuSign returned {e.status}, retrying in {delay:.1f}s (attempt {attempt})")
+                time.sleep(delay)
+            except Exception as e:
+                return {'success': False, 'error': str(e), 'attempts': attempt}
+
+    def send_all(self, docusign_call, account_id, envelope_definitions):
+        """Send every envelope definition and return one result per input, in order.
+
+        docusign_call(fn) runs fn with an authenticated ApiClient, re-authenticating
+        on a 401 (DocuSignTokenManager.call bound to one credential).
+        """
+        if not envelope_definitions:
+            return []
+        workers = min(self.max_workers, len(envelope_definitions))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-send') as executor:
+            return list(executor.map(
+                lambda definition: self._send_one(docusign_call, account_id, definition),
+                envelope_definitions
+            ))
@@ -0,0 +1,376 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from services.analysis_pipeline import split_sections
+from services.nltk_resources import nltk_resources
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+MIN_CLAUSE_WORDS = 6
+MAX_CLAUSE_CHARS = 1200
+
+def segment_clauses(text: str) -> List[str]:
+    """Split a contract into clause-sized passages.
+
+    Each numbered section or heading block is split into paragraphs; a
+    paragraph longer than MAX_CLAUSE_CHARS is cut into runs of whole
+    sentences, as analyze_contract tokenizes them.
+    """
+    clauses = []
+    for section in split_sections(text):
+        for paragraph in re.split(r'\n\s*\n', section):
+            paragraph = ' '.join(paragraph.split())
+            if len(paragraph) <= MAX_CLAUSE_CHARS:
+                pieces = [paragraph]
+            else:
+                pieces, current = [], ''
+                for sentence in nltk_resources.sent_tokenize(paragraph):
+                    if current and len(current) + len(sentence) > MAX_CLAUSE_CHARS:
+                        pieces.append(current)
+                        current = ''
+                    current = f"{current} {sentence}".strip()
+                pieces.append(current)
+            clauses.extend(p for p in pieces if len(p.split()) >= MIN_CLAUSE_WORDS)
+    return clauses
+
+class _IndexWriteLock:
+    """Exclusive lock for index writers across threads and processes.
+
+    Appends take their row offset from the vector file size and rewrite the
+    document frequencies, so only one writer may run at a time even when
+    several app processes share the index directory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            self._file = open(self.path, 'a+b')
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        except Exception:
+            if self._file is not None:
+                self._file.close()
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+        finally:
+            self._file = None
+            self._thread_lock.release()
+
+class HashingEmbedder:
+    """TF-IDF over hashed unigrams and bigrams, L2-normalized, entirely in NumPy.
+
+    Document frequencies are tracked per hash bucket as clauses are added, so
+    the IDF weights improve as the index grows without a fitting step.
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._buckets = {}
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        cached = self._buckets.get(feature)
+        if cached is None:
+            h = zlib.crc32(feature.encode('utf-8'))
+            # Signed hashing keeps collisions from only ever adding weight
+            cached = (h % self.dim, 1.0 if (h >> 31) & 1 else -1.0)
+            if len(self._buckets) < 500000:
+                self._buckets[feature] = cached
+        return cached
+
+    def features(self, text: str) -> Dict[int, float]:
+        tokens = TOKEN.findall(text.lower())
+        counts = {}
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            index, sign = self._bucket(feature)
+            counts[index] = counts.get(index, 0.0) + sign
+        return counts
+
+    def embed(self, texts: Sequence[str], df: np.ndarray, n_docs: int) -> np.ndarray:
+        idf = np.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = self.features(text)
+            if not counts:
+                continue
+            indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+            # Sublinear term frequency, keeping the hash sign
+            vectors[row, indices] = np.sign(values) * (1.0 + np.log(np.abs(values) + 1e-9).clip(min=0)) * idf[indices]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+class ClauseIndex:
+    """Clause-level similarity search over contracts and templates.
+
+    Clause vectors live in an append-only float32 matrix on disk that is
+    memory-mapped for queries; clause text and ownership live in a small
+    SQLite file next to it. Re-indexing a document zeroes its old rows and
+    appends new ones, so adds never rebuild the matrix. rebuild() compacts
+    away dead rows and recomputes every vector with current IDF weights.
+    Writers hold a lock file in the index directory, so processes sharing
+    the directory never interleave appends or document frequency updates.
+    """
+
+    def __init__(self, index_dir: str, dim: int = 1024, block_rows: int = 65536):
+        self.index_dir = index_dir
+        self.dim = dim
+        self.block_rows = block_rows
+        self.embedder = HashingEmbedder(dim)
+        self.vectors_path = os.path.join(index_dir, 'vectors.f32')
+        self.df_path = os.path.join(index_dir, 'df.npy')
+        self.db_path = os.path.join(index_dir, 'clauses.db')
+        self._lock = threading.Lock()
+        self._write_lock = _IndexWriteLock(os.path.join(index_dir, 'index.lock'))
+        self._matrix = None
+        self._matrix_key = None
+        self._df_key = None
+        os.makedirs(index_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS clauses (
+                    row INTEGER PRIMARY KEY,
+                    doc_type TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    position INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    active INTEGER NOT NULL DEFAULT 1
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_clauses_doc ON clauses (doc_type, doc_id, active)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    doc_type TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    PRIMARY KEY (doc_type, doc_id)
+                )
+            """)
+        self.df = np.zeros(dim, dtype=np.float64)
+        self._load_df()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _n_clauses(self, conn) -> int:
+        return conn.execute("SELECT COUNT(*) FROM clauses WHERE active = 1").fetchone()[0]
+
+    def _open_matrix(self) -> Optional[np.memmap]:
+        """Memory-map the vector file, remapping only after appends or a rebuild."""
+        try:
+            stat = os.stat(self.vectors_path)
+        except FileNotFoundError:
+            return None
+        rows = stat.st_size // (self.dim * 4)
+        if rows == 0:
+            return None
+        key = (stat.st_ino, rows)
+        if self._matrix is None or key != self._matrix_key:
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(rows, self.dim))
+            self._matrix_key = key
+        return self._matrix
+
+    def _load_df(self):
+        """Pick up document frequencies saved by another process since they were last read."""
+        try:
+            stat = os.stat(self.df_path)
+        except FileNotFoundError:
+            return
+        key = (stat.st_ino, stat.st_mtime_ns)
+        if key != self._df_key:
+            self.df = np.load(self.df_path)
+            self._df_key = key
+
+    def _save_df(self):
+        # Replaced atomically, as searches read it without the write lock
+        tmp_path = f"{self.df_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.save(f, self.df)
+        os.replace(tmp_path, self.df_path)
+        stat = os.stat(self.df_path)
+        self._df_key = (stat.st_ino, stat.st_mtime_ns)
+
+    def _update_df(self, clauses: Sequence[str], sign: float):
+        for clause in clauses:
+            buckets = np.fromiter(self.embedder.features(clause).keys(), dtype=np.int64)
+            self.df[buckets] += sign
+        np.maximum(self.df, 0, out=self.df)
+
+    def _deactivate(self, conn, doc_type: str, doc_id: str):
+        rows = conn.execute(
+            "SELECT row, text FROM clauses WHERE doc_type = ? AND doc_id = ? AND active = 1", (doc_type, doc_id)
+        ).fetchall()
+        if not rows:
+            return
+        matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r+',
+                           shape=(os.path.getsize(self.vectors_path) // (self.dim * 4), self.dim))
+        matrix[[row['row'] for row in rows]] = 0.0
+        matrix.flush()
+        del matrix
+        self._update_df([row['text'] for row in rows], -1.0)
+        conn.execute("UPDATE clauses SET active = 0 WHERE doc_type = ? AND doc_id = ?", (doc_type, doc_id))
+
+    def index_document(self, doc_type: str, doc_id, text: str) -> int:
+        """Add or replace one document's clauses. Unchanged documents are skipped."""
+        doc_id = str(doc_id)
+        content_hash = hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+        with self._write_lock, self._lock, self._connect() as conn:
+            self._load_df()
+            existing = conn.execute(
+                "SELECT content_hash FROM documents WHERE doc_type = ? AND doc_id = ?", (doc_type, doc_id)
+            ).fetchone()
+            if existing and existing['content_hash'] == content_hash:
+                return 0
+
+            self._deactivate(conn, doc_type, doc_id)
+            clauses = segment_clauses(text or '')
+            if clauses:
+                self._update_df(clauses, 1.0)
+                vectors = self.embedder.embed(clauses, self.df, self._n_clauses(conn) + len(clauses))
+                row_bytes = self.dim * 4
+                start = os.path.getsize(self.vectors_path) // row_bytes if os.path.exists(self.vectors_path) else 0
+                with open(self.vectors_path, 'ab') as f:
+                    # Drop a partial row left by a writer that died mid-append
+                    f.truncate(start * row_bytes)
+                    f.write(vectors.tobytes())
+                conn.executemany(
+                    "INSERT INTO clauses (row, doc_type, doc_id, position, text) VALUES (?, ?, ?, ?, ?)",
+                    [(start + i, doc_type, doc_id, i, clause) for i, clause in enumerate(clauses)]
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO documents (doc_type, doc_id, content_hash) VALUES (?, ?, ?)",
+                (doc_type, doc_id, content_hash)
+            )
+            self._save_df()
+            return len(clauses)
+
+    def remove_document(self, doc_type: str, doc_id):
+        doc_id = str(doc_id)
+        with self._write_lock, self._lock, self._connect() as conn:
+            self._load_df()
+            self._deactivate(conn, doc_type, doc_id)
+            conn.execute("DELETE FROM documents WHERE doc_type = ? AND doc_id = ?", (doc_type, doc_id))
+            self._save_df()
+
+    def search(self, query: str, k: int = 10, doc_type: Optional[str] = None,
+               exclude_doc_id=None) -> List[Dict]:
+        """Top-k clauses by cosine similarity to query, best first."""
+        with self._lock:
+            matrix = self._open_matrix()
+            if matrix is None:
+                return []
+            self._load_df()
+            with self._connect() as conn:
+                n_docs = self._n_clauses(conn)
+            q = self.embedder.embed([query], self.df, max(n_docs, 1))[0]
+            if not q.any():
+                return []
+
+            # Over-fetch so filtering by type or document still leaves k results
+            fetch = k * 4 if (doc_type or exclude_doc_id is not None) else k
+            best_rows = np.empty(0, dtype=np.int64)
+            best_scores = np.empty(0, dtype=np.float32)
+            # Blocked matvec keeps resident memory flat however large the matrix is
+            for start in range(0, matrix.shape[0], self.block_rows):
+                scores = matrix[start:start + self.block_rows] @ q
+                take = min(fetch, scores.shape[0])
+                top = np.argpartition(-scores, take - 1)[:take]
+                best_rows = np.concatenate([best_rows, top + start])
+                best_scores = np.concatenate([best_scores, scores[top]])
+            order = np.argsort(-best_scores)
+            candidates = [(int(best_rows[i]), float(best_scores[i])) for i in order if best_scores[i] > 0]
+
+        if not candidates:
+            return []
+        scores = dict(candidates)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT row, doc_type, doc_id, position, text FROM clauses "
+                f"WHERE active = 1 AND row IN ({','.join('?' * len(scores))})",
+                list(scores)
+            ).fetchall()
+        results = []
+        for row in sorted(rows, key=lambda r: scores[r['row']], reverse=True):
+            if doc_type and row['doc_type'] != doc_type:
+                continue
+            if exclude_doc_id is not None and row['doc_id'] == str(exclude_doc_id):
+                continue
+            results.append({
+                'doc_type': row['doc_type'],
+                'doc_id': row['doc_id'],
+                'position': row['position'],
+                'text': row['text'],
+                'score': round(scores[row['row']], 4)
+            })
+            if len(results) == k:
+                break
+        return results
+
+    def rebuild(self, documents: Sequence[Tuple[str, str, str]]):
+        """Re-index everything from (doc_type, doc_id, text) tuples into a compact matrix."""
+        documents = [(doc_type, str(doc_id), text or '') for doc_type, doc_id, text in documents]
+        segmented = [(doc_type, doc_id, text, segment_clauses(text)) for doc_type, doc_id, text in documents]
+        all_clauses = [clause for _, _, _, clauses in segmented for clause in clauses]
+
+        df = np.zeros(self.dim, dtype=np.float64)
+        for clause in all_clauses:
+            df[np.fromiter(self.embedder.features(clause).keys(), dtype=np.int64)] += 1
+
+        tmp_path = f"{self.vectors_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            for start in range(0, len(all_clauses), 4096):
+                f.write(self.embedder.embed(all_clauses[start:start + 4096], df, len(all_clauses)).tobytes())
+
+        with self._write_lock, self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM clauses")
+            conn.execute("DELETE FROM documents")
+            row = 0
+            for doc_type, doc_id, text, clauses in segmented:
+                conn.executemany(
+                    "INSERT INTO clauses (row, doc_type, doc_id, position, text) VALUES (?, ?, ?, ?, ?)",
+                    [(row + i, doc_type, doc_id, i, clause) for i, clause in enumerate(clauses)]
+                )
+                row += len(clauses)
+                conn.execute(
+                    "INSERT INTO documents (doc_type, doc_id, content_hash) VALUES (?, ?, ?)",
+                    (doc_type, doc_id, hashlib.sha256(text.encode('utf-8')).hexdigest())
+                )
+            os.replace(tmp_path, self.vectors_path)
+            self.df = df
+            self._save_df()
+            self._matrix = None
+        print(f"Rebuilt clause index: {len(all_clauses)} clauses from {len(documents)} documents")
+        return len(all_clauses)
@@ -1,11 +1,27 @@
 from models import Contract, Comment, User, ContractVersion
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy.orm import Session, joinedload, load_only, undefer_group
+from typing import List, Optional, Sequence, Tuple
 from datetime import datetime
+from collections import OrderedDict
+import threading
+from services.diff_engine import diff_texts
+from services.version_store import VersionStore
+from services.pagination import keyset_paginate
 
 class CollaborationService:
+    # Versions are immutable, so diffs are shared across service instances
+    _diff_cache = OrderedDict()
+    _diff_cache_lock = threading.Lock()
+    DIFF_CACHE_SIZE = 256
+
+    # Fields the paged list endpoints can project
+    COMMENT_FIELDS = ('id', 'content', 'user', 'created_at', 'resolved', 'parent_id')
+    VERSION_FIELDS = ('version', 'created_at', 'created_by', 'content')
+    DEFAULT_VERSION_FIELDS = ('version', 'created_at', 'created_by')
+
     def __init__(self, db: Session):
         self.db = db
+        self.version_store = VersionStore(db)
 
     def add_collaborator(self, contract_id: int, user_id: int, role: str = 'viewer') -> bool:
         """Add a collaborator to a contract."""
@@ -59,11 +75,29 @@ class CollaborationService:
 
     def get_comments(self, contract_id: int, include_resolved: bool = False) -> List[Comment]:
         """Get all comments for a contract."""
-        query = self.db.query(Comment).filter(Comment.contract_id == contract_id)
+        # Authors are serialized with every comment, so load them in the same query
+        query = self.db.query(Comment).options(joinedload(Comment.user)).filter(Comment.contract_id == contract_id)
         if not include_resolved:
             query = query.filter(Comment.resolved == False)
         return query.all()
 
+    def get_comments_page(self, contract_id: int, include_resolved: bool = False,
+                          fields: Sequence[str] = COMMENT_FIELDS, cursor: Optional[str] = None,
+                          limit: Optional[int] = None) -> Tuple[List[Comment], Optional[str]]:
+        """One page of comments, oldest first, loading only the requested fields."""
+        columns = [getattr(Comment, field) for field in fields if field != 'user']
+        options = []
+        if 'user' in fields:
+            columns.append(Comment.user_id)
+            options.append(joinedload(Comment.user).load_only(User.id, User.name))
+
+        query = self.db.query(Comment).options(load_only(Comment.id, *columns), *options).filter(
+            Comment.contract_id == contract_id
+        )
+        if not include_resolved:
+            query = query.filter(Comment.resolved == False)
+        return keyset_paginate(query, [(Comment.id, False)], cursor, limit)
+
     def create_version(self, contract_id: int, content: str,
                       created_by_id: int) -> ContractVersion:
         """Create a new version of a contract."""
@@ -73,11 +107,11 @@ class CollaborationService:
         new_version_num = contract.version + 1
         contract.version = new_version_num
         
-        # Create version record
-        version = ContractVersion(
+        # Create version record, stored as a snapshot or a delta from the previous version
+        version = self.version_store.add_version(
             contract_id=contract_id,
+            version_num=new_version_num,
             content=content,
-            version=new_version_num,
             created_by_id=created_by_id
         )
         
@@ -88,42 +122,83 @@ class CollaborationService:
         self.db.add(version)
         self.db.commit()
         self.db.refresh(version)
-        return version
+        return self.version_store.materialize(version)
 
     def get_version(self, contract_id: int, version_num: int) -> Optional[ContractVersion]:
         """Get a specific version of a contract."""
-        return self.db.query(ContractVersion).filter(
+        version = self.db.query(ContractVersion).options(undefer_group('body')).filter(
             ContractVersion.contract_id == contract_id,
             ContractVersion.version == version_num
         ).first()
+        return self.version_store.materialize(version)
 
     def list_versions(self, contract_id: int) -> List[ContractVersion]:
         """List all versions of a contract."""
-        return self.db.query(ContractVersion).filter(
+        versions = self.db.query(ContractVersion).options(
+            joinedload(ContractVersion.created_by),
+            undefer_group('body')
+        ).filter(
             ContractVersion.contract_id == contract_id
         ).order_by(ContractVersion.version.desc()).all()
+        return self.version_store.materialize_all(versions)
+
+    def list_versions_page(self, contract_id: int, fields: Sequence[str] = DEFAULT_VERSION_FIELDS,
+                           cursor: Optional[str] = None,
+                           limit: Optional[int] = None) -> Tuple[List[ContractVersion], Optional[str]]:
+        """One page of versions, newest first. Content is only loaded and rebuilt when requested."""
+        columns = [ContractVersion.id, ContractVersion.contract_id, ContractVersion.version]
+        options = []
+        if 'created_at' in fields:
+            columns.append(ContractVersion.created_at)
+        if 'created_by' in fields:
+            columns.append(ContractVersion.created_by_id)
+            options.append(joinedload(ContractVersion.created_by).load_only(User.id, User.name))
+        if 'content' in fields:
+            columns.append(ContractVersion.is_snapshot)
+            options.append(undefer_group('body'))
+
+        query = self.db.query(ContractVersion).options(load_only(*columns), *options).filter(
+            ContractVersion.contract_id == contract_id
+        )
+        versions, next_cursor = keyset_paginate(
+            query, [(ContractVersion.version, True), (ContractVersion.id, True)], cursor, limit
+        )
+        if 'content' in fields:
+            self.version_store.materialize_all(versions)
+        return versions, next_cursor
 
     def compare_versions(self, contract_id: int, version1: int,
-                        version2: int) -> dict:
+                        version2: int, granularity: str = 'word') -> dict:
         """Compare two versions of a contract."""
+        cache_key = (contract_id, version1, version2, granularity)
+        with self._diff_cache_lock:
+            cached = self._diff_cache.get(cache_key)
+            if cached is not None:
+                self._diff_cache.move_to_end(cache_key)
+                return cached
+
         v1 = self.get_version(contract_id, version1)
         v2 = self.get_version(contract_id, version2)
         
         if not v1 or not v2:
             return None
             
-        # TODO: Implement diff logic
-        return {
+        comparison = {
             'version1': {
                 'number': v1.version,
-                'content': v1.content,
                 'created_at': v1.created_at,
                 'created_by': v1.created_by_id
             },
             'version2': {
                 'number': v2.version,
-                'content': v2.content,
                 'created_at': v2.created_at,
                 'created_by': v2.created_by_id
-            }
+            },
+            'diff': diff_texts(v1.content, v2.content, granularity)
         }
+
+        with self._diff_cache_lock:
+            self._diff_cache[cache_key] = comparison
+            while len(self._diff_cache) > self.DIFF_CACHE_SIZE:
+                self._diff_cache.popitem(last=False)
+        return comparison
@@ -0,0 +1,189 @@
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Word tokens keep whitespace and punctuation as their own tokens so that the
+# tokens concatenate back to the original text and offsets stay exact.
+WORD_TOKEN = re.compile(r'\s+|\w+|[^\w\s]')
+# A clause runs up to and including its terminating punctuation or newline.
+CLAUSE_TOKEN = re.compile(r'[^.;:!?\n]*(?:[.;:!?]+\s*|\n+|$)')
+
+GRANULARITIES = ('word', 'clause')
+
+# Myers runs in O((N + M) * D). Past this many edited tokens the changed range
+# is reported as one delete plus one insert instead of being searched further.
+DIFF_MAX_EDIT_DISTANCE = int(os.getenv('DIFF_MAX_EDIT_DISTANCE', '2000'))
+
+def tokenize(text: str, granularity: str = 'word') -> Tuple[List[str], List[int]]:
+    """Split text into tokens and return them with their start offsets.
+
+    A final offset equal to len(text) is appended so token i spans
+    offsets[i]:offsets[i + 1].
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Unknown diff granularity: {granularity}")
+    pattern = WORD_TOKEN if granularity == 'word' else CLAUSE_TOKEN
+    tokens, offsets = [], []
+    for match in pattern.finditer(text):
+        if match.end() > match.start():
+            tokens.append(match.group())
+            offsets.append(match.start())
+    offsets.append(len(text))
+    return tokens, offsets
+
+def _middle_snake(a, a_lo, a_hi, b, b_lo, b_hi, max_d=None):
+    """Find the middle snake of the shortest edit script (Myers 1986, section 4b).
+
+    Returns (x_start, y_start, x_end, y_end) in absolute indices, or None when
+    the two searches have not met within max_d steps each. Only O(N + M)
+    memory is used for the forward and reverse frontier arrays.
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    delta = n - m
+    odd = delta & 1
+    full_d = (n + m + 1) // 2
+    max_d = full_d if max_d is None else min(max_d, full_d)
+    offset = max_d + 1
+    forward = [0] * (2 * max_d + 3)
+    reverse = [0] * (2 * max_d + 3)
+
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x_start, y_start = x, y
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            reverse_k = delta - k
+            if odd and -(d - 1) <= reverse_k <= d - 1 and x + reverse[offset + reverse_k] >= n:
+                return a_lo + x_start, b_lo + y_start, a_lo + x, b_lo + y
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and reverse[offset + k - 1] < reverse[offset + k + 1]):
+                x = reverse[offset + k + 1]
+            else:
+                x = reverse[offset + k - 1] + 1
+            y = x - k
+            x_start, y_start = x, y
+            while x < n and y < m and a[a_hi - 1 - x] == b[b_hi - 1 - y]:
+                x += 1
+                y += 1
+            reverse[offset + k] = x
+            forward_k = delta - k
+            if not odd and -d <= forward_k <= d and x + forward[offset + forward_k] >= n:
+                return a_hi - x, b_hi - y, a_hi - x_start, b_hi - y_start
+
+    if max_d < full_d:
+        return None
+    raise RuntimeError("No middle snake found")
+
+def _diff_range(a, a_lo, a_hi, b, b_lo, b_hi, ops, max_d=None):
+    # Common prefix and suffix never need the snake search
+    prefix_start = a_lo
+    while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+        a_lo += 1
+        b_lo += 1
+    if a_lo > prefix_start:
+        ops.append(('equal', prefix_start, a_lo, b_lo - (a_lo - prefix_start), b_lo))
+
+    suffix_end = a_hi
+    while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+        a_hi -= 1
+        b_hi -= 1
+    suffix = None
+    if a_hi < suffix_end:
+        suffix = ('equal', a_hi, suffix_end, b_hi, b_hi + (suffix_end - a_hi))
+
+    if a_lo == a_hi:
+        if b_lo < b_hi:
+            ops.append(('insert', a_lo, a_lo, b_lo, b_hi))
+    elif b_lo == b_hi:
+        ops.append(('delete', a_lo, a_hi, b_lo, b_lo))
+    else:
+        snake = _middle_snake(a, a_lo, a_hi, b, b_lo, b_hi, max_d)
+        if snake is None:
+            # Too far apart to search: replace the whole range
+            ops.append(('delete', a_lo, a_hi, b_lo, b_lo))
+            ops.append(('insert', a_hi, a_hi, b_lo, b_hi))
+        else:
+            x_start, y_start, x_end, y_end = snake
+            _diff_range(a, a_lo, x_start, b, b_lo, y_start, ops, max_d)
+            if x_end > x_start:
+                ops.append(('equal', x_start, x_end, y_start, y_end))
+            _diff_range(a, x_end, a_hi, b, y_end, b_hi, ops, max_d)
+
+    if suffix:
+        ops.append(suffix)
+
+def diff_sequences(a: List, b: List,
+                   max_edit_distance: Optional[int] = None) -> List[Tuple[str, int, int, int, int]]:
+    """Shortest edit script between two sequences as merged (tag, i1, i2, j1, j2) spans.
+
+    With max_edit_distance set, a range that needs more edits than that is
+    returned as a delete followed by an insert rather than a minimal script.
+    """
+    # Compare small ints instead of strings in the inner loops
+    ids = {}
+    a_ids = [ids.setdefault(token, len(ids)) for token in a]
+    b_ids = [ids.setdefault(token, len(ids)) for token in b]
+
+    # The middle snake is found after at most half of the edits
+    max_d = None if max_edit_distance is None else (max_edit_distance + 1) // 2
+    ops = []
+    _diff_range(a_ids, 0, len(a_ids), b_ids, 0, len(b_ids), ops, max_d)
+
+    merged = []
+    for op in ops:
+        if merged and merged[-1][0] == op[0]:
+            tag, i1, _, j1, _ = merged[-1]
+            merged[-1] = (tag, i1, op[2], j1, op[4])
+        else:
+            merged.append(op)
+    return merged
+
+def diff_texts(text1: str, text2: str, granularity: str = 'word',
+               max_edit_distance: Optional[int] = DIFF_MAX_EDIT_DISTANCE) -> Dict:
+    """Diff two texts and return compact opcodes with character offsets.
+
+    Each opcode is {'op', 'a_start', 'a_end', 'b_start', 'b_end'}; insert and
+    delete opcodes also carry the changed 'text', so clients never need the
+    full bodies. Texts further apart than max_edit_distance tokens come back
+    as a coarse replace.
+    """
+    tokens1, offsets1 = tokenize(text1, granularity)
+    tokens2, offsets2 = tokenize(text2, granularity)
+
+    opcodes = []
+    inserted = deleted = 0
+    for tag, i1, i2, j1, j2 in diff_sequences(tokens1, tokens2, max_edit_distance):
+        opcode = {
+            'op': tag,
+            'a_start': offsets1[i1],
+            'a_end': offsets1[i2],
+            'b_start': offsets2[j1],
+            'b_end': offsets2[j2]
+        }
+        if tag == 'insert':
+            opcode['text'] = text2[opcode['b_start']:opcode['b_end']]
+            inserted += j2 - j1
+        elif tag == 'delete':
+            opcode['text'] = text1[opcode['a_start']:opcode['a_end']]
+            deleted += i2 - i1
+        opcodes.append(opcode)
+
+    return {
+        'granularity': granularity,
+        'opcodes': opcodes,
+        'stats': {
+            'tokens_inserted': inserted,
+            'tokens_deleted': deleted,
+            'length1': len(text1),
+            'length2': len(text2)
+        }
+    }
@@ -0,0 +1,102 @@
+import threading
+import time
+from docusign_esign import ApiClient
+from docusign_esign.client.api_exception import ApiException
+
+class _TokenEntry:
+    def __init__(self, api_client):
+        self.api_client = api_client
+        self.access_token = None
+        self.expires_at = 0
+        self.lock = threading.Lock()
+
+class DocuSignTokenManager:
+    """Caches JWT access tokens and API clients per (integration key, user id).
+
+    The private key is read once and kept in memory. Tokens are refreshed
+    refresh_margin seconds before they expire; the per-entry lock makes
+    concurrent callers wait on a single refresh instead of each requesting a
+    token. Each entry keeps one ApiClient, so its pooled HTTP connections are
+    reused across envelope sends.
+    """
+
+    def __init__(self, host, oauth_host_name, private_key_path,
+                 expires_in=3600, refresh_margin=300):
+        self.host = host
+        self.oauth_host_name = oauth_host_name
+        self.private_key_path = private_key_path
+        self.expires_in = expires_in
+        self.refresh_margin = refresh_margin
+        self._private_key_bytes = None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _get_private_key(self):
+        if self._private_key_bytes is None:
+            print(f"Reading private key from: {self.private_key_path}")
+            with open(self.private_key_path, 'rb') as key_file:
+                self._private_key_bytes = key_file.read()
+        return self._private_key_bytes
+
+    def _get_entry(self, client_id, user_id):
+        key = (client_id, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                api_client = ApiClient()
+                api_client.host = self.host
+                entry = _TokenEntry(api_client)
+                self._entries[key] = entry
+            return entry
+
+    def _is_fresh(self, entry):
+        return entry.access_token and time.time() < entry.expires_at - self.refresh_margin
+
+    def get_api_client(self, client_id, user_id):
+        """Return an authenticated ApiClient, requesting a new token only when needed."""
+        entry = self._get_entry(client_id, user_id)
+        if self._is_fresh(entry):
+            return entry.api_client
+
+        with entry.lock:
+            # Another thread may have refreshed while we waited for the lock
+            if not self._is_fresh(entry):
+                self._refresh(entry, client_id, user_id)
+        return entry.api_client
+
+    def _refresh(self, entry, client_id, user_id):
+        print("Requesting JWT user token from DocuSign...")
+        print(f"Integration Key: {client_id}")
+        print(f"Auth Server: {self.oauth_host_name}")
+        requested_at = time.time()
+        response = entry.api_client.request_jwt_user_token(
+            client_id,
+            user_id,
+            self.oauth_host_name,
+            self._get_private_key(),
+            self.expires_in
+        )
+        expires_in = int(getattr(response, 'expires_in', None) or self.expires_in)
+        entry.api_client.set_default_header("Authorization", f"Bearer {response.access_token}")
+        entry.access_token = response.access_token
+        entry.expires_at = requested_at + expires_in
+        print("Successfully got access token from DocuSign")
+
+    def invalidate(self, client_id, user_id):
+        """Drop a cached token, e.g. after DocuSign rejects it with a 401."""
+        entry = self._get_entry(client_id, user_id)
+        with entry.lock:
+            entry.access_token = None
+            entry.expires_at = 0
+
+    def call(self, client_id, user_id, call):
+        """Run call(api_client), fetching a new token and retrying once if DocuSign answers 401."""
+        try:
+            return call(self.get_api_client(client_id, user_id))
+        except ApiException as e:
+            if e.status != 401:
+                raise
+            # Cached token was revoked early; fetch a new one and retry once
+            print("DocuSign rejected cached token, re-authenticating...")
+            self.invalidate(client_id, user_id)
+            return call(self.get_api_client(client_id, user_id))
@@ -0,0 +1,277 @@
+import base64
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from docusign_esign import (
+    CompositeTemplate, Document, EnvelopeDefinition, EnvelopeTemplate, InlineTemplate,
+    Recipients, ServerTemplate, SignHere, Signer, Tabs, Text
+)
+
+from pdf_renderer import create_pdf_from_text
+from services.signature_anchors import plan_anchors
+
+# Anchor strings sit on the text baseline; tabs are raised to sit on the signature line
+ANCHOR_SIGN_Y_OFFSET = int(os.getenv('DOCUSIGN_ANCHOR_SIGN_Y_OFFSET', '-20'))
+ANCHOR_FIELD_Y_OFFSET = int(os.getenv('DOCUSIGN_ANCHOR_FIELD_Y_OFFSET', '-12'))
+
+EMAIL_SUBJECT = "Please sign this document"
+# "[PROVIDER NAME]", "[START DATE]": the placeholders init_templates.py uses
+PLACEHOLDER = re.compile(r'\[([A-Z][A-Z0-9 _/-]*)\]')
+
+# A placeholder alone on its line ("[DETAILED DESCRIPTION OF SERVICES]") holds
+# a paragraph: the server template leaves this many lines for it
+BLOCK_PLACEHOLDER_LINES = int(os.getenv('DOCUSIGN_BLOCK_PLACEHOLDER_LINES', '6'))
+# Rendered line height and usable line width, in the points anchor offsets use
+LINE_HEIGHT = 28
+TEXT_WIDTH = 530
+INLINE_PLACEHOLDER_WIDTH = 200
+
+def _role(block_number: int) -> str:
+    return f"signer{block_number}"
+
+def _tab_specs(blocks: List[Dict]) -> List[Dict]:
+    """Keyword arguments for every tab of every block, minus the recipient."""
+    specs = []
+    for block in blocks:
+        anchored = {'document_id': "1", 'anchor_units': "pixels", 'anchor_string': block['sign']}
+        specs.append({
+            'sign_here': dict(anchored, anchor_x_offset="0", anchor_y_offset=str(ANCHOR_SIGN_Y_OFFSET),
+                              anchor_ignore_if_not_present="false"),
+            # Name sits above the signature, as with coordinate placement
+            'name': dict(anchored, anchor_x_offset="20", anchor_y_offset=str(ANCHOR_SIGN_Y_OFFSET - 30),
+                         anchor_ignore_if_not_present="false", font="helvetica", font_size="size11"),
+            'fields': [
+                dict(anchored, anchor_string=anchor, anchor_x_offset="0", anchor_y_offset=str(ANCHOR_FIELD_Y_OFFSET),
+                     anchor_ignore_if_not_present="true", font="helvetica", font_size="size11",
+                     tab_label=field.lower(), width=200)
+                for field, anchor in block['fields']
+            ]
+        })
+    return specs
+
+class EnvelopeBuilder:
+    """Builds envelope definitions, reusing each template's tab layout.
+
+    Contracts generated from the same Template have the same signature
+    blocks, so the located blocks (which may have cost an LLM call) and the
+    tab specifications derived from them are cached per template id. A
+    cached layout is only reused while its anchors are still found in the
+    contract text.
+
+    For templates registered as DocuSign server templates, build_composite()
+    references the stored template and sends only field values, with no
+    document in the request body.
+    """
+
+    def __init__(self, max_layouts: int = 256):
+        self.max_layouts = max_layouts
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+
+    def layout(self, contract_text: str, locate: Callable[[str], Optional[List[Dict]]],
+               template_id: Optional[int] = None,
+               positioning: str = 'detector') -> Tuple[List[Tuple[int, int, str]], List[Dict], List[Dict]]:
+        """Return (anchors, blocks, tab_specs) for a contract; anchors go to create_pdf_from_text.
+
+        positioning names the locate strategy ('detector' or 'ai'); layouts
+        found one way are never reused for sends that asked for the other.
+        """
+        key = (template_id, positioning)
+        cached = None
+        if template_id is not None:
+            with self._lock:
+                cached = self._layouts.get(key)
+                if cached is not None:
+                    self._layouts.move_to_end(key)
+
+        if cached is not None:
+            locations, cached_blocks, specs = cached
+            anchors, blocks = plan_anchors(contract_text, locations)
+            if blocks == cached_blocks:
+                return anchors, blocks, specs
+            print(f"Cached signature layout no longer matches template {template_id}, locating again")
+
+        locations = locate(contract_text) or []
+        anchors, blocks = plan_anchors(contract_text, locations)
+        specs = _tab_specs(blocks)
+        if template_id is not None and blocks:
+            with self._lock:
+                self._layouts[key] = (locations, blocks, specs)
+                self._layouts.move_to_end(key)
+                while len(self._layouts) > self.max_layouts:
+                    self._layouts.popitem(last=False)
+        return anchors, blocks, specs
+
+    def server_template(self, name: str, content: str,
+                        locate: Callable[[str], Optional[List[Dict]]]) -> Tuple[EnvelopeTemplate, List[str], int]:
+        """Template definition for registering content with DocuSign, the field labels it takes and its role count.
+
+        There is one signer role per signature block, so a composite send from
+        it needs exactly that many signers.
+
+        Placeholders become locked text tabs filled from field values at send
+        time, one value per label however often the placeholder repeats. A
+        placeholder on a line where a signature block already has a field
+        (the "[TITLE]" after "Title:") is left to the signer instead.
+        """
+        text, placeholder_anchors, slots = placeholder_layout(content)
+        anchors, blocks = plan_anchors(text, locate(text) or [])
+        if not blocks:
+            raise ValueError("No signature blocks found in template")
+        taken = {line_index for line_index, _, _ in anchors}
+        kept = [placement for placement in placeholder_anchors if placement[0] not in taken]
+        used = {anchor for _, _, anchor in kept}
+        slots = [slot for slot in slots if slot['anchor'] in used]
+        pdf_bytes = create_pdf_from_text(text, anchors + kept)
+        definition = _server_template_definition(name, pdf_bytes, _tab_specs(blocks), slots)
+        return definition, [slot['label'] for slot in slots], len(blocks)
+
+    def invalidate(self, template_id: int):
+        with self._lock:
+            for key in [key for key in self._layouts if key[0] == template_id]:
+                del self._layouts[key]
+
+    def _signers(self, signers: List[Dict], specs: List[Dict]) -> List[Signer]:
+        docusign_signers = []
+        for i, signer in enumerate(signers, 1):
+            print(f"Adding signer {i}: {signer['name']} ({signer['email']})")
+            spec = specs[min(i-1, len(specs)-1)]
+            recipient = {'recipient_id': str(i)}
+            docusign_signers.append(Signer(
+                email=signer['email'],
+                name=signer['name'],
+                recipient_id=str(i),
+                routing_order=str(i),
+                tabs=Tabs(
+                    sign_here_tabs=[SignHere(**spec['sign_here'], **recipient)],
+                    text_tabs=[Text(**spec['name'], **recipient, value=signer['name'])] +
+                              [Text(**field, **recipient) for field in spec['fields']]
+                )
+            ))
+        return docusign_signers
+
+    def build(self, signers: List[Dict], pdf_bytes: bytes, specs: List[Dict]) -> EnvelopeDefinition:
+        """Envelope with the PDF inline and tabs placed by its anchor strings."""
+        return EnvelopeDefinition(
+            email_subject=EMAIL_SUBJECT,
+            documents=[
+                Document(
+                    document_base64=base64.b64encode(pdf_bytes).decode('utf-8'),
+                    name="Contract.pdf",
+                    file_extension="pdf",
+                    document_id="1"
+                )
+            ],
+            recipients=Recipients(signers=self._signers(signers, specs)),
+            status="sent"
+        )
+
+    def build_composite(self, signers: List[Dict], server_template_id: str,
+                        field_values: Dict[str, str]) -> EnvelopeDefinition:
+        """Envelope from a registered server template; only recipients and field values are sent."""
+        field_tabs = [Text(tab_label=label, value=str(value)) for label, value in field_values.items()]
+        inline_signers = []
+        for i, signer in enumerate(signers, 1):
+            inline_signers.append(Signer(
+                email=signer['email'],
+                name=signer['name'],
+                role_name=_role(i),
+                recipient_id=str(i),
+                routing_order=str(i),
+                # Placeholder tabs belong to the first signer and are locked for everyone
+                tabs=Tabs(text_tabs=field_tabs) if i == 1 and field_tabs else None
+            ))
+        return EnvelopeDefinition(
+            email_subject=EMAIL_SUBJECT,
+            composite_templates=[
+                CompositeTemplate(
+                    composite_template_id="1",
+                    server_templates=[ServerTemplate(sequence="1", template_id=server_template_id)],
+                    inline_templates=[InlineTemplate(sequence="2", recipients=Recipients(signers=inline_signers))]
+                )
+            ],
+            status="sent"
+        )
+
+def placeholder_label(name: str) -> str:
+    """Tab label for a placeholder name: "PARTY A NAME" -> "PARTY_A_NAME"."""
+    return name.strip().replace(' ', '_')
+
+def fill_placeholders(content: str, field_values: Dict[str, str]) -> str:
+    """Content with each [PLACEHOLDER] that has a field value replaced by it, as a send fills the server template."""
+    def fill(match):
+        label = placeholder_label(match.group(1))
+        return str(field_values[label]) if label in field_values else match.group(0)
+    return PLACEHOLDER.sub(fill, content)
+
+def placeholder_layout(content: str) -> Tuple[str, List[Tuple[int, int, str]], List[Dict]]:
+    """Blank out [PLACEHOLDER]s for a server template render.
+
+    Returns (text, anchors, slots). Each placeholder becomes spaces of the
+    same width with an invisible anchor in its place; every occurrence of a
+    placeholder shares one anchor, and so one tab label and value. A
+    placeholder alone on its line is a block slot and gets
+    BLOCK_PLACEHOLDER_LINES lines of room. slots lists {'label', 'anchor',
+    'block'} once per label, in order of first appearance.
+    """
+    lines, anchors, slots = [], [], {}
+    for line in content.split('\n'):
+        block = PLACEHOLDER.fullmatch(line.strip()) is not None
+        for match in PLACEHOLDER.finditer(line):
+            label = placeholder_label(match.group(1))
+            slot = slots.get(label)
+            if slot is None:
+                digest = hashlib.sha1(label.encode('utf-8')).hexdigest()[:8]
+                slot = slots[label] = {'label': label, 'anchor': f"\\ph{digest}\\", 'block': False}
+            slot['block'] = slot['block'] or block
+            anchors.append((len(lines), match.start(), slot['anchor']))
+        lines.append(PLACEHOLDER.sub(lambda m: ' ' * len(m.group(0)), line))
+        if block:
+            lines.extend([''] * (BLOCK_PLACEHOLDER_LINES - 1))
+    return '\n'.join(lines), anchors, list(slots.values())
+
+def _server_template_definition(name: str, pdf_bytes: bytes, specs: List[Dict],
+                                slots: List[Dict]) -> EnvelopeTemplate:
+    """A DocuSign template with one role per signature block and a locked text tab per placeholder label.
+
+    A tab anchored on a string DocuSign finds several times is placed at each
+    occurrence, all showing the one value.
+    """
+    recipients = []
+    for i, spec in enumerate(specs, 1):
+        recipient = {'recipient_id': str(i)}
+        text_tabs = [Text(**field, **recipient) for field in spec['fields']]
+        if i == 1:
+            text_tabs += [
+                Text(document_id="1", recipient_id="1", anchor_string=slot['anchor'], anchor_units="pixels",
+                     anchor_x_offset="0", anchor_y_offset=str(ANCHOR_FIELD_Y_OFFSET),
+                     anchor_ignore_if_not_present="true", font="helvetica", font_size="size10",
+                     tab_label=slot['label'], locked="true",
+                     # Block slots wrap across the lines left for them instead of clipping to one
+                     width=TEXT_WIDTH if slot['block'] else INLINE_PLACEHOLDER_WIDTH,
+                     height=LINE_HEIGHT * BLOCK_PLACEHOLDER_LINES if slot['block'] else None)
+                for slot in slots
+            ]
+        recipients.append(Signer(
+            role_name=_role(i),
+            recipient_id=str(i),
+            routing_order=str(i),
+            tabs=Tabs(sign_here_tabs=[SignHere(**spec['sign_here'], **recipient)], text_tabs=text_tabs)
+        ))
+    return EnvelopeTemplate(
+        name=name,
+        email_subject=EMAIL_SUBJECT,
+        documents=[
+            Document(
+                document_base64=base64.b64encode(pdf_bytes).decode('utf-8'),
+                name=f"{name}.pdf",
+                file_extension="pdf",
+                document_id="1"
+            )
+        ],
+        recipients=Recipients(signers=recipients)
+    )
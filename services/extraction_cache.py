@@ -0,0 +1,140 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from pdf_processor import EXTRACTOR_VERSION
+
+class ExtractionCache:
+    """Content-addressed cache of extracted document text.
+
+    Entries are keyed by the SHA-256 of the uploaded bytes, the file extension
+    and the extractor version, so re-uploads of the same document skip parsing.
+    A bounded in-memory LRU sits in front of a size-bounded on-disk tier.
+    """
+
+    def __init__(self, cache_dir: str, max_memory_entries: int = 256,
+                 max_disk_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._disk_bytes = sum(
+            os.path.getsize(path) for path in self._disk_entries()
+        )
+
+    def make_key(self, file_bytes: bytes, filename: str) -> str:
+        """Build the cache key for an uploaded file."""
+        digest = hashlib.sha256(file_bytes).hexdigest()
+        extension = os.path.splitext(filename.lower())[1]
+        return f"{digest}-{extension.lstrip('.')}-v{EXTRACTOR_VERSION}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached text for a key, or None on a miss."""
+        with self._lock:
+            text = self._memory.get(key)
+            if text is not None:
+                self._memory.move_to_end(key)
+                return text
+
+        path = self._path_for(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                text = file.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Failed to read extraction cache entry {key}: {str(e)}")
+            return None
+
+        # Touch the file so disk eviction is least-recently-used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self._remember(key, text)
+        return text
+
+    def put(self, key: str, text: str):
+        """Store extracted text in both tiers."""
+        self._remember(key, text)
+
+        path = self._path_for(key)
+        data = text.encode('utf-8')
+        if len(data) > self.max_disk_bytes:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as file:
+                file.write(data)
+            try:
+                replaced_bytes = os.path.getsize(path)
+            except FileNotFoundError:
+                replaced_bytes = 0
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Failed to write extraction cache entry {key}: {str(e)}")
+            return
+
+        with self._lock:
+            # An overwritten entry gives its old size back
+            self._disk_bytes += len(data) - replaced_bytes
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def get_or_extract(self, file_bytes: bytes, filename: str,
+                       extract: Callable[[bytes, str], Optional[str]]) -> Optional[str]:
+        """Return cached text for a file, extracting and caching it on a miss."""
+        key = self.make_key(file_bytes, filename)
+        text = self.get(key)
+        if text is not None:
+            return text
+
+        text = extract(file_bytes, filename)
+        if text is not None:
+            self.put(key, text)
+        return text
+
+    def _remember(self, key: str, text: str):
+        with self._lock:
+            self._memory[key] = text
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def _path_for(self, key: str) -> str:
+        # Shard by hash prefix to keep directories small
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def _disk_entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.txt'):
+                    yield os.path.join(root, name)
+
+    def _evict_disk(self):
+        """Remove least recently used files until under the size bound."""
+        entries = []
+        for path in self._disk_entries():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        target = int(self.max_disk_bytes * 0.9)
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+        self._disk_bytes = total
@@ -1,7 +1,7 @@
 import os
 import magic
 from docx import Document
-from PyPDF2 import PdfReader
+from pdf_processor import iter_pdf_pages
 import logging
 from werkzeug.utils import secure_filename
 
@@ -54,10 +54,9 @@ class FileService:
     def _extract_from_pdf(self, file_path):
         """Extract text from PDF"""
         try:
-            reader = PdfReader(file_path)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+            with open(file_path, 'rb') as file:
+                file_bytes = file.read()
+            text = "\n".join(page_text for _, page_text in iter_pdf_pages(file_bytes))
             return text.strip()
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
@@ -0,0 +1,255 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Dict, Optional
+
+FINISHED_STATUSES = ('succeeded', 'failed')
+
+class SQLiteJobStore:
+    """Persistent job table in its own SQLite file, so no Redis is needed."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_created ON jobs (status, created_at)")
+            # Job files created before leases existed lack the owner columns
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'worker_id' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN worker_id TEXT")
+            if 'heartbeat_at' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+
+    def _connect(self):
+        # Autocommit mode; claim() issues its own BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, job_type: str, payload: Dict) -> str:
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, type, payload, status, created_at) VALUES (?, ?, ?, 'queued', ?)",
+                (job_id, job_type, json.dumps(payload), time.time())
+            )
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[sqlite3.Row]:
+        """Atomically take the oldest runnable job for worker_id and return it.
+
+        Runnable means queued, or running under a lease its owner has stopped
+        renewing (the owning process crashed or was killed). Jobs held by a
+        live process are never taken, however long they run.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            row = conn.execute(
+                """SELECT id, type, payload, status FROM jobs
+                   WHERE status = 'queued' OR (status = 'running' AND COALESCE(heartbeat_at, 0) < ?)
+                   ORDER BY created_at LIMIT 1""",
+                (now - lease_seconds,)
+            ).fetchone()
+            if row:
+                if row['status'] == 'running':
+                    print(f"Reclaiming job {row['id']} from a worker whose lease expired")
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, worker_id = ?, heartbeat_at = ? WHERE id = ?",
+                    (now, worker_id, now, row['id'])
+                )
+            conn.execute("COMMIT")
+            return row
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def heartbeat(self, worker_id: str):
+        """Renew the lease on every job worker_id is running."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE worker_id = ? AND status = 'running'",
+                (time.time(), worker_id)
+            )
+
+    def finish(self, job_id: str, worker_id: str, result=None, error: Optional[str] = None):
+        """Record the outcome, unless the job was reclaimed by another worker meanwhile."""
+        status = 'failed' if error is not None else 'succeeded'
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND worker_id = ?",
+                (status, json.dumps(result) if error is None else None, error, time.time(), job_id, worker_id)
+            )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        return {
+            'id': row['id'],
+            'type': row['type'],
+            'status': row['status'],
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'started_at': row['started_at'],
+            'finished_at': row['finished_at']
+        }
+
+    def purge_finished(self, older_than_seconds: float):
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?",
+                (time.time() - older_than_seconds,)
+            )
+
+def _run_job(handler, payload, job_context, context):
+    """Call a handler with its payload, inside job_context(context) when the job has one."""
+    if job_context is None or not context:
+        return handler(**payload)
+    with job_context(context):
+        return handler(**payload)
+
+class JobQueue:
+    """Runs queued jobs on a thread or process pool.
+
+    Handlers are looked up by job type and called with the job payload as
+    keyword arguments; their return value must be JSON serializable. In
+    process mode handlers must be importable module-level functions.
+
+    Each queue owns the jobs it claims under a lease that a heartbeat thread
+    renews, so several processes can share one job file: a job is only
+    picked up again once its owner has stopped renewing the lease.
+
+    A job may be submitted with a context (e.g. the submitting session's
+    API keys); job_context(context) is entered around the handler call. The
+    context stays in this process's memory and is never written to the job
+    file, so a job run by another process, or after a restart, runs without it.
+    """
+
+    def __init__(self, store: SQLiteJobStore, handlers: Dict[str, Callable],
+                 worker_type: str = 'thread', max_workers: int = 4,
+                 poll_interval: float = 1.0, retention_seconds: float = 86400,
+                 lease_seconds: float = 60, job_context: Optional[Callable] = None):
+        if worker_type not in ('thread', 'process'):
+            raise ValueError(f"Unknown worker type: {worker_type}")
+        self.store = store
+        self.handlers = handlers
+        self.worker_type = worker_type
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.retention_seconds = retention_seconds
+        self.lease_seconds = lease_seconds
+        self.job_context = job_context
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # job id -> (context, submitted at)
+        self._contexts = {}
+        self._contexts_lock = threading.Lock()
+        self._slots = threading.Semaphore(max_workers)
+        self._wakeup = threading.Event()
+        self._executor = None
+        self._dispatcher = None
+
+    def start(self):
+        if self._dispatcher is not None:
+            return
+        self.store.purge_finished(self.retention_seconds)
+        if self.worker_type == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='job')
+        threading.Thread(target=self._heartbeat_loop, name='job-heartbeat', daemon=True).start()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True)
+        self._dispatcher.start()
+
+    def submit(self, job_type: str, payload: Dict, context: Optional[Dict] = None) -> str:
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+        with self._contexts_lock:
+            # Held across enqueue so the dispatcher cannot claim the job before its context is stored
+            job_id = self.store.enqueue(job_type, payload)
+            if context:
+                self._contexts[job_id] = (context, time.time())
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.store.get(job_id)
+
+    def _heartbeat_loop(self):
+        # Runs apart from the dispatcher, which blocks while every slot is busy
+        while True:
+            time.sleep(self.lease_seconds / 4)
+            try:
+                self.store.heartbeat(self.worker_id)
+            except Exception as e:
+                print(f"Failed to renew job leases: {str(e)}")
+            # Contexts of jobs another process picked up are never claimed here
+            cutoff = time.time() - self.retention_seconds
+            with self._contexts_lock:
+                for job_id in [job_id for job_id, (_, at) in self._contexts.items() if at < cutoff]:
+                    del self._contexts[job_id]
+
+    def _dispatch_loop(self):
+        while True:
+            self._slots.acquire()
+            try:
+                job = self.store.claim(self.worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"Failed to claim job: {str(e)}")
+                job = None
+            if not job:
+                self._slots.release()
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            print(f"Starting job {job['id']} ({job['type']})")
+            with self._contexts_lock:
+                context, _ = self._contexts.pop(job['id'], (None, None))
+            handler = self.handlers.get(job['type'])
+            if handler is None:
+                self.store.finish(job['id'], self.worker_id, error=f"Unknown job type: {job['type']}")
+                self._slots.release()
+                continue
+            future = self._executor.submit(_run_job, handler, json.loads(job['payload']), self.job_context, context)
+            future.add_done_callback(lambda f, job_id=job['id']: self._on_done(job_id, f))
+
+    def _on_done(self, job_id, future):
+        try:
+            error = None
+            try:
+                result = future.result()
+            except Exception as e:
+                result = None
+                error = str(e) or type(e).__name__
+                print(f"Job {job_id} failed: {error}")
+                print(''.join(traceback.format_exception(type(e), e, e.__traceback__)))
+            try:
+                self.store.finish(job_id, self.worker_id, result=result, error=error)
+            except (TypeError, ValueError) as e:
+                self.store.finish(job_id, self.worker_id, error=f"Job result is not JSON serializable: {str(e)}")
+        finally:
+            self._slots.release()
@@ -0,0 +1,71 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+def _trie_pattern(node: Dict) -> str:
+    """Regex for a character trie. Optional tails are greedy, so longer keywords win."""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        # A keyword ends here but longer ones continue
+        return '(?:' + body + ')?'
+    return body
+
+class KeywordMatcher:
+    """Finds every occurrence of many keywords in one scan of the text.
+
+    The keywords are merged into a single trie-shaped regex, so at each
+    position the engine follows one trie path instead of trying every keyword;
+    cost grows with text length, not with text length times keyword count.
+    Matching runs inside a lookahead, which reports overlapping keywords, and
+    shorter keywords that are prefixes of a longer match are reported with it.
+    """
+
+    def __init__(self, keywords: Iterable[str], whole_words: bool = False, ignore_case: bool = True):
+        self.ignore_case = ignore_case
+        self.keywords = []
+        trie = {}
+        for keyword in keywords:
+            key = keyword.lower() if ignore_case else keyword
+            if not key or key in self.keywords:
+                continue
+            self.keywords.append(key)
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+        # Keywords that are a prefix of another keyword are hidden by the
+        # greedy match at the same start, so report them alongside it
+        self._prefixes = {}
+        for key in self.keywords:
+            self._prefixes[key] = [
+                other for other in self.keywords
+                if other != key and key.startswith(other)
+                and (not whole_words or not (key[len(other)].isalnum() or key[len(other)] == '_'))
+            ]
+
+        pattern = _trie_pattern(trie) if self.keywords else r'(?!x)x'
+        if whole_words:
+            pattern = r'(?<!\w)(?=(' + pattern + r')(?!\w))'
+        else:
+            pattern = r'(?=(' + pattern + r'))'
+        self.regex = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+    def finditer(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """Yield (keyword, start, end) for every occurrence, in order of start offset."""
+        for match in self.regex.finditer(text):
+            found = match.group(1)
+            key = found.lower() if self.ignore_case else found
+            start = match.start(1)
+            yield key, start, match.end(1)
+            for prefix in self._prefixes.get(key, ()):
+                yield prefix, start, start + len(prefix)
+
+    def found(self, text: str) -> Set[str]:
+        """The set of keywords that occur anywhere in text."""
+        return {key for key, _, _ in self.finditer(text)}
+
+    def find_all(self, text: str) -> List[Tuple[str, int, int]]:
+        return list(self.finditer(text))
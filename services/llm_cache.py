@@ -0,0 +1,147 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterator, List, Dict, Optional
+
+class MemoryCacheBackend:
+    """In-process LRU store with per-entry expiry.
+
+    Any object exposing the same get/set methods (e.g. a Redis wrapper) can be
+    passed to LLMResponseCache instead.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class _InFlightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class LLMResponseCache:
+    """Caches chat completion text and coalesces identical concurrent requests."""
+
+    def __init__(self, backend=None, ttl: int = 3600):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def client_identity(client) -> str:
+        """Hash of the credentials a client calls with, so users never share cached completions."""
+        api_key = getattr(client, 'api_key', None) or ''
+        base_url = str(getattr(client, 'base_url', None) or '')
+        return hashlib.sha256(f"{base_url}\n{api_key}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict[str, str]], temperature: float,
+                 max_tokens: Optional[int], identity: str = '') -> str:
+        """Hash everything that influences the completion, and who asked for it, into a cache key."""
+        payload = json.dumps({
+            'identity': identity,
+            'model': model,
+            'messages': messages,
+            'temperature': temperature,
+            'max_tokens': max_tokens
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_or_call(self, key: str, call: Callable[[], str]) -> str:
+        """Return the cached value for key, or run call once for all waiters."""
+        cached = self.backend.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            inflight = self._inflight.get(key)
+            leader = inflight is None
+            if leader:
+                inflight = _InFlightCall()
+                self._inflight[key] = inflight
+
+        if not leader:
+            inflight.done.wait()
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.result
+
+        try:
+            inflight.result = call()
+            self.backend.set(key, inflight.result, self.ttl)
+            return inflight.result
+        except Exception as e:
+            inflight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            inflight.done.set()
+
+    def chat_completion(self, client, model: str, messages: List[Dict[str, str]],
+                        temperature: float = 0.7, max_tokens: Optional[int] = None) -> str:
+        """Cached equivalent of client.chat.completions.create returning the message text."""
+        key = self.make_key(model, messages, temperature, max_tokens, self.client_identity(client))
+
+        def call():
+            kwargs = {'model': model, 'messages': messages, 'temperature': temperature}
+            if max_tokens is not None:
+                kwargs['max_tokens'] = max_tokens
+            response = client.chat.completions.create(**kwargs)
+            return response.choices[0].message.content
+
+        return self.get_or_call(key, call)
+
+    def stream_chat_completion(self, client, model: str, messages: List[Dict[str, str]],
+                               temperature: float = 0.7,
+                               max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Yield completion text deltas as they arrive.
+
+        A cached response is yielded in one piece. A fully streamed response is
+        stored so later streaming or non-streaming calls are served from cache.
+        """
+        key = self.make_key(model, messages, temperature, max_tokens, self.client_identity(client))
+        cached = self.backend.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        kwargs = {'model': model, 'messages': messages, 'temperature': temperature,
+                  'stream': True}
+        if max_tokens is not None:
+            kwargs['max_tokens'] = max_tokens
+
+        parts = []
+        for chunk in client.chat.completions.create(**kwargs):
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                parts.append(delta)
+                yield delta
+
+        self.backend.set(key, ''.join(parts), self.ttl)
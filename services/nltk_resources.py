@@ -0,0 +1,110 @@
+import os
+import re
+import threading
+from typing import FrozenSet, List
+
+import nltk
+
+# Local directory searched before NLTK's default locations
+NLTK_DATA_DIR = os.getenv('NLTK_DATA_DIR')
+# Fetch missing resources into NLTK_DATA_DIR on first use; off so air-gapped hosts never touch the network
+NLTK_AUTO_DOWNLOAD = os.getenv('NLTK_AUTO_DOWNLOAD', 'false').lower() == 'true'
+# Texts at least this long go straight to the regex splitter instead of punkt
+REGEX_SPLIT_MIN_CHARS = int(os.getenv('NLTK_REGEX_SPLIT_MIN_CHARS', '200000'))
+
+if NLTK_DATA_DIR and NLTK_DATA_DIR not in nltk.data.path:
+    nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+# Abbreviations common in contracts that end in a period without ending a sentence
+ABBREVIATIONS = ['inc', 'ltd', 'co', 'corp', 'llc', 'no', 'nos', 'art', 'sec', 'para',
+                 'mr', 'mrs', 'ms', 'dr', 'st', 'vs', 'e.g', 'i.e', 'u.s', '[a-z]']
+SENTENCE_BOUNDARY = re.compile(
+    ''.join(rf'(?<!\b(?i:{abbreviation})\.)' for abbreviation in ABBREVIATIONS) +
+    r'''(?:(?<=[.!?])|(?<=[.!?]["')\]]))\s+(?=["'(\[]?[A-Z0-9])'''
+)
+
+def split_sentences_regex(text: str) -> List[str]:
+    """Split on sentence-final punctuation followed by a capitalized word.
+
+    Linear time and no model to load; close to punkt on contract prose, and
+    the fast path for very large documents.
+    """
+    return [sentence for sentence in (piece.strip() for piece in SENTENCE_BOUNDARY.split(text)) if sentence]
+
+class NLTKResources:
+    """NLTK models loaded on first use and shared by everything in the process.
+
+    Nothing is loaded at import. Call preload() before forking worker
+    processes so the children inherit the loaded models instead of each
+    loading them again. When a resource is missing and auto-download is off,
+    sentence splitting falls back to split_sentences_regex and the stopword
+    set is empty.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._punkt_available = None
+        self._stop_words = None
+
+    def _find(self, resources: List[str]) -> bool:
+        for resource in resources:
+            try:
+                nltk.data.find(resource)
+                return True
+            except LookupError:
+                pass
+        return False
+
+    def _ensure(self, resources: List[str], packages: List[str]) -> bool:
+        """True if any of resources is installed, downloading packages first if allowed."""
+        if self._find(resources):
+            return True
+        if NLTK_AUTO_DOWNLOAD:
+            for package in packages:
+                nltk.download(package, download_dir=NLTK_DATA_DIR, quiet=True)
+            if self._find(resources):
+                return True
+        print(f"NLTK resource {resources[0]} not found in {nltk.data.path}")
+        return False
+
+    def _load_punkt(self) -> bool:
+        if self._punkt_available is None:
+            with self._lock:
+                if self._punkt_available is None:
+                    # nltk 3.8.1 ships punkt pickles; later releases read punkt_tab
+                    available = self._ensure(['tokenizers/punkt', 'tokenizers/punkt_tab'], ['punkt', 'punkt_tab'])
+                    if available:
+                        try:
+                            # Loads and caches the model inside nltk
+                            nltk.sent_tokenize('Warm up.')
+                        except LookupError as e:
+                            print(f"Failed to load punkt: {str(e)}")
+                            available = False
+                    if not available:
+                        print("Using the regex sentence splitter")
+                    self._punkt_available = available
+        return self._punkt_available
+
+    def sent_tokenize(self, text: str) -> List[str]:
+        """Split text into sentences, with punkt when available and the text is not huge."""
+        if len(text) >= REGEX_SPLIT_MIN_CHARS or not self._load_punkt():
+            return split_sentences_regex(text)
+        return nltk.sent_tokenize(text)
+
+    def stop_words(self) -> FrozenSet[str]:
+        if self._stop_words is None:
+            with self._lock:
+                if self._stop_words is None:
+                    words = frozenset()
+                    if self._ensure(['corpora/stopwords'], ['stopwords']):
+                        from nltk.corpus import stopwords
+                        words = frozenset(stopwords.words('english'))
+                    self._stop_words = words
+        return self._stop_words
+
+    def preload(self):
+        """Load everything now, e.g. in the parent before process workers fork."""
+        self._load_punkt()
+        self.stop_words()
+
+nltk_resources = NLTKResources()
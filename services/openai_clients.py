@@ -0,0 +1,34 @@
+import threading
+from collections import OrderedDict
+from openai import OpenAI
+
+class OpenAIClientRegistry:
+    """One pooled OpenAI client per distinct API key, reused across requests.
+
+    Building an OpenAI client creates a new HTTP connection pool, so clients
+    are kept in an LRU keyed by API key (the environment key plus any keys
+    users supply in their session). Evicted clients are not closed explicitly
+    because a request may still hold them; their pool is released once the
+    last reference goes away.
+    """
+
+    def __init__(self, max_clients: int = 32):
+        self.max_clients = max_clients
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, api_key: str) -> OpenAI:
+        if not api_key:
+            raise ValueError("OpenAI API key not found in environment variables")
+
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is not None:
+                self._clients.move_to_end(api_key)
+                return client
+
+            client = OpenAI(api_key=api_key)
+            self._clients[api_key] = client
+            while len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+            return client
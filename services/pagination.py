@@ -0,0 +1,78 @@
+import base64
+import json
+import os
+from typing import List, Optional, Sequence, Tuple
+from sqlalchemy import and_, or_
+
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '500'))
+
+class PaginationError(ValueError):
+    """Raised for malformed cursor, limit or fields parameters."""
+
+def encode_cursor(values: Sequence) -> str:
+    raw = json.dumps(list(values), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str, size: int) -> List:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise PaginationError("Invalid cursor")
+    return values
+
+def parse_limit(raw: Optional[str]) -> Optional[int]:
+    """Page size from a limit= parameter; None when absent, meaning the whole list."""
+    if raw is None or raw == '':
+        return None
+    try:
+        limit = int(raw)
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be at least 1")
+    return min(limit, MAX_PAGE_SIZE)
+
+def parse_fields(raw: Optional[str], allowed: Sequence[str],
+                 default: Optional[Sequence[str]] = None) -> List[str]:
+    """Split a comma-separated fields= parameter, defaulting to every allowed field."""
+    if not raw:
+        return list(default if default is not None else allowed)
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise PaginationError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed)}")
+    return fields
+
+def keyset_paginate(query, order_by: Sequence[Tuple], cursor: Optional[str] = None,
+                    limit: Optional[int] = None) -> Tuple[List, Optional[str]]:
+    """Return one page of query and the cursor for the next page.
+
+    order_by is a list of (column, descending) pairs whose values are unique
+    together, so the order is stable. The cursor holds the sort key of the
+    last row returned, and the next page starts strictly after it. Without a
+    limit every remaining row is returned and there is no next cursor.
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(order_by))
+        # (a, b) after (x, y) means a > x OR (a = x AND b > y), flipped for descending columns
+        clauses = []
+        for i, (column, descending) in enumerate(order_by):
+            equal = [col == value for (col, _), value in zip(order_by[:i], values[:i])]
+            beyond = column < values[i] if descending else column > values[i]
+            clauses.append(and_(*equal, beyond))
+        query = query.filter(or_(*clauses))
+
+    ordering = [column.desc() if descending else column.asc() for column, descending in order_by]
+    query = query.order_by(*ordering)
+    if limit is None:
+        return query.all(), None
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column, _ in order_by])
+    return rows, next_cursor
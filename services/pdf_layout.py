@@ -0,0 +1,84 @@
+import io
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import pdfplumber
+
+# Phrases up to this many words are looked up directly; longer ones start
+# from the index entry for their first MAX_NGRAM words
+MAX_NGRAM = 3
+
+_EDGE_PUNCTUATION = re.compile(r'^[^\w]+|[^\w]+$')
+
+def normalize_word(word: str) -> str:
+    """Lowercase and trim surrounding punctuation, so "Signature:" matches "signature"."""
+    lowered = word.lower()
+    return _EDGE_PUNCTUATION.sub('', lowered) or lowered
+
+class PDFLayoutIndex:
+    """Word positions for one PDF, parsed once from in-memory bytes.
+
+    Every 1..MAX_NGRAM word sequence maps to the indices where it starts, so a
+    phrase lookup costs one dict probe plus a check of the remaining words.
+    Build one per document and reuse it for every lookup on that document.
+    Positions are in points from the top-left of the page, as DocuSign expects.
+    """
+
+    def __init__(self, pdf_bytes: bytes):
+        # (normalized text, raw text, page number, x0, top, x1, bottom)
+        self.words: List[Tuple[str, str, int, float, float, float, float]] = []
+        with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+            for page_number, page in enumerate(pdf.pages, 1):
+                for word in page.extract_words(x_tolerance=3, y_tolerance=3):
+                    self.words.append((normalize_word(word['text']), word['text'], page_number,
+                                       word['x0'], word['top'], word['x1'], word['bottom']))
+
+        self._ngrams: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+        tokens = [word[0] for word in self.words]
+        for start in range(len(tokens)):
+            for n in range(1, MAX_NGRAM + 1):
+                if start + n > len(tokens):
+                    break
+                self._ngrams[tuple(tokens[start:start + n])].append(start)
+
+    def find(self, phrase: str) -> Optional[Dict]:
+        """Position of the first occurrence of phrase, or None.
+
+        Single words that are not found whole fall back to matching inside a
+        word, as the previous per-word substring search did.
+        """
+        tokens = [normalize_word(word) for word in phrase.split()]
+        if not tokens:
+            return None
+
+        for start in self._ngrams.get(tuple(tokens[:MAX_NGRAM]), ()):
+            end = start + len(tokens)
+            if end <= len(self.words) and all(
+                self.words[start + i][0] == token for i, token in enumerate(tokens[MAX_NGRAM:], MAX_NGRAM)
+            ):
+                return self._box(start, end)
+
+        if len(tokens) == 1:
+            needle = phrase.strip().lower()
+            for i, word in enumerate(self.words):
+                if needle in word[1].lower():
+                    return self._box(i, i + 1)
+        return None
+
+    def _box(self, start: int, end: int) -> Dict:
+        """Bounding box of words[start:end] on the page where the phrase starts."""
+        page = self.words[start][2]
+        span = [word for word in self.words[start:end] if word[2] == page]
+        x0 = min(word[3] for word in span)
+        x1 = max(word[5] for word in span)
+        top = min(word[4] for word in span)
+        first = self.words[start]
+        return {
+            'page': page,
+            'page_number': page,
+            'x': first[3],
+            'y': first[6],  # Bottom edge of the first word
+            'width': x1 - x0,
+            'height': max(word[6] for word in span) - top
+        }
@@ -1,85 +1,158 @@
+import copy
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from services.keyword_matcher import KeywordMatcher
+
+DEFAULT_POLICY_RULES = {
+    'required_clauses': [
+        'confidentiality',
+        'termination',
+        'liability',
+        'governing_law'
+    ],
+    'forbidden_terms': [
+        'unlimited liability',
+        'perpetual term',
+        'automatic renewal'
+    ],
+    'approval_thresholds': {
+        'contract_value': 100000,  # Contracts above this value need additional approval
+        'term_length': 36  # Months
+    }
+}
+
+# Portfolios smaller than this are checked in-process
+PARALLEL_MIN_CONTRACTS = int(os.getenv('POLICY_PARALLEL_MIN_CONTRACTS', '32'))
+POLICY_WORKERS = int(os.getenv('POLICY_WORKERS', '0')) or None
+
+MONEY = re.compile(
+    r'(?:\$|USD\s?|US\$)\s?((?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)\s*(million|thousand|m|k)?\b',
+    re.IGNORECASE
+)
+MONEY_MULTIPLIERS = {'million': 1000000, 'm': 1000000, 'thousand': 1000, 'k': 1000}
+# "a term of 48 months", "initial term of three (3) years"
+TERM_LENGTH = re.compile(
+    r'\bterm\b[^.;]{0,60}?\b(?:[a-z-]+\s+)?\(?(\d{1,3})\)?\s*(months?|years?)\b',
+    re.IGNORECASE
+)
+
+def _rule_phrase(rule: str) -> str:
+    # Rule names such as governing_law match the words as written in contracts
+    return rule.replace('_', ' ').lower()
+
 class PolicyService:
-    def __init__(self):
-        self.policy_rules = {
-            'required_clauses': [
-                'confidentiality',
-                'termination',
-                'liability',
-                'governing_law'
-            ],
-            'forbidden_terms': [
-                'unlimited liability',
-                'perpetual term',
-                'automatic renewal'
-            ],
-            'approval_thresholds': {
-                'contract_value': 100000,  # Contracts above this value need additional approval
-                'term_length': 36  # Months
-            }
-        }
-    
+    """Checks contracts against organization policy rules.
+
+    All required clauses and forbidden terms are compiled once into a single
+    KeywordMatcher, so each contract is scanned once no matter how many rules
+    there are.
+    """
+
+    def __init__(self, policy_rules: Optional[Dict] = None):
+        self.policy_rules = copy.deepcopy(policy_rules or DEFAULT_POLICY_RULES)
+        self.matcher = KeywordMatcher(
+            [_rule_phrase(rule) for rule in self.policy_rules['required_clauses']] +
+            [_rule_phrase(term) for term in self.policy_rules['forbidden_terms']]
+        )
+
     def check_compliance(self, contract_analysis):
         """Check if contract complies with organization policies"""
+        # Terms are kept on separate lines so phrases never match across two of them
+        return self.check_text('\n'.join(contract_analysis['key_terms']))
+
+    def check_text(self, contract_text: str) -> Dict:
+        """Check raw contract text, reporting where each rule matched."""
         compliance_report = {
             'compliant': True,
             'violations': [],
             'warnings': [],
-            'required_approvals': []
+            'required_approvals': [],
+            'matches': []
         }
-        
+
+        found = set()
+        for phrase, start, end in self.matcher.finditer(contract_text):
+            found.add(phrase)
+            compliance_report['matches'].append({'term': phrase, 'start': start, 'end': end})
+
         # Check for required clauses
         for clause in self.policy_rules['required_clauses']:
-            if not self._has_required_clause(contract_analysis, clause):
+            if _rule_phrase(clause) not in found:
                 compliance_report['violations'].append(
                     f"Missing required clause: {clause}"
                 )
                 compliance_report['compliant'] = False
-        
+
         # Check for forbidden terms
         for term in self.policy_rules['forbidden_terms']:
-            if self._has_forbidden_term(contract_analysis, term):
+            if _rule_phrase(term) in found:
                 compliance_report['violations'].append(
                     f"Contains forbidden term: {term}"
                 )
                 compliance_report['compliant'] = False
-        
+
         # Check approval thresholds
-        required_approvals = self._check_approval_requirements(contract_analysis)
+        required_approvals = self._check_approval_requirements(contract_text)
         if required_approvals:
             compliance_report['required_approvals'] = required_approvals
-        
+
         return compliance_report
-    
-    def _has_required_clause(self, analysis, clause):
-        """Check if contract contains required clause"""
-        # This could be made more sophisticated with NLP
-        key_terms = [term.lower() for term in analysis['key_terms']]
-        return any(clause in term for term in key_terms)
-    
-    def _has_forbidden_term(self, analysis, term):
-        """Check if contract contains forbidden terms"""
-        contract_text = ' '.join(analysis['key_terms']).lower()
-        return term.lower() in contract_text
-    
-    def _check_approval_requirements(self, analysis):
+
+    def check_portfolio(self, contracts: Iterable[Tuple[str, str]],
+                        max_workers: Optional[int] = None) -> Dict[str, Dict]:
+        """Check many (contract_id, text) pairs, fanning out to a process pool for large batches."""
+        contracts = list(contracts)
+        max_workers = max_workers or POLICY_WORKERS or os.cpu_count() or 1
+        if len(contracts) < PARALLEL_MIN_CONTRACTS or max_workers <= 1:
+            return {contract_id: self.check_text(text) for contract_id, text in contracts}
+
+        chunksize = max(1, len(contracts) // (max_workers * 4))
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(contracts)),
+                                 initializer=_init_policy_worker,
+                                 initargs=(self.policy_rules,)) as executor:
+            reports = executor.map(_check_in_worker, (text for _, text in contracts), chunksize=chunksize)
+            return {contract_id: report for (contract_id, _), report in zip(contracts, reports)}
+
+    def _check_approval_requirements(self, contract_text):
         """Determine what approvals are needed based on contract terms"""
         required_approvals = []
-        
-        # Example checks
-        if self._get_contract_value(analysis) > self.policy_rules['approval_thresholds']['contract_value']:
+
+        if self._get_contract_value(contract_text) > self.policy_rules['approval_thresholds']['contract_value']:
             required_approvals.append('finance_approval')
-        
-        if self._get_term_length(analysis) > self.policy_rules['approval_thresholds']['term_length']:
+
+        if self._get_term_length(contract_text) > self.policy_rules['approval_thresholds']['term_length']:
             required_approvals.append('legal_approval')
-        
+
         return required_approvals
-    
-    def _get_contract_value(self, analysis):
-        """Extract contract value from analysis"""
-        # This would need to be implemented based on your specific needs
-        return 0
-    
-    def _get_term_length(self, analysis):
-        """Extract contract term length from analysis"""
-        # This would need to be implemented based on your specific needs
-        return 0
+
+    def _get_contract_value(self, contract_text):
+        """Largest currency amount stated in the contract"""
+        value = 0
+        for match in MONEY.finditer(contract_text):
+            amount = float(match.group(1).replace(',', ''))
+            amount *= MONEY_MULTIPLIERS.get((match.group(2) or '').lower(), 1)
+            value = max(value, amount)
+        return value
+
+    def _get_term_length(self, contract_text):
+        """Longest stated term, in months"""
+        months = 0
+        for match in TERM_LENGTH.finditer(contract_text):
+            length = int(match.group(1))
+            if match.group(2).lower().startswith('year'):
+                length *= 12
+            months = max(months, length)
+        return months
+
+# Set in each pool worker by _init_policy_worker so rules are compiled once per worker
+_worker_policy = None
+
+def _init_policy_worker(policy_rules):
+    global _worker_policy
+    _worker_policy = PolicyService(policy_rules)
+
+def _check_in_worker(contract_text):
+    return _worker_policy.check_text(contract_text)
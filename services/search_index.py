@@ -0,0 +1,245 @@
+import html
+import re
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+DOC_TYPES = ('template', 'contract')
+
+# The database marks matches with these instead of the highlight tags, so the
+# snippet text can be HTML-escaped before the tags go in
+MATCH_OPEN, MATCH_CLOSE = '\ue000', '\ue001'
+
+# SQLite: external-content FTS5 tables over the source rows, kept current by
+# triggers so ORM writes and raw SQL writes are both indexed. Ranking weights
+# are stored in each table's rank config (title columns count most).
+SQLITE_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS templates_fts USING fts5(
+        name, description, content,
+        content='templates', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS templates_fts_ai AFTER INSERT ON templates BEGIN
+        INSERT INTO templates_fts(rowid, name, description, content)
+        VALUES (new.id, new.name, new.description, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS templates_fts_ad AFTER DELETE ON templates BEGIN
+        INSERT INTO templates_fts(templates_fts, rowid, name, description, content)
+        VALUES ('delete', old.id, old.name, old.description, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS templates_fts_au AFTER UPDATE OF name, description, content ON templates BEGIN
+        INSERT INTO templates_fts(templates_fts, rowid, name, description, content)
+        VALUES ('delete', old.id, old.name, old.description, old.content);
+        INSERT INTO templates_fts(rowid, name, description, content)
+        VALUES (new.id, new.name, new.description, new.content);
+    END""",
+    "INSERT INTO templates_fts(templates_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')",
+    # contracts has a string primary key, so the index is keyed by its implicit rowid
+    """CREATE VIRTUAL TABLE IF NOT EXISTS contracts_fts USING fts5(
+        title, content,
+        content='contracts', content_rowid='rowid', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS contracts_fts_ai AFTER INSERT ON contracts BEGIN
+        INSERT INTO contracts_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS contracts_fts_ad AFTER DELETE ON contracts BEGIN
+        INSERT INTO contracts_fts(contracts_fts, rowid, title, content)
+        VALUES ('delete', old.rowid, old.title, old.content);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS contracts_fts_au AFTER UPDATE OF title, content ON contracts BEGIN
+        INSERT INTO contracts_fts(contracts_fts, rowid, title, content)
+        VALUES ('delete', old.rowid, old.title, old.content);
+        INSERT INTO contracts_fts(rowid, title, content) VALUES (new.rowid, new.title, new.content);
+    END""",
+    "INSERT INTO contracts_fts(contracts_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0)')",
+]
+
+SQLITE_QUERIES = {
+    'template': """
+        SELECT 'template' AS type, CAST(t.id AS TEXT) AS id, t.name AS title,
+               snippet(templates_fts, -1, :open, :close, '…', 16) AS snippet, templates_fts.rank AS score
+        FROM templates_fts JOIN templates t ON t.id = templates_fts.rowid
+        WHERE templates_fts MATCH :query
+        ORDER BY templates_fts.rank LIMIT :limit
+    """,
+    'contract': """
+        SELECT 'contract' AS type, c.id AS id, c.title AS title,
+               snippet(contracts_fts, -1, :open, :close, '…', 16) AS snippet, contracts_fts.rank AS score
+        FROM contracts_fts JOIN contracts c ON c.rowid = contracts_fts.rowid
+        WHERE contracts_fts MATCH :query
+        ORDER BY contracts_fts.rank LIMIT :limit
+    """,
+}
+
+# Postgres: stored generated tsvector columns with GIN indexes, which the
+# database keeps current on every insert and update.
+POSTGRES_SCHEMA = [
+    """ALTER TABLE templates ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_templates_search_vector ON templates USING GIN (search_vector)",
+    """ALTER TABLE contracts ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_contracts_search_vector ON contracts USING GIN (search_vector)",
+]
+
+# Headlines are only built for the rows that survive the LIMIT
+POSTGRES_QUERIES = {
+    'template': """
+        SELECT type, id, title, ts_headline('english', body, websearch_to_tsquery('english', :query), :options) AS snippet, score
+        FROM (
+            SELECT 'template' AS type, CAST(t.id AS TEXT) AS id, t.name AS title,
+                   concat_ws(' ', t.description, t.content) AS body, ts_rank_cd(t.search_vector, q) AS score
+            FROM templates t, websearch_to_tsquery('english', :query) q
+            WHERE t.search_vector @@ q
+            ORDER BY score DESC LIMIT :limit
+        ) ranked
+    """,
+    'contract': """
+        SELECT type, id, title, ts_headline('english', body, websearch_to_tsquery('english', :query), :options) AS snippet, score
+        FROM (
+            SELECT 'contract' AS type, c.id AS id, c.title AS title,
+                   coalesce(c.content, '') AS body, ts_rank_cd(c.search_vector, q) AS score
+            FROM contracts c, websearch_to_tsquery('english', :query) q
+            WHERE c.search_vector @@ q
+            ORDER BY score DESC LIMIT :limit
+        ) ranked
+    """,
+}
+
+def fts5_query(query: str) -> Optional[str]:
+    """Turn free text into a safe FTS5 query in which every word must match.
+
+    Words are quoted so FTS5 operators in user input are taken literally; the
+    porter tokenizer already matches inflections such as indemnify/indemnified.
+    """
+    words = re.findall(r'\w+', query)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words)
+
+class SearchIndex:
+    """Ranked full-text search over template and contract text.
+
+    On SQLite this is FTS5 with BM25 ranking and snippet(); on Postgres it is
+    tsvector/GIN with ts_rank_cd and ts_headline. Both indexes are maintained
+    by the database itself, so every create, update and delete is reflected
+    immediately. Other backends fall back to unranked LIKE matching.
+
+    Note that SQLite's VACUUM may renumber the implicit rowids of contracts;
+    call rebuild() after vacuuming.
+    """
+
+    def __init__(self, engine: Engine, highlight=('<mark>', '</mark>')):
+        """highlight is the (open, close) markup around matches; snippet text is HTML-escaped."""
+        self.engine = engine
+        self.dialect = engine.dialect.name
+        self.highlight = highlight
+
+    def install(self):
+        """Create the index structures if needed and backfill existing rows."""
+        if self.dialect == 'sqlite':
+            with self.engine.begin() as conn:
+                created = not conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'templates_fts'"
+                )).first()
+                for statement in SQLITE_SCHEMA:
+                    conn.execute(text(statement))
+            if created:
+                self.rebuild()
+        elif self.dialect == 'postgresql':
+            with self.engine.begin() as conn:
+                for statement in POSTGRES_SCHEMA:
+                    conn.execute(text(statement))
+        else:
+            print(f"Full-text search is not supported on {self.dialect}; using LIKE matching")
+
+    def rebuild(self):
+        """Re-index every row from the source tables (SQLite only)."""
+        if self.dialect != 'sqlite':
+            return
+        with self.engine.begin() as conn:
+            conn.execute(text("INSERT INTO templates_fts(templates_fts) VALUES ('rebuild')"))
+            conn.execute(text("INSERT INTO contracts_fts(contracts_fts) VALUES ('rebuild')"))
+        print("Rebuilt full-text search index")
+
+    def search(self, query: str, doc_types: Sequence[str] = DOC_TYPES, limit: Optional[int] = 20) -> List[Dict]:
+        """Best matches across doc_types as {'type', 'id', 'title', 'snippet', 'score'}, best first.
+
+        limit=None returns every match. Snippets are HTML with matches wrapped
+        in the highlight markup.
+        """
+        unknown = [doc_type for doc_type in doc_types if doc_type not in DOC_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown document types: {', '.join(unknown)}")
+
+        if self.dialect == 'sqlite':
+            results = self._search_sqlite(query, doc_types, limit)
+        elif self.dialect == 'postgresql':
+            results = self._search_postgres(query, doc_types, limit)
+        else:
+            results = self._search_like(query, doc_types, limit)
+        for result in results:
+            result['snippet'] = self._render_snippet(result['snippet'])
+        return results[:limit]
+
+    def _render_snippet(self, snippet: Optional[str]) -> Optional[str]:
+        if snippet is None:
+            return None
+        escaped = html.escape(snippet, quote=False)
+        return escaped.replace(MATCH_OPEN, self.highlight[0]).replace(MATCH_CLOSE, self.highlight[1])
+
+    def _search_sqlite(self, query, doc_types, limit):
+        match = fts5_query(query)
+        if not match:
+            return []
+        # A negative LIMIT is no limit in SQLite
+        params = {'query': match, 'limit': -1 if limit is None else limit, 'open': MATCH_OPEN, 'close': MATCH_CLOSE}
+        results = []
+        with self.engine.connect() as conn:
+            for doc_type in doc_types:
+                results.extend(dict(row) for row in conn.execute(text(SQLITE_QUERIES[doc_type]), params).mappings())
+        # bm25 scores are negative; lower is better. Report higher-is-better.
+        for result in results:
+            result['score'] = -result['score']
+        results.sort(key=lambda r: r['score'], reverse=True)
+        return results
+
+    def _search_postgres(self, query, doc_types, limit):
+        if not query.strip():
+            return []
+        params = {
+            'query': query,
+            'limit': limit,
+            'options': f"StartSel={MATCH_OPEN}, StopSel={MATCH_CLOSE}, MaxFragments=1, MaxWords=24, MinWords=8"
+        }
+        results = []
+        with self.engine.connect() as conn:
+            for doc_type in doc_types:
+                results.extend(dict(row) for row in conn.execute(text(POSTGRES_QUERIES[doc_type]), params).mappings())
+        for result in results:
+            result['score'] = float(result['score'])
+        results.sort(key=lambda r: r['score'], reverse=True)
+        return results
+
+    def _search_like(self, query, doc_types, limit):
+        pattern = f"%{query}%"
+        limit_clause = '' if limit is None else ' LIMIT :limit'
+        results = []
+        with self.engine.connect() as conn:
+            if 'template' in doc_types:
+                rows = conn.execute(text(
+                    "SELECT CAST(id AS TEXT) AS id, name AS title, description AS snippet FROM templates "
+                    "WHERE name LIKE :p OR description LIKE :p OR content LIKE :p" + limit_clause
+                ), {'p': pattern, 'limit': limit}).mappings()
+                results.extend({'type': 'template', 'score': 0.0, **row} for row in rows)
+            if 'contract' in doc_types:
+                rows = conn.execute(text(
+                    "SELECT id, title, NULL AS snippet FROM contracts "
+                    "WHERE title LIKE :p OR content LIKE :p" + limit_clause
+                ), {'p': pattern, 'limit': limit}).mappings()
+                results.extend({'type': 'contract', 'score': 0.0, **row} for row in rows)
+        return results
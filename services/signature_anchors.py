@@ -0,0 +1,61 @@
+import re
+from typing import Dict, List, Tuple
+
+# Lines after a signature line searched for that block's fields
+BLOCK_LINES = 6
+
+_UNDERSCORES = re.compile(r'_{3,}')
+
+def anchor_string(kind: str, block: int) -> str:
+    """Anchor text for one tab, e.g. \\sig1\\; the closing backslash stops \\sig1\\ matching inside \\sig10\\."""
+    return f"\\{kind}{block}\\"
+
+def _field_kind(field: str) -> str:
+    return re.sub(r'[^a-z]', '', field.lower()) or 'field'
+
+def _column_after(line: str, start: int) -> int:
+    """Column of the first underscore run at or after start, else start itself."""
+    match = _UNDERSCORES.search(line, start)
+    return match.start() if match else start
+
+def plan_anchors(contract_text: str, locations: List[Dict]) -> Tuple[List[Tuple[int, int, str]], List[Dict]]:
+    """Decide where invisible anchor strings go for a contract's signature locations.
+
+    Each location's anchor_text is looked for line by line after the
+    previous location's line, so repeated anchors such as "By: ____" map to
+    successive blocks. The signature anchor sits on the underscores of that
+    line and each additional field's anchor just after "<Field>:" within the
+    block. Returns (placements, blocks): placements are
+    (line_index, column, anchor) for create_pdf_from_text, and blocks hold
+    {'sign': anchor, 'fields': [(field, anchor)]} per location found.
+    """
+    lines = contract_text.split('\n')
+    placements = []
+    blocks = []
+    next_line = 0
+    for location in locations:
+        anchor_text = (location.get('anchor_text') or '').strip()
+        if not anchor_text:
+            continue
+        line_index = next((i for i in range(next_line, len(lines)) if anchor_text in lines[i]), None)
+        if line_index is None:
+            continue
+        next_line = line_index + 1
+
+        number = len(blocks) + 1
+        sign = anchor_string('sig', number)
+        line = lines[line_index]
+        placements.append((line_index, _column_after(line, line.index(anchor_text)), sign))
+
+        fields = []
+        for field in location.get('additional_fields', []):
+            label = re.compile(rf'\b{re.escape(field)}\s*:', re.IGNORECASE)
+            for i in range(line_index, min(line_index + BLOCK_LINES, len(lines))):
+                match = label.search(lines[i])
+                if match:
+                    anchor = anchor_string(_field_kind(field), number)
+                    placements.append((i, _column_after(lines[i], match.end()), anchor))
+                    fields.append((field, anchor))
+                    break
+        blocks.append({'sign': sign, 'fields': fields})
+    return placements, blocks
@@ -0,0 +1,106 @@
+import os
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# Below this confidence analyze_signature_locations asks the LLM instead
+SIGNATURE_DETECTOR_MIN_CONFIDENCE = float(os.getenv('SIGNATURE_DETECTOR_MIN_CONFIDENCE', '0.7'))
+
+# "SIGNATURES:", "SIGNATURE PAGE", "IN WITNESS WHEREOF, the parties..."
+SIGNATURE_HEADING = re.compile(r'^\s*(?:SIGNATURES?\b|SIGNATURE PAGE\b|IN WITNESS WHEREOF\b)', re.IGNORECASE)
+# "Provider: _______________ Date: _______________", "By: ________"
+SIGNATURE_LINE = re.compile(r'^\s*(?P<anchor>(?P<label>[A-Za-z][\w .,&\'()/-]{0,60}?)\s*:\s*_{3,})(?P<rest>.*)$')
+# A signature line ends at its blank or continues with another field ("Date: ____");
+# "Fee: ______ per month" is a fill-in blank in running text
+TRAILING_FIELD = re.compile(r'^\s*(?:[A-Za-z][\w .]{0,30}:\s*_{3,}\s*)*$')
+# "_________________________" alone on a line, labelled by the next line
+BARE_SIGNATURE_LINE = re.compile(r'^\s*_{5,}\s*$')
+DATE_FIELD = re.compile(r'\bDate\s*:', re.IGNORECASE)
+NAME_LINE = re.compile(r'^\s*(?:Print(?:ed)?\s+)?Name\s*:', re.IGNORECASE)
+TITLE_LINE = re.compile(r'^\s*Title\s*:', re.IGNORECASE)
+WITNESS = re.compile(r'\bwitness', re.IGNORECASE)
+# Labels that name a field rather than a signer: "Date", "Printed Name",
+# "Effective Date", "Client Name", "Fee"
+FIELD_LABEL = re.compile(r'\b(?:dated?|names?|title|initials?|address|e-?mail|phone|fees?|amount|price)\b',
+                         re.IGNORECASE)
+
+def _block_fields(lines: List[str], start: int) -> Tuple[List[str], bool]:
+    """Fields on the signature line and the lines under it, up to a blank line or the next signature."""
+    fields = []
+    has_name = False
+    if DATE_FIELD.search(lines[start]):
+        fields.append('Date')
+    for line in lines[start + 1:start + 6]:
+        if not line.strip() or (SIGNATURE_LINE.match(line) and not FIELD_LABEL.search(SIGNATURE_LINE.match(line).group('label'))):
+            break
+        if NAME_LINE.match(line):
+            # The envelope builder already fills in the signer's name
+            has_name = True
+        elif TITLE_LINE.match(line) and 'Title' not in fields:
+            fields.append('Title')
+        elif DATE_FIELD.search(line) and 'Date' not in fields:
+            fields.append('Date')
+    return fields, has_name
+
+def detect_signature_blocks(contract_text: str) -> Tuple[List[Dict], float]:
+    """Find signature blocks with fixed patterns instead of asking the LLM.
+
+    Returns (locations, confidence). Locations have the same shape as
+    analyze_signature_locations: position, anchor_text, context and
+    additional_fields, with party signatures before witness signatures.
+    Confidence is that of the least certain block, 0 when none is found.
+    When the contract has a signature heading only lines after it count.
+    """
+    lines = contract_text.splitlines()
+    parties, witnesses = [], []
+    heading = next((i for i, line in enumerate(lines) if SIGNATURE_HEADING.match(line)), None)
+    in_signature_section = heading is not None
+
+    for i in range(heading + 1 if in_signature_section else 0, len(lines)):
+        line = lines[i]
+        match = SIGNATURE_LINE.match(line)
+        if match:
+            label = match.group('label').strip()
+            if FIELD_LABEL.search(label) or not TRAILING_FIELD.match(match.group('rest')):
+                continue
+            anchor_text = match.group('anchor').strip()
+            context = ' '.join(line.split())
+            if label.lower() == 'by':
+                # "ACME INC." / "By: ____": the party is named on the line above
+                label = next((l.strip() for l in reversed(lines[max(0, i - 2):i]) if l.strip()), label)
+            score = 0.6
+        elif BARE_SIGNATURE_LINE.match(line):
+            label = next((l.strip() for l in lines[i + 1:i + 2] if l.strip()), '')
+            if not label:
+                continue
+            # Identical underscore runs make a poor anchor; let the LLM confirm
+            anchor_text = line.strip()
+            context = f"{anchor_text} {label}"
+            score = 0.4
+        else:
+            continue
+
+        fields, has_name = _block_fields(lines, i)
+        if in_signature_section:
+            score += 0.2
+        if fields:
+            score += 0.1
+        if has_name:
+            score += 0.1
+
+        witness = bool(WITNESS.search(label))
+        location = {
+            'position': f"{'Witness' if witness else label} signature line",
+            'anchor_text': anchor_text,
+            'context': context,
+            'additional_fields': fields
+        }
+        (witnesses if witness else parties).append((location, round(min(score, 1.0), 2)))
+
+    blocks = parties + witnesses
+    # Anchor lookups return the first occurrence, so repeated anchors
+    # (several "By: ____" lines) would stack every signer on one spot
+    anchor_counts = Counter(location['anchor_text'] for location, _ in blocks)
+    scores = [min(score, 0.5) if anchor_counts[location['anchor_text']] > 1 else score
+              for location, score in blocks]
+    return [location for location, _ in blocks], (min(scores) if scores else 0.0)
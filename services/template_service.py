@@ -1,9 +1,14 @@
 from models import Template, Tag
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from services.pagination import keyset_paginate
+from services.search_index import SearchIndex
+from sqlalchemy.orm import Session, selectinload, load_only
+from typing import List, Optional, Sequence, Tuple
 from datetime import datetime
 
 class TemplateService:
+    # Fields the paged list endpoint can project
+    TEMPLATE_FIELDS = ('id', 'name', 'description', 'category', 'tags')
+
     def __init__(self, db: Session):
         self.db = db
 
@@ -39,7 +44,8 @@ class TemplateService:
     def list_templates(self, category: Optional[str] = None,
                       tags: List[str] = None) -> List[Template]:
         """List all templates, optionally filtered by category and tags."""
-        query = self.db.query(Template)
+        # Tags for every template are fetched in one extra IN query
+        query = self.db.query(Template).options(selectinload(Template.tags))
         
         if category:
             query = query.filter(Template.category == category)
@@ -50,12 +56,33 @@ class TemplateService:
         
         return query.all()
 
+    def list_templates_page(self, category: Optional[str] = None, tags: List[str] = None,
+                            fields: Sequence[str] = TEMPLATE_FIELDS, cursor: Optional[str] = None,
+                            limit: Optional[int] = None) -> Tuple[List[Template], Optional[str]]:
+        """One page of templates ordered by id, loading only the requested fields."""
+        columns = [getattr(Template, field) for field in fields if field != 'tags']
+        options = [selectinload(Template.tags)] if 'tags' in fields else []
+        query = self.db.query(Template).options(load_only(Template.id, *columns), *options)
+
+        if category:
+            query = query.filter(Template.category == category)
+
+        if tags:
+            for tag in tags:
+                query = query.filter(Template.tags.any(Tag.name == tag))
+
+        return keyset_paginate(query, [(Template.id, False)], cursor, limit)
+
     def update_template(self, template_id: int, **kwargs) -> Optional[Template]:
         """Update a template."""
         template = self.get_template(template_id)
         if not template:
             return None
 
+        if 'content' in kwargs and kwargs['content'] != template.content:
+            # The registered DocuSign template still has the old document
+            template.docusign_template_id = None
+
         for key, value in kwargs.items():
             if hasattr(template, key):
                 setattr(template, key, value)
@@ -79,12 +106,12 @@ class TemplateService:
         """Get a template by name."""
         return self.db.query(Template).filter(Template.name == name).first()
 
-    def search_templates(self, query: str) -> List[Template]:
-        """Search templates by name or description."""
-        return self.db.query(Template).filter(
-            (Template.name.ilike(f"%{query}%")) |
-            (Template.description.ilike(f"%{query}%"))
-        ).all()
+    def search_templates(self, query: str, limit: Optional[int] = None) -> List[Template]:
+        """Search templates by name, description and content, best match first; every match unless limit is given."""
+        results = SearchIndex(self.db.get_bind()).search(query, doc_types=('template',), limit=limit)
+        ids = [int(result['id']) for result in results]
+        templates = {t.id: t for t in self.db.query(Template).filter(Template.id.in_(ids))}
+        return [templates[template_id] for template_id in ids if template_id in templates]
 
     def get_templates_by_tag(self, tag_name: str) -> List[Template]:
         """Get all templates with a specific tag."""
@@ -0,0 +1,162 @@
+import difflib
+import json
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from models import ContractVersion
+
+def encode_delta(base: str, content: str) -> bytes:
+    """Compressed forward delta turning base into content.
+
+    The delta is a JSON list of line ranges copied from base ([start, end])
+    and literal inserted text (strings), compressed with zlib.
+    """
+    base_lines = base.splitlines(keepends=True)
+    new_lines = content.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            ops.append(''.join(new_lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(',', ':')).encode('utf-8'))
+
+def apply_delta(base: str, delta: bytes) -> str:
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(zlib.decompress(delta).decode('utf-8')):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0]:op[1]])
+    return ''.join(parts)
+
+class VersionStore:
+    """Stores contract versions as periodic full snapshots plus forward deltas.
+
+    Every snapshot_interval-th version (and any version whose delta would not
+    be meaningfully smaller) keeps its full text in content; the rest keep an
+    empty content and a compressed delta against the previous version.
+    Reconstructed versions are kept in a process-wide LRU.
+    """
+
+    _materialized = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, db: Session, snapshot_interval: int = 10, cache_size: int = 128):
+        self.db = db
+        self.snapshot_interval = snapshot_interval
+        self.cache_size = cache_size
+
+    def _cache_get(self, contract_id, version_num) -> Optional[str]:
+        with self._lock:
+            content = self._materialized.get((contract_id, version_num))
+            if content is not None:
+                self._materialized.move_to_end((contract_id, version_num))
+            return content
+
+    def _cache_put(self, contract_id, version_num, content: str):
+        with self._lock:
+            self._materialized[(contract_id, version_num)] = content
+            self._materialized.move_to_end((contract_id, version_num))
+            while len(self._materialized) > self.cache_size:
+                self._materialized.popitem(last=False)
+
+    def storage_for(self, contract_id, version_num: int, content: str,
+                    previous: Optional[str]) -> Dict:
+        """Column values to store for a new version given the previous version's text."""
+        if previous is None or version_num % self.snapshot_interval == 1:
+            return {'content': content, 'is_snapshot': True, 'delta': None}
+
+        delta = encode_delta(previous, content)
+        # Not worth a delta when most of the document changed
+        if len(delta) * 2 > len(zlib.compress(content.encode('utf-8'))):
+            return {'content': content, 'is_snapshot': True, 'delta': None}
+        return {'content': '', 'is_snapshot': False, 'delta': delta}
+
+    def add_version(self, contract_id, version_num: int, content: str,
+                    created_by_id: int) -> ContractVersion:
+        """Build (but do not commit) the row for a new version."""
+        previous = None
+        if version_num > 1:
+            previous = self.get_content(contract_id, version_num - 1)
+        version = ContractVersion(
+            contract_id=contract_id,
+            version=version_num,
+            created_by_id=created_by_id,
+            **self.storage_for(contract_id, version_num, content, previous)
+        )
+        self._cache_put(contract_id, version_num, content)
+        return version
+
+    def get_content(self, contract_id, version_num: int) -> Optional[str]:
+        """Reconstruct the full text of one version."""
+        cached = self._cache_get(contract_id, version_num)
+        if cached is not None:
+            return cached
+
+        snapshot = self.db.query(ContractVersion.version).filter(
+            ContractVersion.contract_id == contract_id,
+            ContractVersion.version <= version_num,
+            ContractVersion.is_snapshot.isnot(False)
+        ).order_by(ContractVersion.version.desc()).first()
+        start = snapshot.version if snapshot else 1
+
+        # Start from a closer materialized version if we have one
+        with self._lock:
+            cached_versions = [v for (c, v) in self._materialized if c == contract_id and start < v < version_num]
+        base = None
+        if cached_versions:
+            start = max(cached_versions)
+            base = self._cache_get(contract_id, start)
+
+        rows = self.db.query(
+            ContractVersion.version, ContractVersion.content,
+            ContractVersion.is_snapshot, ContractVersion.delta
+        ).filter(
+            ContractVersion.contract_id == contract_id,
+            ContractVersion.version >= start,
+            ContractVersion.version <= version_num
+        ).order_by(ContractVersion.version).all()
+
+        if base is not None:
+            rows = [row for row in rows if row.version > start]
+        content = base
+        for row in rows:
+            if row.is_snapshot is False:
+                if content is None:
+                    return None
+                content = apply_delta(content, row.delta)
+            else:
+                content = row.content
+
+        if not rows or rows[-1].version != version_num:
+            return None
+        self._cache_put(contract_id, version_num, content)
+        return content
+
+    def materialize(self, version: ContractVersion) -> ContractVersion:
+        """Load a version's full text into its content attribute without dirtying it."""
+        if version is not None and version.is_snapshot is False:
+            set_committed_value(version, 'content', self.get_content(version.contract_id, version.version))
+        return version
+
+    def materialize_all(self, versions: List[ContractVersion]) -> List[ContractVersion]:
+        """Materialize many versions of one contract in a single forward pass."""
+        content = None
+        previous_num = None
+        for version in sorted(versions, key=lambda v: v.version):
+            if version.is_snapshot is False:
+                if content is None or version.version != previous_num + 1:
+                    content = self.get_content(version.contract_id, version.version)
+                else:
+                    content = apply_delta(content, version.delta)
+                set_committed_value(version, 'content', content)
+            else:
+                content = version.content
+            previous_num = version.version
+        return versions
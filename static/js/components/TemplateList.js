@@ -69,10 +69,10 @@ const TemplateList = ({ onSelectTemplate }) => {
                         <div className="mt-2 flex gap-2">
                             {template.tags.map(tag => (
                                 <span 
-                                    key={tag}
+                                    key={tag.id}
                                     className="px-2 py-1 bg-blue-100 text-blue-800 rounded-full text-xs"
                                 >
-                                    {tag}
+                                    {tag.name}
                                 </span>
                             ))}
                         </div>
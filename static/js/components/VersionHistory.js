@@ -91,23 +91,23 @@ const VersionHistory = ({ contractId }) => {
             {comparison && (
                 <div className="mt-4">
                     <h3 className="font-semibold mb-2">Comparison Results</h3>
-                    <div className="grid grid-cols-2 gap-4">
-                        <div>
-                            <h4 className="font-medium mb-2">
-                                Version {comparison.version1.number}
-                            </h4>
-                            <pre className="p-4 bg-gray-50 rounded overflow-auto">
-                                {comparison.version1.content}
-                            </pre>
-                        </div>
-                        <div>
-                            <h4 className="font-medium mb-2">
-                                Version {comparison.version2.number}
-                            </h4>
-                            <pre className="p-4 bg-gray-50 rounded overflow-auto">
-                                {comparison.version2.content}
-                            </pre>
-                        </div>
+                    <p className="text-sm text-gray-600 mb-2">
+                        Version {comparison.version1.number} &rarr; Version {comparison.version2.number}:{' '}
+                        {comparison.diff.stats.tokens_inserted} inserted, {comparison.diff.stats.tokens_deleted} deleted
+                    </p>
+                    <div className="p-4 bg-gray-50 rounded overflow-auto space-y-1">
+                        {comparison.diff.opcodes
+                            .filter(opcode => opcode.op !== 'equal')
+                            .map((opcode, index) => (
+                                <div key={index} className="text-sm">
+                                    <span className="text-gray-500 mr-2">@{opcode.a_start}</span>
+                                    <span className={opcode.op === 'insert'
+                                        ? 'bg-green-100 text-green-800'
+                                        : 'bg-red-100 text-red-800 line-through'}>
+                                        {opcode.text}
+                                    </span>
+                                </div>
+                            ))}
                     </div>
                 </div>
             )}